@@ -0,0 +1,27 @@
+"""
+Microbenchmarks for the authorization hot path.
+The benchmarks run without network access, introspection requests are answered
+by a local stub of the introspection endpoint.
+
+Run all benchmarks and write the results as json:
+    python -m benchmarks --output results.json
+"""
+
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict
+
+# registered benchmarks, name -> context manager yielding the callable to time
+BENCHMARKS: Dict[str, Callable[[], ContextManager[Callable[[], object]]]] = {}
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark, the decorated generator sets up the benchmark,
+    yields the callable to time and tears the benchmark down afterwards
+    """
+
+    def decorator(fn):
+        BENCHMARKS[name] = contextmanager(fn)
+        return fn
+
+    return decorator
@@ -0,0 +1,150 @@
+"""
+Run the benchmarks and write the results as json
+
+python -m benchmarks [--filter NAME] [--repeat N] [--output FILE] [--compare FILE]
+"""
+
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from typing import Dict, List, Optional
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from . import BENCHMARKS, hot_path  # noqa: F401 registers the benchmarks
+
+
+def calibrate(fn, min_time: float) -> int:
+    """
+    Return the number of calls needed for one round to take at least min_time seconds
+    """
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def run_benchmark(name: str, repeat: int, min_time: float) -> Dict:
+    """
+    Run a single benchmark and return its timings in nanoseconds per call
+    """
+
+    with BENCHMARKS[name]() as fn:
+        # warm up caches, connections and lazily initialized state
+        fn()
+        number = calibrate(fn, min_time)
+
+        timings: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                fn()
+            timings.append((time.perf_counter_ns() - start) / number)
+
+    median = statistics.median(timings)
+    return dict(
+        name=name,
+        rounds=repeat,
+        iterations=number,
+        min_ns=min(timings),
+        max_ns=max(timings),
+        mean_ns=statistics.mean(timings),
+        median_ns=median,
+        stdev_ns=statistics.stdev(timings) if repeat > 1 else 0.0,
+        ops_per_sec=1e9 / median if median else None,
+    )
+
+
+def metadata() -> Dict:
+    """
+    Environment the benchmarks ran in
+    """
+
+    try:
+        package_version = version("zitadel-authorizer")
+    except PackageNotFoundError:
+        package_version = None
+
+    return dict(
+        package_version=package_version,
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def print_results(results: List[Dict], baseline: Optional[Dict] = None):
+    """
+    Print a human readable summary to stderr, compared to the baseline if given
+    """
+
+    baseline_medians = {
+        result["name"]: result["median_ns"]
+        for result in (baseline or {}).get("benchmarks", [])
+    }
+
+    for result in results:
+        line = f"{result['name']:<55} {result['median_ns'] / 1000:>12.2f} us"
+        if result["name"] in baseline_medians:
+            ratio = result["median_ns"] / baseline_medians[result["name"]]
+            line += f" {ratio:>8.2f}x"
+        print(line, file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="only run benchmarks containing the given name, can be repeated",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark")
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="minimum duration of a single round in seconds",
+    )
+    parser.add_argument("--output", help="write the json results to the file")
+    parser.add_argument("--compare", help="json results of a previous run")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    args = parser.parse_args(argv)
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not args.filter or any(pattern in name for pattern in args.filter)
+    ]
+
+    if args.list:
+        print("\n".join(names))
+        return
+
+    results = [run_benchmark(name, args.repeat, args.min_time) for name in names]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print_results(results, baseline)
+
+    document = json.dumps(dict(metadata=metadata(), benchmarks=results), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(document)
+    else:
+        print(document)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmarks of the introspection, authorization and middleware hot path
+"""
+
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
+import json
+import os
+import tempfile
+import time
+
+from tests.fixtures.aws import AWS_API_GATEWAY_PROXY_EVENT_WITH_AUTHORIZER
+from tests.fixtures.stub import StubIntrospectionServer
+from tests.fixtures.zitadel import (
+    API_APP_KEY,
+    INTROSPECTION_RESPONSE_BEARER_NO_GRANTS,
+    INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS,
+)
+from zitadel_authorizer.assertion import ClientAssertion
+from zitadel_authorizer.authorizer import Authorizer
+from zitadel_authorizer.cache import IntrospectionCache
+from zitadel_authorizer.introspector import Introspector
+from zitadel_authorizer.middleware import (
+    IsAuthenticatedMiddleware,
+    ProjectRoleAuthorizationMiddleware,
+)
+from zitadel_authorizer.models import ApplicationKey, IntrospectionResponse
+from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+from . import benchmark
+
+
+class BenchmarkApp:
+    """
+    Minimal resolver exposing the current event to the middlewares
+    """
+
+    def __init__(self, event: APIGatewayProxyEventV2):
+        self.current_event = event
+        self.context = {}
+
+
+def next_middleware(app):
+    return True
+
+
+def introspection_response_with_grants() -> dict:
+    """
+    Response of an active token which does not expire during the benchmark
+    """
+
+    response = json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    response["exp"] = int(time.time()) + 60 * 60
+    return response
+
+
+def stub_introspector(**kwargs):
+    """
+    Start the stub endpoint and return it together with an introspector using it
+    """
+
+    server = StubIntrospectionServer().start()
+    server.responses["valid_token"] = introspection_response_with_grants()
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(API_APP_KEY),
+        issuer_url=server.issuer_url,
+        introspection_endpoint=server.url,
+        **kwargs,
+    )
+
+    return server, introspector
+
+
+@benchmark("introspector.introspect_token")
+def introspect_token():
+    server, introspector = stub_introspector()
+    try:
+        yield lambda: introspector.introspect_token("valid_token")
+    finally:
+        introspector.close()
+        server.stop()
+
+
+@benchmark("introspector.introspect_token.cached")
+def introspect_token_cached():
+    server, introspector = stub_introspector(
+        cache=IntrospectionCache(maxsize=1024, ttl=60)
+    )
+    try:
+        introspector.introspect_token("valid_token")
+        yield lambda: introspector.introspect_token("valid_token")
+    finally:
+        introspector.close()
+        server.stop()
+
+
+@benchmark("client_assertion.sign")
+def client_assertion_sign():
+    assertion = ClientAssertion(
+        application_key=ApplicationKey.from_base64_string(API_APP_KEY),
+        audience="http://localhost:8080",
+    )
+    yield assertion.sign
+
+
+@benchmark("client_assertion.get")
+def client_assertion_get():
+    assertion = ClientAssertion(
+        application_key=ApplicationKey.from_base64_string(API_APP_KEY),
+        audience="http://localhost:8080",
+    )
+    assertion.get()
+    yield assertion.get
+
+
+@benchmark("introspection_response.validate.no_grants")
+def introspection_response_validate_no_grants():
+    data = json.loads(INTROSPECTION_RESPONSE_BEARER_NO_GRANTS)
+    yield lambda: IntrospectionResponse(**data)
+
+
+@benchmark("introspection_response.validate.with_grants")
+def introspection_response_validate_with_grants():
+    data = json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    yield lambda: IntrospectionResponse(**data)
+
+
+@benchmark("introspection_response.parse.dict")
+def introspection_response_parse_dict():
+    # the default path of the introspector: decode into a dict, then validate it
+    raw = INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS.encode()
+    yield lambda: IntrospectionResponse(**json.loads(raw))
+
+
+@benchmark("introspection_response.parse.fast")
+def introspection_response_parse_fast():
+    # the trusted fast path: parse and validate the raw bytes in a single step
+    raw = INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS.encode()
+    yield lambda: IntrospectionResponse.from_json(raw)
+
+
+@benchmark("introspection_response.parse.lazy_profile")
+def introspection_response_parse_lazy_profile():
+    # only the authorization claims are decoded, profile claims on access
+    raw = INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS.encode()
+    yield lambda: IntrospectionResponse.from_json(raw, lazy_profile=True)
+
+
+@benchmark("authorizer.is_authorized")
+def authorizer_is_authorized():
+    token = IntrospectionResponse(
+        **json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    )
+    authorizer = Authorizer(
+        required_client_id="314329296124575747",
+        required_scopes=["openid", "profile", "email"],
+        required_roles=["ADMIN", "USER"],
+    )
+    yield lambda: authorizer.is_authorized(token)
+
+
+@benchmark("authorizer.is_authorized.many_claims")
+def authorizer_is_authorized_many_claims():
+    data = json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    data["scope"] = " ".join(f"scope:{i}" for i in range(50))
+    data["urn:zitadel:iam:org:project:roles"] = {
+        f"ROLE_{i}": {"314329284565073923": "zitadel.localhost"} for i in range(50)
+    }
+    token = IntrospectionResponse(**data)
+    authorizer = Authorizer(
+        required_scopes=[f"scope:{i}" for i in range(0, 50, 5)],
+        required_roles=[f"ROLE_{i}" for i in range(0, 50, 5)],
+    )
+    yield lambda: authorizer.is_authorized(token)
+
+
+@benchmark("authorizer.is_authorized.routes")
+def authorizer_is_authorized_routes():
+    token = IntrospectionResponse(
+        **json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    )
+    # hundreds of routes served by a single authorizer
+    routes = {}
+    for i in range(100):
+        routes[f"GET /resource{i}"] = {"required_scopes": ["openid"]}
+        routes[f"GET /resource{i}/{{id}}"] = {"required_roles": ["USER"]}
+        routes[f"ANY /resource{i}/{{id}}/{{proxy+}}"] = {"required_roles": ["ADMIN"]}
+    authorizer = Authorizer(required_scopes=["openid"], routes=routes)
+    yield lambda: authorizer.is_authorized(token, "GET /resource99/42/files/a")
+
+
+@benchmark("authorizer.return_simple_authorizer_response")
+def authorizer_return_simple_authorizer_response():
+    token = IntrospectionResponse(
+        **json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    )
+    authorizer = Authorizer(required_roles=["ADMIN"])
+    yield lambda: authorizer.return_simple_authorizer_response(token).asdict()
+
+
+@benchmark("authorizer.return_simple_authorizer_response.projected")
+def authorizer_return_simple_authorizer_response_projected():
+    token = IntrospectionResponse(
+        **json.loads(INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS)
+    )
+    authorizer = Authorizer(
+        required_roles=["ADMIN"],
+        context_claims=["active", "sub", "client_id", "scope", "project_roles"],
+        context_exclude_none=True,
+        context_compact=True,
+    )
+    yield lambda: authorizer.return_simple_authorizer_response(token).asdict()
+
+
+@benchmark("middleware.is_authenticated")
+def middleware_is_authenticated():
+    event = json.loads(AWS_API_GATEWAY_PROXY_EVENT_WITH_AUTHORIZER)
+    middleware = IsAuthenticatedMiddleware()
+    # a new event per call, the event data class caches parsed values
+    yield lambda: middleware.handler(
+        BenchmarkApp(APIGatewayProxyEventV2(event)), next_middleware
+    )
+
+
+@benchmark("middleware.project_role_authorization")
+def middleware_project_role_authorization():
+    event = json.loads(AWS_API_GATEWAY_PROXY_EVENT_WITH_AUTHORIZER)
+    middleware = ProjectRoleAuthorizationMiddleware(roles=["example"])
+    yield lambda: middleware.handler(
+        BenchmarkApp(APIGatewayProxyEventV2(event)), next_middleware
+    )
+
+
+@benchmark("shared_memory_backend.get")
+def shared_memory_backend_get():
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SharedMemoryCacheBackend(os.path.join(directory, "cache"))
+        backend.set("key", INTROSPECTION_RESPONSE_BEARER_WITH_GRANTS.encode(), ttl=60)
+        try:
+            yield lambda: backend.get("key")
+        finally:
+            backend.close()
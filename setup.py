@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="zitadel-authorizer",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     install_requires=[
         "Authlib>=1.5.2",
         "aws-lambda-powertools>=3.6.0",
@@ -13,8 +13,12 @@ setup(
         "PyJWT>=2.10.1",
         "requests>=2.32.3",
     ],
+    entry_points={
+        "console_scripts": ["zitadel-authorizer=zitadel_authorizer.cli:main"],
+    },
     extras_require={
-        "dev": ["pytest", "testcontainers", "moto[ssm]", "pkce"],
+        "async": ["httpx>=0.28.1"],
+        "dev": ["pytest", "testcontainers", "moto[ssm]", "pkce", "httpx>=0.28.1"],
     },
     classifiers=[
         "Programming Language :: Python :: 3",
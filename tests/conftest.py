@@ -2,4 +2,6 @@ pytest_plugins = [
     "tests.fixtures.zitadel",
     "tests.fixtures.events",
     "tests.fixtures.aws",
+    "tests.fixtures.stub",
+    "tests.fixtures.resp",
 ]
@@ -0,0 +1,145 @@
+"""
+Local stand-in of a redis server speaking the redis protocol (RESP), used to
+test the redis cache backend without a running redis instance.
+"""
+
+import pytest
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class StubRESPHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the commands used by the redis cache backend
+    """
+
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        server: "StubRESPServer" = self.server
+
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+
+            server.record(command)
+            if server.close_connections:
+                return
+
+            if server.delay:
+                time.sleep(server.delay)
+
+            self.wfile.write(server.execute(command))
+
+    def read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line.startswith(b"*"):
+            return None
+
+        command = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            command.append(self.rfile.read(length + 2)[:-2])
+
+        return command
+
+
+def bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StubRESPServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded server keeping the keys in memory
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password: Optional[str] = None):
+        super().__init__(("127.0.0.1", 0), StubRESPHandler)
+
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands: List[List[bytes]] = []
+        # drop connections without answering, e.g. to test reconnects
+        self.close_connections = False
+        # seconds to wait before each reply, e.g. to test concurrent commands
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def record(self, command: List[bytes]):
+        with self._lock:
+            self.commands.append(command)
+
+    def command_names(self) -> List[str]:
+        return [command[0].decode().upper() for command in self.commands]
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].decode().upper(), command[1:]
+
+        with self._lock:
+            if name == "PING":
+                return b"+PONG\r\n"
+
+            if name == "AUTH":
+                if args[-1].decode() != self.password:
+                    return b"-WRONGPASS invalid password\r\n"
+                return b"+OK\r\n"
+
+            if name == "SELECT":
+                return b"+OK\r\n"
+
+            if name == "GET":
+                return bulk(self._get(args[0]))
+
+            if name == "MGET":
+                return b"*%d\r\n" % len(args) + b"".join(
+                    bulk(self._get(key)) for key in args
+                )
+
+            if name == "SET":
+                expires_at = None
+                if len(args) == 4 and args[2].upper() == b"PX":
+                    expires_at = time.monotonic() + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+
+            if name == "DEL":
+                deleted = sum(self.data.pop(key, None) is not None for key in args)
+                return b":%d\r\n" % deleted
+
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.fixture
+def resp_server():
+    server = StubRESPServer().start()
+    yield server
+    server.stop()
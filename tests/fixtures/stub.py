@@ -0,0 +1,113 @@
+"""
+Local stub of the zitadel introspection endpoint, used to test the introspector
+without a running zitadel instance.
+"""
+
+import pytest
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs
+
+
+class StubIntrospectionHandler(BaseHTTPRequestHandler):
+    """
+    Answers every POST with the configured introspection response of the server
+    and GET requests with the configured document of the path, e.g. the jwks
+    """
+
+    # keep-alive requires HTTP/1.1, without nagle headers and body
+    # are not delayed by the delayed ack of the client
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server: "StubIntrospectionServer" = self.server
+
+        length = int(self.headers.get("Content-Length", 0))
+        data = {
+            key: value[0]
+            for key, value in parse_qs(self.rfile.read(length).decode()).items()
+        }
+        server.record(self.client_address, data)
+
+        if server.delay:
+            time.sleep(server.delay)
+
+        self.send_json(server.status_code, server.response_for(data.get("token")))
+
+    def do_GET(self):
+        server: "StubIntrospectionServer" = self.server
+        server.record(self.client_address, dict(path=self.path))
+
+        if self.path not in server.documents:
+            self.send_json(404, {})
+            return
+
+        self.send_json(200, server.documents[self.path])
+
+    def send_json(self, status_code: int, document: Dict):
+        body = json.dumps(document).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubIntrospectionServer(ThreadingHTTPServer):
+    """
+    Threaded http server returning introspection responses per token
+    """
+
+    daemon_threads = True
+
+    def __init__(self, default_response: Dict = None):
+        super().__init__(("127.0.0.1", 0), StubIntrospectionHandler)
+
+        self.default_response = default_response or {"active": False}
+        self.responses: Dict[str, Dict] = {}
+        self.documents: Dict[str, Dict] = {}
+        self.requests: List[Dict] = []
+        self.client_addresses: List = []
+        self.status_code = 200
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def issuer_url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.issuer_url}/oauth/v2/introspect"
+
+    def response_for(self, token: str) -> Dict:
+        return self.responses.get(token, self.default_response)
+
+    def record(self, client_address, data: Dict):
+        with self._lock:
+            self.client_addresses.append(client_address)
+            self.requests.append(data)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.fixture
+def introspection_stub():
+    server = StubIntrospectionServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,121 @@
+import pytest
+import time
+import jwt
+
+
+class FakeTime:
+    """
+    Replacement for the time module to control the clock of the client assertion
+    """
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def application_key(api_app_key):
+    from zitadel_authorizer.models import ApplicationKey
+
+    return ApplicationKey.from_base64_string(api_app_key)
+
+
+def test_client_assertion_sign(application_key):
+    from zitadel_authorizer.assertion import ClientAssertion
+
+    assertion = ClientAssertion(
+        application_key=application_key, audience="http://localhost:8080"
+    )
+    token, expires_at = assertion.sign()
+
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "RS256"
+    assert header["kid"] == "310410137829376003"
+
+    payload = jwt.decode(token, options={"verify_signature": False})
+    assert payload["iss"] == "310409849496207363"
+    assert payload["sub"] == "310409849496207363"
+    assert payload["aud"] == "http://localhost:8080"
+    assert payload["exp"] == expires_at
+    assert payload["exp"] - payload["iat"] == 60 * 60
+
+
+def test_client_assertion_is_reused(monkeypatch, application_key):
+    from zitadel_authorizer import assertion as assertion_module
+
+    clock = FakeTime(1_000_000)
+    monkeypatch.setattr(assertion_module, "time", clock)
+
+    assertion = assertion_module.ClientAssertion(
+        application_key=application_key,
+        audience="http://localhost:8080",
+        lifetime=3600,
+        refresh_margin=60,
+        presign_window=0,
+    )
+
+    token = assertion.get()
+    assert assertion.expires_at == 1_000_000 + 3600
+
+    # the assertion is reused until the refresh margin is reached
+    clock.now += 3600 - 61
+    assert assertion.get() == token
+
+    # within the refresh margin a new assertion is signed
+    clock.now += 1
+    assert assertion.get() != token
+    assert assertion.expires_at == 1_000_000 + 3600 - 60 + 3600
+
+
+def test_client_assertion_is_presigned(monkeypatch, application_key):
+    from zitadel_authorizer import assertion as assertion_module
+
+    clock = FakeTime(1_000_000)
+    monkeypatch.setattr(assertion_module, "time", clock)
+
+    assertion = assertion_module.ClientAssertion(
+        application_key=application_key,
+        audience="http://localhost:8080",
+        lifetime=3600,
+        refresh_margin=60,
+        presign_window=300,
+    )
+
+    token = assertion.get()
+
+    # within the presign window the current assertion is still returned
+    # while the next one is signed in the background
+    clock.now += 3600 - 60 - 300
+    signed = []
+    original_sign = assertion.sign
+
+    def sign(*args):
+        signed.append(True)
+        return original_sign(*args)
+
+    monkeypatch.setattr(assertion, "sign", sign)
+    assert assertion.get() == token
+
+    for _ in range(100):
+        if assertion.expires_at != 1_000_000 + 3600:
+            break
+        time.sleep(0.01)
+
+    assert signed == [True]
+    assert assertion.expires_at == 1_000_000 + 3600 - 360 + 3600
+    assert assertion.get() != token
+
+
+def test_client_assertion_invalid_configuration(application_key):
+    from zitadel_authorizer.assertion import ClientAssertion
+
+    with pytest.raises(ValueError):
+        ClientAssertion(
+            application_key=application_key,
+            audience="http://localhost:8080",
+            lifetime=300,
+            refresh_margin=60,
+            presign_window=300,
+        )
@@ -0,0 +1,234 @@
+import pytest
+import asyncio
+from urllib.parse import parse_qs
+
+httpx = pytest.importorskip("httpx")
+
+
+class MockIntrospectionEndpoint:
+    """
+    Async httpx transport handler answering introspection requests
+    """
+
+    def __init__(self, responses=None, delay: float = 0, status_code: int = 200):
+        self.responses = responses or {}
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: "httpx.Request") -> "httpx.Response":
+        data = {
+            key: value[0] for key, value in parse_qs(request.content.decode()).items()
+        }
+        self.requests.append(data)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        return httpx.Response(
+            self.status_code,
+            json=self.responses.get(data["token"], {"active": False}),
+        )
+
+
+def create_introspector(api_app_key, endpoint, **kwargs):
+    from zitadel_authorizer.async_introspector import AsyncIntrospector
+    from zitadel_authorizer.models import ApplicationKey
+
+    return AsyncIntrospector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint="http://localhost:8080/oauth/v2/introspect",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(endpoint)),
+        **kwargs,
+    )
+
+
+def test_async_introspector_introspect_token(
+    api_app_key, introspection_response_bearer_with_grants
+):
+    endpoint = MockIntrospectionEndpoint(
+        responses={"valid_token": introspection_response_bearer_with_grants}
+    )
+
+    async def run():
+        async with create_introspector(api_app_key, endpoint) as introspector:
+            valid = await introspector.introspect_token("valid_token")
+            invalid = await introspector.introspect_token("invalid_token")
+            return introspector, valid, invalid
+
+    introspector, valid, invalid = asyncio.run(run())
+
+    assert valid.active is True
+    assert valid.project_roles == ["ADMIN", "USER"]
+    assert invalid.active is False
+
+    assert endpoint.requests[0]["token"] == "valid_token"
+    assert (
+        endpoint.requests[0]["client_assertion_type"]
+        == "urn:ietf:params:oauth:client-assertion-type:jwt-bearer"
+    )
+    assert (
+        endpoint.requests[0]["client_assertion"] == introspector.client_assertion.get()
+    )
+
+
+def test_async_introspector_concurrency_limit(api_app_key):
+    endpoint = MockIntrospectionEndpoint(delay=0.05)
+
+    async def run():
+        async with create_introspector(
+            api_app_key, endpoint, max_concurrency=3
+        ) as introspector:
+            return await asyncio.gather(
+                *(introspector.introspect_token(f"token_{i}") for i in range(12))
+            )
+
+    results = asyncio.run(run())
+
+    assert len(results) == 12
+    assert len(endpoint.requests) == 12
+    assert endpoint.max_in_flight == 3
+
+
+def test_async_introspector_single_flight(api_app_key):
+    endpoint = MockIntrospectionEndpoint(delay=0.05)
+
+    async def run():
+        async with create_introspector(api_app_key, endpoint) as introspector:
+            return await asyncio.gather(
+                *(introspector.introspect_token("invalid_token") for _ in range(10))
+            )
+
+    results = asyncio.run(run())
+
+    assert all(result.active is False for result in results)
+    assert len(endpoint.requests) == 1
+
+
+def test_async_introspector_http_error(api_app_key):
+    endpoint = MockIntrospectionEndpoint(delay=0.05, status_code=500)
+
+    async def run():
+        async with create_introspector(api_app_key, endpoint) as introspector:
+            return await asyncio.gather(
+                *(introspector.introspect_token("invalid_token") for _ in range(3)),
+                return_exceptions=True,
+            )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert len(endpoint.requests) == 1
+
+
+def test_async_introspector_cache(api_app_key):
+    from zitadel_authorizer.cache import IntrospectionCache
+
+    endpoint = MockIntrospectionEndpoint()
+    negative_cache = IntrospectionCache(maxsize=10, ttl=5)
+
+    async def run():
+        async with create_introspector(
+            api_app_key, endpoint, negative_cache=negative_cache
+        ) as introspector:
+            for _ in range(3):
+                await introspector.introspect_token("invalid_token")
+
+    asyncio.run(run())
+
+    assert len(endpoint.requests) == 1
+    assert negative_cache.hits == 2
+
+
+def test_async_introspector_metrics(api_app_key):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+
+    endpoint = MockIntrospectionEndpoint()
+    metrics = InMemoryMetricsSink()
+
+    async def run():
+        async with create_introspector(
+            api_app_key,
+            endpoint,
+            negative_cache=IntrospectionCache(maxsize=10, ttl=5),
+            metrics=metrics,
+        ) as introspector:
+            await introspector.introspect_token("invalid_token")
+            await introspector.introspect_token("invalid_token")
+
+    asyncio.run(run())
+
+    stats = metrics.stats()
+    assert stats["counters"] == {
+        "CacheMisses": 1,
+        "NegativeCacheHits": 1,
+        "IntrospectionStatus200": 1,
+    }
+    assert stats["timings"]["IntrospectionRequestLatency"]["count"] == 1
+
+
+def test_async_introspector_circuit_breaker(api_app_key):
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+    endpoint = MockIntrospectionEndpoint(status_code=503)
+
+    async def run():
+        async with create_introspector(
+            api_app_key,
+            endpoint,
+            circuit_breaker=CircuitBreaker(failure_threshold=1),
+        ) as introspector:
+            with pytest.raises(httpx.HTTPStatusError):
+                await introspector.introspect_token("token")
+            with pytest.raises(CircuitOpenError):
+                await introspector.introspect_token("token")
+
+    asyncio.run(run())
+
+    assert len(endpoint.requests) == 1
+
+
+def test_async_introspector_refresh_ahead(
+    monkeypatch, api_app_key, introspection_response_bearer_with_grants
+):
+    import time
+
+    from zitadel_authorizer import cache as cache_module
+    from zitadel_authorizer.cache import IntrospectionCache
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    endpoint = MockIntrospectionEndpoint(responses={"valid_token": response})
+    cache = IntrospectionCache(ttl=60, refresh_ahead=0.5, refresh_probabilistic=False)
+
+    class LaterTime:
+        def time(self) -> float:
+            return time.time() + 40
+
+    async def run():
+        async with create_introspector(
+            api_app_key, endpoint, cache=cache
+        ) as introspector:
+            first = await introspector.introspect_token("valid_token")
+            monkeypatch.setattr(cache_module, "time", LaterTime())
+
+            # concurrent hits share a single background refresh
+            assert await introspector.introspect_token("valid_token") is first
+            assert await introspector.introspect_token("valid_token") is first
+            assert len(introspector._refresh_tasks) == 1
+            await asyncio.gather(*introspector._refresh_tasks.values())
+
+            return first
+
+    first = asyncio.run(run())
+
+    assert len(endpoint.requests) == 2
+    assert cache.get("valid_token") is not first
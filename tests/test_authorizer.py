@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_authorizer(
     introspection_response_bearer_no_grants, introspection_response_bearer_with_grants
 ):
@@ -62,3 +65,257 @@ def test_authorizer_return_simple_response(introspection_response_bearer_with_gr
     )
     assert response.authorize is False
     assert response.context["active"] is False
+
+
+def test_authorizer_compiles_requirements(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    authorizer = Authorizer(
+        required_scopes=["openid", "openid", "email"], required_roles=["USER"]
+    )
+    assert authorizer.required_scopes == ["openid", "openid", "email"]
+    assert authorizer._required_scopes == frozenset(["openid", "email"])
+    assert authorizer._required_roles == frozenset(["USER"])
+
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    assert authorizer.is_authorized(token) is True
+
+
+def test_authorizer_context_projection(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.context import decode_authorizer_context
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    authorizer = Authorizer(
+        context_claims=["active", "sub", "scope", "project_roles", "locale"],
+        context_exclude_none=True,
+        context_compact=True,
+    )
+    response = authorizer.return_simple_authorizer_response(token)
+    assert response.authorize is True
+    assert response.context == dict(
+        active=True,
+        sub="314335774260592643",
+        scope="openid profile email",
+        project_roles="ADMIN USER",
+    )
+    assert decode_authorizer_context(response.context)["project_roles"] == [
+        "ADMIN",
+        "USER",
+    ]
+
+    # without options the whole token is passed
+    assert Authorizer().get_authorizer_context(token) == token.model_dump()
+
+    # only the allowed claims of lazily parsed tokens are decoded
+    lazy_token = IntrospectionResponse.from_json(
+        token.model_dump_json(by_alias=True), lazy_profile=True
+    )
+    context = Authorizer(
+        context_claims=["active", "project_roles"]
+    ).get_authorizer_context(lazy_token)
+    assert context == dict(active=True, project_roles=["ADMIN", "USER"])
+    assert "email" not in lazy_token.__dict__
+
+    with pytest.raises(ValueError, match="Unknown context claims"):
+        Authorizer(context_claims=["active", "password"])
+
+
+def test_authorizer_return_iam_policy_response(
+    introspection_response_bearer_no_grants, introspection_response_bearer_with_grants
+):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    method_arn = (
+        "arn:aws:execute-api:eu-central-1:123456789012:abcdef123/prod/GET/pets/42"
+    )
+    with_grants = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    no_grants = IntrospectionResponse(**introspection_response_bearer_no_grants)
+
+    authorizer = Authorizer(required_roles=["ADMIN"])
+    response = authorizer.return_iam_policy_response(with_grants, method_arn)
+    assert response["principalId"] == with_grants.sub
+    assert response["policyDocument"]["Statement"] == [
+        {"Action": "execute-api:Invoke", "Effect": "Allow", "Resource": method_arn}
+    ]
+    # policy contexts only hold flat values
+    assert response["context"]["project_roles"] == "ADMIN USER"
+    assert None not in response["context"].values()
+
+    response = authorizer.return_iam_policy_response(no_grants, method_arn)
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Deny"
+
+    response = authorizer.return_iam_policy_response(
+        IntrospectionResponse(active=False), method_arn
+    )
+    assert response["principalId"] == "anonymous"
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Deny"
+
+    # wildcard resources let API Gateway reuse the cached policy for all routes
+    authorizer = Authorizer(policy_resource_scope="stage")
+    response = authorizer.return_iam_policy_response(with_grants, method_arn)
+    assert (
+        response["policyDocument"]["Statement"][0]["Resource"]
+        == "arn:aws:execute-api:eu-central-1:123456789012:abcdef123/prod/*"
+    )
+
+    response = authorizer.return_iam_policy_response(
+        with_grants, method_arn, resource_scope="api"
+    )
+    assert (
+        response["policyDocument"]["Statement"][0]["Resource"]
+        == "arn:aws:execute-api:eu-central-1:123456789012:abcdef123/*"
+    )
+
+    with pytest.raises(ValueError):
+        Authorizer(policy_resource_scope="everything")
+
+
+def test_authorizer_routes(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    authorizer = Authorizer(
+        required_scopes=["openid"],
+        routes={
+            "GET /pets/{id}": {"required_roles": ["USER"]},
+            "POST /pets": {"required_roles": ["WRITER"]},
+        },
+    )
+
+    assert authorizer.is_authorized(token, "GET /pets/{id}") is True
+    assert authorizer.is_authorized(token, "GET /pets/42") is True
+    assert authorizer.is_authorized(token, "POST /pets") is False
+    assert authorizer.is_authorized(token, "GET /unknown") is False
+    # requests can not bypass the route table
+    assert authorizer.is_authorized(token) is False
+
+    # the global requirements still apply to every route
+    authorizer = Authorizer(
+        required_scopes=["offline"], routes={"GET /pets/{id}": None}
+    )
+    assert authorizer.is_authorized(token, "GET /pets/42") is False
+
+    response = Authorizer(
+        routes={"GET /pets/{id}": None}
+    ).return_simple_authorizer_response(token, route_key="GET /pets/{id}")
+    assert response.authorize is True
+
+
+def test_authorizer_routes_iam_policy_response(
+    introspection_response_bearer_with_grants,
+):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    api_arn = "arn:aws:execute-api:eu-central-1:123456789012:abcdef123"
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    routes = {
+        "GET /pets/{id}": {"required_roles": ["USER"]},
+        "ANY /pets": {"required_roles": ["ADMIN"]},
+        "POST /pets/{id}/{proxy+}": {"required_roles": ["WRITER"]},
+    }
+
+    # the route scope only covers the request, the route is parsed from the arn
+    authorizer = Authorizer(routes=routes)
+    response = authorizer.return_iam_policy_response(
+        token, f"{api_arn}/prod/POST/pets/42/photos"
+    )
+    assert response["policyDocument"]["Statement"] == [
+        {
+            "Action": "execute-api:Invoke",
+            "Effect": "Deny",
+            "Resource": f"{api_arn}/prod/POST/pets/42/photos",
+        }
+    ]
+
+    # wider scopes only cover the requested route, wildcard resources would also
+    # match requests without a matching route
+    authorizer = Authorizer(routes=routes, policy_resource_scope="stage")
+    response = authorizer.return_iam_policy_response(
+        token, f"{api_arn}/prod/GET/pets/42"
+    )
+    assert response["policyDocument"]["Statement"] == [
+        {
+            "Action": "execute-api:Invoke",
+            "Effect": "Allow",
+            "Resource": f"{api_arn}/prod/GET/pets/42",
+        }
+    ]
+
+    # tokens failing the global requirements are denied for the whole scope
+    response = authorizer.return_iam_policy_response(
+        IntrospectionResponse(active=False), f"{api_arn}/prod/GET/pets/42"
+    )
+    assert response["policyDocument"]["Statement"] == [
+        {
+            "Action": "execute-api:Invoke",
+            "Effect": "Deny",
+            "Resource": f"{api_arn}/prod/*",
+        }
+    ]
+
+
+def test_authorizer_routes_iam_policy_does_not_deny_granted_routes(
+    introspection_response_bearer_with_grants,
+):
+    """the iam wildcard matches across / and the empty string, a refused route must not deny others"""
+
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    api_arn = "arn:aws:execute-api:eu-central-1:123456789012:abcdef123"
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    for routes, method_arn in (
+        (
+            {
+                "GET /pets/{id}": {"required_roles": ["WRITER"]},
+                "GET /pets/{id}/photos": {},
+            },
+            f"{api_arn}/prod/GET/pets/42/photos",
+        ),
+        # GET/* of the refused route would deny the root GET/ as well
+        (
+            {"GET /": None, "GET /{id}": {"required_roles": ["WRITER"]}},
+            f"{api_arn}/prod/GET/",
+        ),
+    ):
+        authorizer = Authorizer(routes=routes, policy_resource_scope="stage")
+        response = authorizer.return_iam_policy_response(token, method_arn)
+        assert response["policyDocument"]["Statement"] == [
+            {"Action": "execute-api:Invoke", "Effect": "Allow", "Resource": method_arn}
+        ]
+
+
+def test_authorizer_routes_iam_policy_decision_metrics(
+    introspection_response_bearer_with_grants,
+):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    api_arn = "arn:aws:execute-api:eu-central-1:123456789012:abcdef123"
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    metrics = InMemoryMetricsSink()
+    authorizer = Authorizer(
+        routes={"GET /pets": {}, "POST /pets": {"required_roles": ["WRITER"]}},
+        policy_resource_scope="stage",
+        metrics=metrics,
+    )
+
+    # GET /pets is granted, the decision of the requested route is counted
+    response = authorizer.return_iam_policy_response(token, f"{api_arn}/prod/POST/pets")
+    assert response["policyDocument"]["Statement"] == [
+        {
+            "Action": "execute-api:Invoke",
+            "Effect": "Deny",
+            "Resource": f"{api_arn}/prod/POST/pets",
+        }
+    ]
+    assert metrics.stats()["counters"] == {"AuthorizationDenied": 1}
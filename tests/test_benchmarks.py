@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def benchmarks():
+    from benchmarks import BENCHMARKS, hot_path
+
+    return BENCHMARKS
+
+
+def test_benchmarks_run(benchmarks):
+    """every benchmark can be set up, called and torn down"""
+
+    assert len(benchmarks) > 0
+
+    for name, setup in benchmarks.items():
+        with setup() as fn:
+            fn()
+
+
+def test_benchmarks_results(benchmarks):
+    from benchmarks.__main__ import run_benchmark
+
+    result = run_benchmark("authorizer.is_authorized", repeat=2, min_time=0.001)
+    assert result["name"] == "authorizer.is_authorized"
+    assert result["rounds"] == 2
+    assert result["iterations"] >= 1
+    assert result["min_ns"] <= result["median_ns"] <= result["max_ns"]
+    assert result["ops_per_sec"] > 0
@@ -0,0 +1,366 @@
+import pytest
+
+
+class FakeTime:
+    """
+    Replacement for the time module to control the clock of the cache
+    """
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from zitadel_authorizer import cache
+
+    clock = FakeTime(1743858735)
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_cache_get_set(clock, introspection_response_bearer_no_grants):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    cache = IntrospectionCache(maxsize=10, ttl=60)
+    response = IntrospectionResponse(**introspection_response_bearer_no_grants)
+
+    assert cache.get("token") is None
+    cache.set("token", response)
+    assert cache.get("token") is response
+    assert len(cache) == 1
+    assert cache.stats() == dict(
+        hits=1,
+        misses=1,
+        evictions=0,
+        stale_hits=0,
+        size=1,
+        maxsize=10,
+        bytes=cache.bytes,
+        max_bytes=None,
+    )
+    assert cache.bytes > 0
+
+    cache.delete("token")
+    assert cache.get("token") is None
+    assert cache.bytes == 0
+
+
+def test_cache_ttl(clock, introspection_response_bearer_no_grants):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    cache = IntrospectionCache(maxsize=10, ttl=60)
+    cache.set("token", IntrospectionResponse(**introspection_response_bearer_no_grants))
+
+    clock.now += 59
+    assert cache.get("token") is not None
+
+    clock.now += 1
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_cache_ttl_capped_by_token_expiry(
+    clock, introspection_response_bearer_no_grants
+):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(**introspection_response_bearer_no_grants)
+    cache = IntrospectionCache(maxsize=10, ttl=60)
+
+    # the token expires in 10 seconds
+    clock.now = response.exp - 10
+    cache.set("token", response)
+
+    clock.now += 9
+    assert cache.get("token") is response
+
+    clock.now += 1
+    assert cache.get("token") is None
+
+    # expired tokens are not cached at all
+    cache.set("token", response)
+    assert len(cache) == 0
+
+
+def test_cache_lru_eviction(clock):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    cache = IntrospectionCache(maxsize=2, ttl=60)
+    response = IntrospectionResponse(active=True)
+
+    assert cache.set("a", response) == 0
+    assert cache.set("b", response) == 0
+
+    # reading a makes b the least recently used token
+    assert cache.get("a") is response
+    assert cache.set("c", response) == 1
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get("b") is None
+    assert cache.get("a") is response
+    assert cache.get("c") is response
+
+
+def test_cache_invalid_maxsize():
+    from zitadel_authorizer.cache import IntrospectionCache
+
+    with pytest.raises(ValueError):
+        IntrospectionCache(maxsize=0)
+
+
+def test_cache_stale_window(clock, introspection_response_bearer_no_grants):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(**introspection_response_bearer_no_grants)
+    response.exp = int(clock.now) + 3600
+    cache = IntrospectionCache(maxsize=10, ttl=60, stale_ttl=300)
+    cache.set("token", response)
+
+    # expired responses are only returned as stale results
+    clock.now += 120
+    assert cache.get("token") is None
+    assert cache.get_stale("token") is response
+    assert cache.stale_hits == 1
+
+    clock.now += 300
+    assert cache.get_stale("token") is None
+    assert len(cache) == 0
+
+
+def test_cache_stale_window_capped_by_token_expiry(
+    clock, introspection_response_bearer_no_grants
+):
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(**introspection_response_bearer_no_grants)
+    response.exp = int(clock.now) + 90
+    cache = IntrospectionCache(maxsize=10, ttl=60, stale_ttl=300)
+    cache.set("token", response)
+
+    clock.now += 89
+    assert cache.get_stale("token") is response
+
+    # an expired token is never served
+    clock.now += 1
+    assert cache.get_stale("token") is None
+
+
+def test_cache_refresh_ahead(monkeypatch, clock):
+    from zitadel_authorizer import cache as cache_module
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(active=True)
+    cache = IntrospectionCache(ttl=100, refresh_ahead=0.8, refresh_probabilistic=False)
+    cache.set("token", response)
+
+    assert cache.lookup("token") == (response, False)
+    clock.now += 80
+    assert cache.lookup("token") == (response, True)
+    assert cache.get("token") is response
+
+    # the probability of an early refresh grows towards the expiry
+    cache = IntrospectionCache(ttl=100, refresh_ahead=0.8)
+    cache.set("token", response)
+    monkeypatch.setattr(cache_module.random, "random", lambda: 0.5)
+
+    clock.now += 85
+    assert cache.lookup("token") == (response, False)
+    clock.now += 10
+    assert cache.lookup("token") == (response, True)
+
+
+def test_cache_invalid_refresh_ahead():
+    from zitadel_authorizer.cache import IntrospectionCache
+
+    with pytest.raises(ValueError):
+        IntrospectionCache(refresh_ahead=1)
+
+
+def test_cache_keys_are_token_digests(clock, introspection_response_bearer_no_grants):
+    import hashlib
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(**introspection_response_bearer_no_grants)
+    cache = IntrospectionCache(key_secret=b"secret")
+    cache.set("short", response)
+    cache.set("a" * 2048, response)
+
+    # the tokens are not kept, every key has the same size
+    assert list(cache._entries) == [cache._key("short"), cache._key("a" * 2048)]
+    assert cache._key("short") == (
+        hashlib.blake2b(b"short", key=b"secret", digest_size=32).digest()
+    )
+    assert all(len(key) == 32 for key in cache._entries)
+    assert cache.get("a" * 2048) is response
+
+    # without a secret every cache uses a random secret
+    assert IntrospectionCache()._key_secret != IntrospectionCache()._key_secret
+
+
+def test_cache_max_bytes(clock, introspection_response_bearer_with_grants):
+    from zitadel_authorizer.cache import (
+        DEFAULT_MAXSIZE,
+        ENTRY_OVERHEAD,
+        IntrospectionCache,
+        estimate_response_size,
+    )
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    def response():
+        return IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    size = ENTRY_OVERHEAD + estimate_response_size(response())
+    cache = IntrospectionCache(max_bytes=int(size * 2.5))
+
+    assert cache.set("a", response()) == 0
+    assert cache.set("b", response()) == 0
+    assert cache.bytes == 2 * size
+
+    # the least recently used token is evicted to fit the budget
+    assert cache.set("c", response()) == 1
+    assert cache.get("a") is None
+    assert len(cache) == 2
+    assert cache.bytes == 2 * size
+
+    # replacing a token does not count it twice
+    cache.set("c", response())
+    assert cache.bytes == 2 * size
+
+    # responses larger than the budget are not cached
+    cache = IntrospectionCache(max_bytes=size // 2)
+    assert cache.set("a", response()) == 0
+    assert len(cache) == 0
+
+    # the memory budget alone does not bound the number of tokens
+    cache = IntrospectionCache(max_bytes=1100 * size)
+    assert cache.maxsize is None
+    for i in range(1100):
+        cache.set(f"token_{i}", response())
+    assert len(cache) == 1100
+
+    # both bounds apply if both are given
+    cache = IntrospectionCache(maxsize=1, max_bytes=10 * size)
+    assert cache.set("a", response()) == 0
+    assert cache.set("b", response()) == 1
+    assert len(cache) == 1
+
+    # without a memory budget the number of tokens is bounded by default
+    assert IntrospectionCache().maxsize == DEFAULT_MAXSIZE
+
+
+def test_shared_cache(clock, introspection_response_bearer_with_grants):
+    from zitadel_authorizer.backends import InMemoryCacheBackend
+    from zitadel_authorizer.cache import SharedIntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    backend = InMemoryCacheBackend()
+    first = SharedIntrospectionCache(backend, key_secret=b"shared secret", ttl=60)
+    second = SharedIntrospectionCache(backend, key_secret=b"shared secret", ttl=60)
+    response = IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    assert second.get("token") is None
+    first.set("token", response)
+
+    # the response is stored by token digest and shared between the caches
+    assert first.key("token") == second.key("token")
+    assert "token" not in first.key("token")
+    assert second.get("token") == response
+    assert second.get_many(["token", "other"]) == [response, None]
+    assert second.stats() == dict(
+        hits=2,
+        misses=2,
+        errors=0,
+        circuit_breaker=dict(state="closed", failures=0),
+    )
+
+    # other secrets do not share the keys
+    assert SharedIntrospectionCache(backend, key_secret=b"other").get("token") is None
+
+    first.delete("token")
+    assert second.get("token") is None
+
+    with pytest.raises(ValueError):
+        SharedIntrospectionCache(backend, key_secret=b"")
+
+
+def test_shared_cache_ttl(clock, introspection_response_bearer_with_grants):
+    from zitadel_authorizer.backends import InMemoryCacheBackend
+    from zitadel_authorizer.cache import SharedIntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    class RecordingBackend(InMemoryCacheBackend):
+        def set(self, key, value, ttl):
+            self.ttl = ttl
+            super().set(key, value, ttl)
+
+    backend = RecordingBackend()
+    cache = SharedIntrospectionCache(backend, key_secret=b"secret", ttl=60)
+    response = IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    # never shared beyond the expiry of the token
+    clock.now = response.exp - 30
+    cache.set("token", response)
+    assert backend.ttl == 30
+
+    # expired entries are not returned, e.g. for skewed clocks
+    clock.now = response.exp
+    assert cache.get("token") is None
+
+    # inactive responses replace the shared active response
+    clock.now = response.exp - 30
+    cache.set("token", IntrospectionResponse(active=False))
+    assert len(backend) == 0
+
+
+def test_shared_cache_backend_errors(clock, introspection_response_bearer_with_grants):
+    from zitadel_authorizer.backends import CacheBackend
+    from zitadel_authorizer.cache import SharedIntrospectionCache
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    class UnavailableBackend(CacheBackend):
+        calls = 0
+
+        def get(self, key):
+            self.calls += 1
+            raise ConnectionError("unavailable")
+
+        def set(self, key, value, ttl):
+            self.calls += 1
+            raise ConnectionError("unavailable")
+
+        def delete(self, key):
+            self.calls += 1
+            raise ConnectionError("unavailable")
+
+    backend = UnavailableBackend()
+    cache = SharedIntrospectionCache(
+        backend,
+        key_secret=b"secret",
+        circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=60),
+    )
+    response = IntrospectionResponse(**introspection_response_bearer_with_grants)
+
+    # errors of the backend are treated as misses
+    assert cache.get("token") is None
+    cache.set("token", response)
+    assert cache.errors == 2
+
+    # the backend is skipped while its circuit is open
+    assert cache.get("token") is None
+    cache.set("token", response)
+    assert backend.calls == 2
+    assert cache.stats()["circuit_breaker"]["state"] == "open"
@@ -0,0 +1,87 @@
+import pytest
+
+
+class FakeTime:
+    """
+    Replacement for the time module to control the clock of the circuit breaker
+    """
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from zitadel_authorizer import circuit_breaker
+
+    clock = FakeTime(1000)
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def test_circuit_breaker(clock):
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    assert breaker.state == "closed"
+
+    # a success resets the consecutive failures
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request() is True
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow_request() is False
+
+    # a single trial call is allowed once the recovery timeout passed
+    clock.now += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+
+    # a failed trial opens the circuit again
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow_request() is False
+
+    clock.now += 30
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats() == dict(state="closed", failures=0)
+
+
+def test_circuit_breaker_record_error():
+    import requests
+
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker, is_failure
+
+    def http_error(status_code: int) -> requests.HTTPError:
+        response = requests.Response()
+        response.status_code = status_code
+        return requests.HTTPError(response=response)
+
+    assert is_failure(requests.ConnectionError()) is True
+    assert is_failure(requests.Timeout()) is True
+    assert is_failure(http_error(503)) is True
+    assert is_failure(http_error(429)) is True
+    assert is_failure(http_error(401)) is False
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_error(http_error(401))
+    assert breaker.state == "closed"
+    breaker.record_error(requests.Timeout())
+    assert breaker.state == "open"
+
+
+def test_circuit_breaker_invalid_threshold():
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker
+
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_threshold=0)
@@ -0,0 +1,97 @@
+import pytest
+import base64
+import io
+import json
+
+
+@pytest.fixture
+def key_file(tmp_path, api_app_key):
+    path = tmp_path / "key.json"
+    path.write_bytes(base64.b64decode(api_app_key))
+    return str(path)
+
+
+def run(introspection_stub, key_file, lines, *args):
+    from zitadel_authorizer.cli import main
+
+    stdout = io.StringIO()
+    code = main(
+        [
+            "introspect",
+            "--issuer-url",
+            introspection_stub.issuer_url,
+            "--introspection-endpoint",
+            introspection_stub.url,
+            "--key-file",
+            key_file,
+            *args,
+        ],
+        stdin=io.StringIO("".join(line + "\n" for line in lines)),
+        stdout=stdout,
+    )
+    return code, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def test_cli_introspect(
+    introspection_stub, key_file, introspection_response_bearer_with_grants
+):
+    introspection_stub.responses["valid_token"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    code, records = run(
+        introspection_stub,
+        key_file,
+        [
+            "valid_token",
+            "",
+            json.dumps({"ref": "session-42", "token": "valid_token"}),
+            json.dumps({"token": "invalid_token"}),
+        ],
+        "--claims",
+        "active,sub,project_roles",
+    )
+
+    assert code == 0
+    assert sorted(records, key=lambda record: str(record["ref"])) == [
+        dict(
+            ref=1,
+            active=True,
+            sub="314335774260592643",
+            project_roles=["ADMIN", "USER"],
+        ),
+        dict(ref=4, active=False),
+        dict(
+            ref="session-42",
+            active=True,
+            sub="314335774260592643",
+            project_roles=["ADMIN", "USER"],
+        ),
+    ]
+    assert len(introspection_stub.requests) == 2
+
+
+def test_cli_introspect_errors(introspection_stub, key_file, capsys):
+    code, records = run(
+        introspection_stub, key_file, ["token", "{invalid", '{"ref": 1}']
+    )
+    assert code == 1
+    assert records == [dict(ref=1, active=False)]
+    errors = capsys.readouterr().err.splitlines()
+    assert [error.split(":")[0] for error in errors] == ["line 2", "line 3"]
+
+    introspection_stub.status_code = 500
+    code, records = run(introspection_stub, key_file, ["secret-token-value"])
+    assert code == 1
+    assert records[0]["ref"] == 1
+    assert "500" in records[0]["error"]
+    # the token is not written to the output
+    assert "secret-token-value" not in json.dumps(records)
+
+
+def test_cli_requires_endpoint(key_file, monkeypatch):
+    from zitadel_authorizer.cli import main
+
+    monkeypatch.delenv("ISSUER_URL", raising=False)
+    with pytest.raises(SystemExit):
+        main(["introspect", "--key-file", key_file])
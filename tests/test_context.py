@@ -0,0 +1,72 @@
+def test_encode_authorizer_context():
+    from zitadel_authorizer.context import encode_authorizer_context
+
+    claims = dict(
+        active=True,
+        scope="openid profile",
+        project_roles=["ADMIN", "USER"],
+        aud=["a", "b"],
+        email=None,
+    )
+
+    assert encode_authorizer_context(claims) == claims
+    assert encode_authorizer_context(claims, exclude_none=True) == dict(
+        active=True,
+        scope="openid profile",
+        project_roles=["ADMIN", "USER"],
+        aud=["a", "b"],
+    )
+    assert encode_authorizer_context(claims, compact=True) == dict(
+        active=True,
+        scope="openid profile",
+        project_roles="ADMIN USER",
+        aud="a b",
+        email=None,
+    )
+
+
+def test_decode_authorizer_context():
+    from zitadel_authorizer.context import (
+        decode_authorizer_context,
+        encode_authorizer_context,
+    )
+
+    claims = dict(
+        active=True,
+        scope="openid profile",
+        project_roles=["ADMIN", "USER"],
+        amr=["pwd"],
+    )
+
+    assert decode_authorizer_context(None) == {}
+    assert decode_authorizer_context({}) == {}
+    assert decode_authorizer_context(claims) == claims
+    assert (
+        decode_authorizer_context(encode_authorizer_context(claims, compact=True))
+        == claims
+    )
+    assert decode_authorizer_context(dict(project_roles="")) == dict(project_roles=[])
+
+
+def test_principal():
+    from zitadel_authorizer.context import Principal
+
+    principal = Principal(
+        dict(
+            sub="123",
+            client_id="456",
+            scope="openid profile",
+            project_roles="ADMIN USER",
+        )
+    )
+    assert principal.is_authenticated is True
+    assert principal.sub == "123"
+    assert principal.client_id == "456"
+    assert principal.scopes == frozenset(["openid", "profile"])
+    assert principal.roles == frozenset(["ADMIN", "USER"])
+
+    principal = Principal(None)
+    assert principal.is_authenticated is False
+    assert principal.sub is None
+    assert principal.roles == frozenset()
+    assert principal.scopes == frozenset()
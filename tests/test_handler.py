@@ -0,0 +1,222 @@
+import pytest
+
+
+@pytest.fixture
+def authorizer_environment(monkeypatch, ssm, api_app_key, introspection_stub):
+    ssm.put_parameter(Name="test", Value=api_app_key, Type="SecureString")
+
+    monkeypatch.setenv("ISSUER_URL", introspection_stub.issuer_url)
+    monkeypatch.setenv("INTROSPECTION_ENDPOINT", introspection_stub.url)
+    monkeypatch.setenv("APPLICATION_KEY_ARN", "test")
+    monkeypatch.setenv("REQUIRED_ROLES", '["ADMIN"]')
+
+    return introspection_stub
+
+
+def test_create_authorizer_handler(
+    monkeypatch,
+    authorizer_environment,
+    event_without_authorization,
+    introspection_response_bearer_with_grants,
+    introspection_response_bearer_no_grants,
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+    from zitadel_authorizer.models import ApplicationKey
+
+    loaded = []
+    from_aws_parameter_store = ApplicationKey.from_aws_parameter_store
+
+    def count_from_aws_parameter_store(*args, **kwargs):
+        loaded.append(True)
+        return from_aws_parameter_store(*args, **kwargs)
+
+    monkeypatch.setattr(
+        ApplicationKey, "from_aws_parameter_store", count_from_aws_parameter_store
+    )
+
+    authorizer_environment.responses["with_grants"] = (
+        introspection_response_bearer_with_grants
+    )
+    authorizer_environment.responses["no_grants"] = (
+        introspection_response_bearer_no_grants
+    )
+
+    handler = create_authorizer_handler()
+    assert handler.authorizer.required_roles == ["ADMIN"]
+    assert handler.introspector.introspection_endpoint == authorizer_environment.url
+
+    event_without_authorization["headers"]["authorization"] = "Bearer with_grants"
+    response = handler(event_without_authorization, None)
+    assert response["isAuthorized"] is True
+    assert response["context"]["project_roles"] == ["ADMIN", "USER"]
+
+    event_without_authorization["headers"]["authorization"] = "Bearer no_grants"
+    response = handler(event_without_authorization, None)
+    assert response["isAuthorized"] is False
+
+    # the application key is only loaded once
+    assert loaded == [True]
+
+
+def test_create_authorizer_handler_without_token(
+    authorizer_environment, event_without_authorization
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+
+    handler = create_authorizer_handler()
+    response = handler(event_without_authorization, None)
+
+    assert response["isAuthorized"] is False
+    assert authorizer_environment.requests == []
+
+
+def test_create_authorizer_handler_with_introspector(
+    api_app_key, introspection_stub, event_without_authorization
+):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.handler import create_authorizer_handler
+    from zitadel_authorizer.introspector import Introspector
+    from zitadel_authorizer.models import ApplicationKey
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url=introspection_stub.issuer_url,
+        introspection_endpoint=introspection_stub.url,
+    )
+    authorizer = Authorizer()
+
+    # no settings are loaded from the environment if the objects are given
+    handler = create_authorizer_handler(
+        introspector=introspector, authorizer=authorizer
+    )
+    assert handler.introspector is introspector
+    assert handler.authorizer is authorizer
+
+    event_without_authorization["headers"]["authorization"] = "Bearer invalid_token"
+    response = handler(event_without_authorization, None)
+    assert response["isAuthorized"] is False
+    assert introspection_stub.requests[0]["token"] == "invalid_token"
+
+
+def test_create_authorizer_handler_iam_policy(
+    monkeypatch,
+    authorizer_environment,
+    event_without_authorization,
+    introspection_response_bearer_with_grants,
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+
+    monkeypatch.setenv("RESPONSE_TYPE", "iam")
+    monkeypatch.setenv("POLICY_RESOURCE_SCOPE", "stage")
+    authorizer_environment.responses["with_grants"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    handler = create_authorizer_handler()
+    assert handler.response_type == "iam"
+
+    response = handler(event_without_authorization, None)
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Deny"
+
+    event_without_authorization["headers"]["authorization"] = "Bearer with_grants"
+    response = handler(event_without_authorization, None)
+    assert response["principalId"] == introspection_response_bearer_with_grants["sub"]
+    assert response["policyDocument"]["Statement"] == [
+        {
+            "Action": "execute-api:Invoke",
+            "Effect": "Allow",
+            "Resource": "arn:aws:execute-api:eu-central-1:651706778841:cghnha20c0/$default/*",
+        }
+    ]
+    assert response["context"]["project_roles"] == "ADMIN USER"
+
+
+def test_create_authorizer_handler_rest_api_token_event(
+    monkeypatch, authorizer_environment, introspection_response_bearer_with_grants
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+
+    monkeypatch.setenv("RESPONSE_TYPE", "iam")
+    authorizer_environment.responses["with_grants"] = (
+        introspection_response_bearer_with_grants
+    )
+    method_arn = (
+        "arn:aws:execute-api:eu-central-1:651706778841:cghnha20c0/prod/GET/pets"
+    )
+
+    handler = create_authorizer_handler()
+
+    event = dict(
+        type="TOKEN", authorizationToken="Bearer with_grants", methodArn=method_arn
+    )
+    response = handler(event, None)
+    assert response["principalId"] == introspection_response_bearer_with_grants["sub"]
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+
+    # events without a bearer token are denied
+    event = dict(type="TOKEN", authorizationToken="with_grants", methodArn=method_arn)
+    response = handler(event, None)
+    assert response["policyDocument"]["Statement"] == [
+        {"Action": "execute-api:Invoke", "Effect": "Deny", "Resource": method_arn}
+    ]
+
+
+def test_create_authorizer_handler_routes(
+    monkeypatch,
+    authorizer_environment,
+    event_without_authorization,
+    introspection_response_bearer_with_grants,
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+
+    monkeypatch.setenv("REQUIRED_ROLES", "[]")
+    monkeypatch.setenv(
+        "ROUTES",
+        '{"GET /private": {"required_roles": ["ADMIN"]}, "GET /writer": {"required_roles": ["WRITER"]}}',
+    )
+    authorizer_environment.responses["with_grants"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    handler = create_authorizer_handler()
+    assert len(handler.authorizer.routes) == 2
+
+    event_without_authorization["headers"]["authorization"] = "Bearer with_grants"
+    response = handler(event_without_authorization, None)
+    assert response["isAuthorized"] is True
+
+    event_without_authorization["routeKey"] = "GET /writer"
+    response = handler(event_without_authorization, None)
+    assert response["isAuthorized"] is False
+
+
+def test_create_authorizer_handler_metrics(
+    authorizer_environment,
+    event_without_authorization,
+    introspection_response_bearer_with_grants,
+):
+    from zitadel_authorizer.handler import create_authorizer_handler
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+
+    flushed = []
+
+    class FlushCountingMetricsSink(InMemoryMetricsSink):
+        def flush(self):
+            flushed.append(True)
+
+    authorizer_environment.responses["with_grants"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    handler = create_authorizer_handler(metrics=FlushCountingMetricsSink())
+    assert handler.introspector.metrics is handler.metrics
+    assert handler.authorizer.metrics is handler.metrics
+
+    event_without_authorization["headers"]["authorization"] = "Bearer with_grants"
+    handler(event_without_authorization, None)
+
+    # the metrics are flushed after every invocation
+    assert flushed == [True]
+    counters = handler.metrics.stats()["counters"]
+    assert counters["IntrospectionStatus200"] == 1
+    assert counters["AuthorizationAllowed"] == 1
@@ -39,3 +39,26 @@ def test_get_bearer_token_from_aws_gateway_authorizer_event_no_bearer():
 
     with pytest.raises(ValueError, match="No Authorization header found"):
         get_bearer_token_from_aws_gateway_authorizer_event(event)
+
+
+def test_get_bearer_token_from_aws_gateway_authorizer_event_rest_api():
+    from zitadel_authorizer.helper import (
+        get_bearer_token_from_aws_gateway_authorizer_event,
+    )
+
+    # TOKEN authorizer events of REST APIs have no headers
+    event = {
+        "type": "TOKEN",
+        "authorizationToken": "Bearer eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCJ9",
+        "methodArn": "arn:aws:execute-api:eu-central-1:651706778841:cghnha20c0/prod/GET/pets",
+    }
+    token = get_bearer_token_from_aws_gateway_authorizer_event(event)
+    assert token == "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCJ9"
+
+    # REQUEST authorizer events of REST APIs keep the case of the headers
+    event = {"type": "REQUEST", "headers": {"Authorization": "Bearer abc"}}
+    assert get_bearer_token_from_aws_gateway_authorizer_event(event) == "abc"
+
+    event = {"type": "REQUEST", "headers": None}
+    with pytest.raises(ValueError, match="No Authorization header found"):
+        get_bearer_token_from_aws_gateway_authorizer_event(event)
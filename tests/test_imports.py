@@ -0,0 +1,66 @@
+import pytest
+import json
+import subprocess
+import sys
+
+# seconds the service lambdas may spend importing the middlewares, well above
+# the usual import time to stay stable on slow machines
+MIDDLEWARE_IMPORT_BUDGET = 0.5
+
+# dependencies of the lambda authorizer the service lambdas must not load
+AUTHORIZER_DEPENDENCIES = [
+    "authlib",
+    "requests",
+    "jwt",
+    "pydantic",
+    "pydantic_settings",
+    "boto3",
+]
+
+
+def import_in_subprocess(module: str) -> dict:
+    """
+    Import the module in a fresh interpreter, returns the import duration and the loaded modules
+    """
+
+    code = f"""
+import json, sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+print(json.dumps(dict(duration=duration, modules=sorted(sys.modules))))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def test_middleware_import_is_lightweight():
+    result = import_in_subprocess("zitadel_authorizer.middleware")
+
+    loaded = set(result["modules"])
+    assert [module for module in AUTHORIZER_DEPENDENCIES if module in loaded] == []
+    assert result["duration"] < MIDDLEWARE_IMPORT_BUDGET
+
+
+def test_package_import_is_lazy():
+    result = import_in_subprocess("zitadel_authorizer")
+
+    loaded = set(result["modules"])
+    assert "zitadel_authorizer.introspector" not in loaded
+    assert "zitadel_authorizer.handler" not in loaded
+
+
+def test_package_exports():
+    import zitadel_authorizer
+
+    for name in zitadel_authorizer.__all__:
+        if name == "AsyncIntrospector":
+            pytest.importorskip("httpx")
+        assert getattr(zitadel_authorizer, name).__name__ == name
+
+    assert "Introspector" in dir(zitadel_authorizer)
+
+    with pytest.raises(AttributeError):
+        zitadel_authorizer.Unknown
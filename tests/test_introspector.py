@@ -67,3 +67,449 @@ def test_introspector_introspect_token(
     assert token.active == True
     assert token.preferred_username == "integration-test-user-with-roles"
     assert token.project_roles == ["ADMIN", "USER"]
+
+
+@pytest.fixture
+def stub_introspector(introspection_stub, api_app_key):
+    from zitadel_authorizer.introspector import Introspector
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+    )
+    yield introspector
+    introspector.close()
+
+
+def test_introspector_request(
+    stub_introspector, introspection_stub, introspection_response_bearer_with_grants
+):
+    """the introspection request is authenticated with the client assertion"""
+
+    introspection_stub.responses["valid_token"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    token = stub_introspector.introspect_token("valid_token")
+    assert token.active == True
+    assert token.project_roles == ["ADMIN", "USER"]
+
+    request = introspection_stub.requests[0]
+    assert request["token"] == "valid_token"
+    assert (
+        request["client_assertion_type"]
+        == "urn:ietf:params:oauth:client-assertion-type:jwt-bearer"
+    )
+    assert request["client_assertion"] == stub_introspector.client_assertion.get()
+
+
+def test_introspector_reuses_connection(stub_introspector, introspection_stub):
+    """consecutive introspections share one keep-alive connection"""
+
+    for _ in range(3):
+        assert stub_introspector.introspect_token("invalid_token").active == False
+
+    assert len(introspection_stub.client_addresses) == 3
+    assert len(set(introspection_stub.client_addresses)) == 1
+
+
+def test_introspector_timeout(introspection_stub, api_app_key):
+    import requests
+    from zitadel_authorizer.introspector import Introspector
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        read_timeout=0.05,
+    )
+    assert introspector.timeout == (3.05, 0.05)
+
+    introspection_stub.delay = 0.5
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        introspector.introspect_token("invalid_token")
+
+
+def test_introspector_http_error(stub_introspector, introspection_stub):
+    import requests
+
+    introspection_stub.status_code = 500
+    with pytest.raises(requests.exceptions.HTTPError):
+        stub_introspector.introspect_token("invalid_token")
+
+
+def test_introspector_cache(
+    introspection_stub, api_app_key, introspection_response_bearer_with_grants
+):
+    import time
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.introspector import Introspector
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    introspection_stub.responses["valid_token"] = response
+
+    cache = IntrospectionCache(maxsize=10, ttl=60)
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        cache=cache,
+    )
+
+    first = introspector.introspect_token("valid_token")
+    second = introspector.introspect_token("valid_token")
+    assert first.active == True
+    assert second is first
+    assert len(introspection_stub.requests) == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # inactive tokens are not cached
+    introspector.introspect_token("invalid_token")
+    introspector.introspect_token("invalid_token")
+    assert len(introspection_stub.requests) == 3
+
+
+def test_introspector_negative_cache(
+    introspection_stub, api_app_key, introspection_response_bearer_with_grants
+):
+    import time
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.introspector import Introspector
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    introspection_stub.responses["valid_token"] = response
+
+    negative_cache = IntrospectionCache(maxsize=10, ttl=5)
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        negative_cache=negative_cache,
+    )
+
+    # repeated inactive tokens are rejected locally
+    for _ in range(3):
+        assert introspector.introspect_token("invalid_token").active == False
+    assert len(introspection_stub.requests) == 1
+    assert negative_cache.hits == 2
+
+    # active tokens are never stored in the negative cache
+    introspector.introspect_token("valid_token")
+    introspector.introspect_token("valid_token")
+    assert len(introspection_stub.requests) == 3
+    assert len(negative_cache) == 1
+
+
+def test_introspector_single_flight(stub_introspector, introspection_stub):
+    """concurrent introspections of the same token share one request"""
+
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    introspection_stub.delay = 0.2
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(
+            executor.map(stub_introspector.introspect_token, ["invalid_token"] * 10)
+        )
+
+    assert all(result.active == False for result in results)
+    assert len(introspection_stub.requests) == 1
+
+    # errors are shared the same way
+    introspection_stub.status_code = 500
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [
+            executor.submit(stub_introspector.introspect_token, "invalid_token")
+            for _ in range(10)
+        ]
+        for future in futures:
+            with pytest.raises(requests.exceptions.HTTPError):
+                future.result()
+
+    assert len(introspection_stub.requests) == 2
+
+
+def test_introspector_trusted_fast_parse(
+    introspection_stub, api_app_key, introspection_response_bearer_with_grants
+):
+    from zitadel_authorizer import models
+    from zitadel_authorizer.introspector import Introspector
+
+    introspection_stub.responses["valid_token"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        trusted_fast_parse=True,
+    )
+
+    token = introspector.introspect_token("valid_token")
+    assert token == models.IntrospectionResponse(
+        **introspection_response_bearer_with_grants
+    )
+    assert token.project_roles == ["ADMIN", "USER"]
+    assert introspector.introspect_token("invalid_token").active == False
+
+
+def test_introspector_lazy_profile_claims(
+    introspection_stub, api_app_key, introspection_response_bearer_with_grants
+):
+    from zitadel_authorizer.introspector import Introspector
+
+    introspection_stub.responses["valid_token"] = (
+        introspection_response_bearer_with_grants
+    )
+
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        lazy_profile_claims=True,
+    )
+
+    token = introspector.introspect_token("valid_token")
+    assert "preferred_username" not in token.__dict__
+    assert token.has_roles(["ADMIN"]) is True
+    assert token.preferred_username == "integration-test-user-with-two-roles"
+
+
+def test_introspector_circuit_breaker(
+    monkeypatch,
+    introspection_stub,
+    api_app_key,
+    introspection_response_bearer_with_grants,
+):
+    import time
+    import requests
+    from zitadel_authorizer import cache as cache_module
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.circuit_breaker import CircuitBreaker, CircuitOpenError
+    from zitadel_authorizer.introspector import Introspector
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    introspection_stub.responses["valid_token"] = response
+
+    cache = IntrospectionCache(maxsize=10, ttl=60, stale_ttl=300)
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        introspection_endpoint=introspection_stub.url,
+        cache=cache,
+        circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=60),
+    )
+
+    cached = introspector.introspect_token("valid_token")
+
+    # expire the cached result, keeping it within the stale window
+    class LaterTime:
+        def time(self) -> float:
+            return time.time() + 120
+
+    monkeypatch.setattr(cache_module, "time", LaterTime())
+    assert cache.get("valid_token") is None
+
+    introspection_stub.status_code = 503
+
+    # failures are answered with the last known result where available
+    assert introspector.introspect_token("valid_token") is cached
+    with pytest.raises(requests.HTTPError):
+        introspector.introspect_token("other_token")
+    assert introspector.circuit_breaker.state == "open"
+
+    # the open circuit fails fast without calling the endpoint
+    requests_made = len(introspection_stub.requests)
+    assert introspector.introspect_token("valid_token") is cached
+    with pytest.raises(CircuitOpenError):
+        introspector.introspect_token("other_token")
+    assert len(introspection_stub.requests) == requests_made
+    assert introspector.stats()["circuit_breaker"]["state"] == "open"
+
+
+def test_introspector_refresh_ahead(
+    monkeypatch,
+    stub_introspector,
+    introspection_stub,
+    introspection_response_bearer_with_grants,
+):
+    import time
+    from zitadel_authorizer import cache as cache_module
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    introspection_stub.responses["valid_token"] = response
+
+    cache = IntrospectionCache(ttl=60, refresh_ahead=0.5, refresh_probabilistic=False)
+    negative_cache = IntrospectionCache(ttl=60)
+    stub_introspector.cache = cache
+    stub_introspector.negative_cache = negative_cache
+    stub_introspector.metrics = InMemoryMetricsSink()
+
+    first = stub_introspector.introspect_token("valid_token")
+
+    class LaterTime:
+        def time(self) -> float:
+            return time.time() + 40
+
+    monkeypatch.setattr(cache_module, "time", LaterTime())
+
+    # the cached result is returned while it is refreshed in the background
+    assert stub_introspector.introspect_token("valid_token") is first
+    assert stub_introspector.introspect_token("valid_token") is first
+
+    deadline = time.time() + 5
+    while cache.lookup("valid_token")[0] is first and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert len(introspection_stub.requests) == 2
+    assert stub_introspector.metrics.stats()["counters"]["CacheRefreshAhead"] == 1
+
+    # a revoked token replaces the cached active result
+    introspection_stub.responses["valid_token"] = {"active": False}
+    stub_introspector.refresh_in_background("valid_token")
+
+    deadline = time.time() + 5
+    while len(cache) and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert stub_introspector.introspect_token("valid_token").active is False
+
+
+def test_introspector_shared_cache(
+    introspection_stub,
+    resp_server,
+    api_app_key,
+    introspection_response_bearer_with_grants,
+):
+    import time
+    from zitadel_authorizer.backends import RedisCacheBackend
+    from zitadel_authorizer.cache import IntrospectionCache, SharedIntrospectionCache
+    from zitadel_authorizer.introspector import Introspector
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+
+    response = dict(introspection_response_bearer_with_grants)
+    response["exp"] = int(time.time()) + 3600
+    introspection_stub.responses["valid_token"] = response
+
+    def create_introspector():
+        return Introspector(
+            application_key=ApplicationKey.from_base64_string(api_app_key),
+            issuer_url="http://localhost:8080",
+            introspection_endpoint=introspection_stub.url,
+            cache=IntrospectionCache(ttl=60),
+            shared_cache=SharedIntrospectionCache(
+                RedisCacheBackend.from_url(resp_server.url),
+                key_secret=b"shared secret",
+            ),
+            metrics=InMemoryMetricsSink(),
+        )
+
+    # e.g. two lambda containers sharing the redis server
+    first, second = create_introspector(), create_introspector()
+    try:
+        token = first.introspect_token("valid_token")
+        shared = second.introspect_token("valid_token")
+        assert shared == token
+        assert shared.project_roles == ["ADMIN", "USER"]
+        assert len(introspection_stub.requests) == 1
+
+        # the shared result is cached locally
+        assert second.introspect_token("valid_token") is shared
+        assert resp_server.command_names() == ["GET", "SET", "GET"]
+
+        assert first.metrics.stats()["counters"]["SharedCacheMisses"] == 1
+        assert second.metrics.stats()["counters"]["SharedCacheHits"] == 1
+        assert second.stats()["shared_cache"]["hits"] == 1
+
+        # the raw token is never sent to the shared cache
+        assert all(b"valid_token" not in arg for c in resp_server.commands for arg in c)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_introspector_introspect_many(
+    stub_introspector, introspection_stub, introspection_response_bearer_with_grants
+):
+    introspection_stub.responses["valid_token"] = (
+        introspection_response_bearer_with_grants
+    )
+    introspection_stub.delay = 0.01
+
+    tokens = [(i, "valid_token" if i % 2 else f"invalid_{i}") for i in range(20)]
+    results = dict(stub_introspector.introspect_many(tokens, max_workers=4))
+
+    assert sorted(results) == list(range(20))
+    assert all(results[i].active == bool(i % 2) for i in range(20))
+
+    # repeated tokens are introspected once
+    assert len(introspection_stub.requests) == 11
+
+    # tokens are their own ref
+    assert [ref for ref, _ in stub_introspector.introspect_many(["a", "a"])] == [
+        "a",
+        "a",
+    ]
+
+
+def test_introspector_introspect_many_errors(stub_introspector, introspection_stub):
+    import requests
+
+    introspection_stub.status_code = 500
+
+    with pytest.raises(requests.HTTPError):
+        list(stub_introspector.introspect_many(["a", "b"]))
+
+    results = list(
+        stub_introspector.introspect_many([(1, "a"), (2, "b")], return_exceptions=True)
+    )
+    assert sorted(ref for ref, _ in results) == [1, 2]
+    assert all(isinstance(result, requests.HTTPError) for _, result in results)
+
+    with pytest.raises(ValueError):
+        list(stub_introspector.introspect_many(["a"], max_workers=0))
+
+
+def test_introspector_introspect_many_streams(stub_introspector, introspection_stub):
+    """tokens are read ahead of the results by at most twice the workers"""
+
+    read = []
+
+    def tokens():
+        for i in range(100):
+            read.append(i)
+            yield f"token_{i}"
+
+    results = stub_introspector.introspect_many(tokens(), max_workers=2)
+    next(results)
+    assert len(read) <= 5
+    results.close()
+
+
+def test_introspector_introspect_many_streams_repeated_tokens(
+    stub_introspector, introspection_stub
+):
+    """repeats of a token in flight count towards the read ahead"""
+
+    introspection_stub.delay = 0.2
+    read = []
+
+    def tokens():
+        for i in range(100_000):
+            read.append(i)
+            yield i, "same"
+
+    results = stub_introspector.introspect_many(tokens(), max_workers=2)
+    next(results)
+    assert len(read) <= 5
+    results.close()
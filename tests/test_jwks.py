@@ -0,0 +1,201 @@
+import pytest
+import json
+import time
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+# the zitadel project id
+AUDIENCE = "314329294882996227"
+
+
+@pytest.fixture(scope="module")
+def signing_keys():
+    """two rsa keys to sign test jwts"""
+
+    return {
+        kid: rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        for kid in ("key-1", "key-2")
+    }
+
+
+def jwk(kid, private_key):
+    key = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    key.update(kid=kid, use="sig", alg="RS256")
+    return key
+
+
+def sign(private_key, kid, issuer, **claims):
+    payload = dict(
+        iss=issuer,
+        sub="314335774260592643",
+        aud=[AUDIENCE],
+        client_id="314329296124575747",
+        scope="openid profile email",
+        iat=int(time.time()),
+        exp=int(time.time()) + 3600,
+    )
+    payload.update(claims)
+    payload = {claim: value for claim, value in payload.items() if value is not None}
+    return jwt.encode(payload, private_key, algorithm="RS256", headers=dict(kid=kid))
+
+
+@pytest.fixture
+def issuer(introspection_stub, signing_keys):
+    introspection_stub.documents["/oauth/v2/keys"] = {
+        "keys": [jwk("key-1", signing_keys["key-1"])]
+    }
+    return introspection_stub
+
+
+def test_jwks_cache_get_key(issuer):
+    from zitadel_authorizer.jwks import JWKSCache
+
+    jwks = JWKSCache(jwks_uri=f"{issuer.issuer_url}/oauth/v2/keys")
+
+    assert jwks.get_key("key-1").key_id == "key-1"
+    assert jwks.get_key("key-1").key_id == "key-1"
+    assert jwks.kids == ["key-1"]
+    assert len(issuer.requests) == 1
+
+
+def test_jwks_cache_refresh_on_unknown_kid(issuer, signing_keys):
+    from zitadel_authorizer.jwks import JWKSCache
+
+    jwks = JWKSCache(
+        jwks_uri=f"{issuer.issuer_url}/oauth/v2/keys", min_refresh_interval=0
+    )
+    assert jwks.get_key("key-1") is not None
+
+    # the issuer rotated its keys, the unknown kid triggers a refresh
+    issuer.documents["/oauth/v2/keys"]["keys"].append(
+        jwk("key-2", signing_keys["key-2"])
+    )
+    assert jwks.get_key("key-2").key_id == "key-2"
+    assert len(issuer.requests) == 2
+
+
+def test_jwks_cache_rate_limited_refresh(issuer):
+    from zitadel_authorizer.jwks import JWKSCache
+
+    jwks = JWKSCache(
+        jwks_uri=f"{issuer.issuer_url}/oauth/v2/keys", min_refresh_interval=60
+    )
+    assert jwks.get_key("key-1") is not None
+
+    # unknown kids do not refetch the keys within the refresh interval
+    for _ in range(5):
+        assert jwks.get_key("unknown") is None
+    assert len(issuer.requests) == 1
+
+
+def test_jwks_cache_keeps_keys_on_failure(issuer):
+    from zitadel_authorizer.jwks import JWKSCache
+
+    jwks = JWKSCache(
+        jwks_uri=f"{issuer.issuer_url}/oauth/v2/keys",
+        max_age=0,
+        min_refresh_interval=0,
+    )
+    assert jwks.get_key("key-1") is not None
+
+    del issuer.documents["/oauth/v2/keys"]
+    assert jwks.get_key("key-1") is not None
+    assert len(issuer.requests) == 2
+
+
+def test_jwt_validator_get_jwt_header(jwt_token, opaque_token):
+    from zitadel_authorizer.jwks import JWTValidator
+
+    assert JWTValidator.get_jwt_header(jwt_token) == {"alg": "HS256", "typ": "JWT"}
+    assert JWTValidator.get_jwt_header(opaque_token) is None
+    assert JWTValidator.get_jwt_header("a.b.c") is None
+
+
+def test_jwt_validator_validates_jwt(issuer, signing_keys):
+    from zitadel_authorizer.jwks import JWTValidator
+
+    validator = JWTValidator(issuer_url=issuer.issuer_url, audience=AUDIENCE)
+    token = sign(
+        signing_keys["key-1"],
+        "key-1",
+        issuer.issuer_url,
+        **{
+            "urn:zitadel:iam:org:project:roles": {
+                "ADMIN": {"314329284565073923": "zitadel.localhost"},
+            }
+        },
+    )
+
+    response = validator.introspect_token(token)
+    assert response.active is True
+    assert response.sub == "314335774260592643"
+    assert response.client_id == "314329296124575747"
+    assert response.aud == [AUDIENCE]
+    assert response.has_scopes(["openid", "profile"]) is True
+    assert response.project_roles == ["ADMIN"]
+
+    # no introspection request is made for jwts
+    assert issuer.requests == [dict(path="/oauth/v2/keys")]
+
+
+def test_jwt_validator_rejects_invalid_jwt(issuer, signing_keys):
+    from zitadel_authorizer.jwks import JWTValidator
+
+    validator = JWTValidator(issuer_url=issuer.issuer_url, audience=AUDIENCE)
+
+    # expired
+    token = sign(
+        signing_keys["key-1"], "key-1", issuer.issuer_url, exp=int(time.time()) - 10
+    )
+    assert validator.introspect_token(token).active is False
+
+    # wrong issuer
+    token = sign(signing_keys["key-1"], "key-1", "https://evil.example.com")
+    assert validator.introspect_token(token).active is False
+
+    # wrong audience
+    token = sign(signing_keys["key-1"], "key-1", issuer.issuer_url, aud=["other"])
+    assert validator.introspect_token(token).active is False
+
+    # without audience
+    token = sign(signing_keys["key-1"], "key-1", issuer.issuer_url, aud=None)
+    assert validator.introspect_token(token).active is False
+
+    # signed with a key which does not belong to the kid
+    token = sign(signing_keys["key-2"], "key-1", issuer.issuer_url)
+    assert validator.introspect_token(token).active is False
+
+    # unknown key
+    token = sign(signing_keys["key-2"], "key-2", issuer.issuer_url)
+    assert validator.introspect_token(token).active is False
+
+    with pytest.raises(ValueError):
+        JWTValidator(issuer_url=issuer.issuer_url, audience="")
+
+
+def test_jwt_validator_introspects_opaque_tokens(
+    issuer, api_app_key, opaque_token, introspection_response_bearer_with_grants
+):
+    from zitadel_authorizer.introspector import Introspector
+    from zitadel_authorizer.jwks import JWTValidator
+    from zitadel_authorizer.models import ApplicationKey
+
+    issuer.responses[opaque_token] = introspection_response_bearer_with_grants
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url=issuer.issuer_url,
+        introspection_endpoint=issuer.url,
+    )
+
+    validator = JWTValidator(
+        issuer_url=issuer.issuer_url, audience=AUDIENCE, introspector=introspector
+    )
+    response = validator.introspect_token(opaque_token)
+    assert response.active is True
+    assert response.project_roles == ["ADMIN", "USER"]
+    assert issuer.requests[0]["token"] == opaque_token
+
+    # without introspector opaque tokens are inactive
+    validator = JWTValidator(issuer_url=issuer.issuer_url, audience=AUDIENCE)
+    assert validator.introspect_token(opaque_token).active is False
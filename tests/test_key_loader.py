@@ -0,0 +1,120 @@
+import pytest
+
+
+class FakeTime:
+    """
+    Replacement for the time module to control the clock of the loader
+    """
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from zitadel_authorizer import key_loader
+
+    clock = FakeTime(1_000_000)
+    monkeypatch.setattr(key_loader, "time", clock)
+    return clock
+
+
+def test_key_loader_caches_key(clock, api_app_key):
+    from zitadel_authorizer.key_loader import ApplicationKeyLoader
+    from zitadel_authorizer.models import ApplicationKey
+
+    loaded = []
+
+    def load():
+        loaded.append(True)
+        return ApplicationKey.from_base64_string(api_app_key)
+
+    loader = ApplicationKeyLoader(load=load, ttl=60)
+
+    key = loader.get()
+    assert key.keyId == "310410137829376003"
+    # the private key was parsed while loading
+    assert "private_key" in key.__dict__
+
+    clock.now += 59
+    assert loader.get() is key
+    assert loaded == [True]
+
+    # the key is loaded again once the ttl passed, an unchanged key is kept
+    clock.now += 1
+    assert loader.get() is key
+    assert loaded == [True, True]
+
+    # and on explicit refresh
+    loader.refresh()
+    assert loaded == [True, True, True]
+
+
+def test_key_loader_keeps_key_on_failure(clock, api_app_key):
+    from zitadel_authorizer.key_loader import ApplicationKeyLoader
+    from zitadel_authorizer.models import ApplicationKey
+
+    failing = []
+
+    def load():
+        if failing:
+            raise ConnectionError("parameter store not reachable")
+        return ApplicationKey.from_base64_string(api_app_key)
+
+    loader = ApplicationKeyLoader(load=load, ttl=60)
+    key = loader.get()
+
+    failing.append(True)
+    clock.now += 60
+    assert loader.get() is key
+
+    with pytest.raises(ConnectionError):
+        loader.refresh()
+
+
+def test_key_loader_sources(tmp_path, ssm, api_app_key):
+    import base64
+    from zitadel_authorizer.key_loader import ApplicationKeyLoader
+
+    key_file = tmp_path / "key.json"
+    key_file.write_bytes(base64.b64decode(api_app_key))
+    ssm.put_parameter(Name="test", Value=api_app_key, Type="SecureString")
+
+    loaders = [
+        ApplicationKeyLoader.from_base64_string(api_app_key),
+        ApplicationKeyLoader.from_file(str(key_file)),
+        ApplicationKeyLoader.from_aws_parameter_store("test"),
+    ]
+
+    keys = [loader.get() for loader in loaders]
+    assert all(key.keyId == "310410137829376003" for key in keys)
+    assert all(key.clientId == "310409849496207363" for key in keys)
+
+
+def test_client_assertion_with_key_loader(api_app_key):
+    import jwt
+    from zitadel_authorizer.assertion import ClientAssertion
+    from zitadel_authorizer.key_loader import ApplicationKeyLoader
+    from zitadel_authorizer.models import ApplicationKey
+
+    key = ApplicationKey.from_base64_string(api_app_key)
+    source = [key]
+    loader = ApplicationKeyLoader(load=lambda: source[-1].model_copy())
+    assertion = ClientAssertion(application_key=loader, audience="http://localhost")
+
+    token = assertion.get()
+    assert jwt.get_unverified_header(token)["kid"] == "310410137829376003"
+    assert assertion.get() == token
+
+    # reloading an unchanged key keeps the signed assertion
+    loader.refresh()
+    assert assertion.cached() == token
+
+    # a rotated key is signed with immediately
+    source.append(key.model_copy(update=dict(keyId="310410137829376004")))
+    loader.refresh()
+    assert assertion.cached() is None
+    assert jwt.get_unverified_header(assertion.get())["kid"] == "310410137829376004"
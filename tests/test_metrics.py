@@ -0,0 +1,175 @@
+import json
+import time
+
+import pytest
+
+
+def test_in_memory_metrics_sink():
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+
+    metrics = InMemoryMetricsSink()
+    metrics.increment("Requests")
+    metrics.increment("Requests", 2)
+    metrics.add_timing("Latency", 10)
+    metrics.add_timing("Latency", 30)
+
+    with metrics.timer("Block"):
+        pass
+
+    stats = metrics.stats()
+    assert stats["counters"] == {"Requests": 3}
+    assert stats["timings"]["Latency"] == dict(
+        count=2, total_ms=40, min_ms=10, max_ms=30, mean_ms=20
+    )
+    assert stats["timings"]["Block"]["count"] == 1
+
+    metrics.reset()
+    assert metrics.stats() == dict(counters={}, timings={})
+
+
+def test_in_memory_metrics_sink_bounded():
+    """the latencies are aggregated, not kept per request"""
+
+    from zitadel_authorizer.metrics import EMFMetricsSink
+
+    metrics = EMFMetricsSink(namespace="ZitadelAuthorizer", service="authorizer")
+    for milliseconds in range(1, 1001):
+        metrics.add_timing("Latency", milliseconds)
+
+    assert metrics.timings == {
+        "Latency": dict(count=1000, total_ms=500500, min_ms=1, max_ms=1000)
+    }
+    assert metrics.stats()["timings"]["Latency"]["mean_ms"] == 500.5
+
+
+def test_metrics_sink_discards_metrics():
+    from zitadel_authorizer.metrics import MetricsSink
+
+    metrics = MetricsSink()
+    metrics.increment("Requests")
+    with metrics.timer("Latency"):
+        pass
+    metrics.flush()
+
+    assert metrics.stats() == {}
+
+
+def test_emf_metrics_sink(capsys):
+    from zitadel_authorizer.metrics import EMFMetricsSink
+
+    metrics = EMFMetricsSink(namespace="ZitadelAuthorizer", service="authorizer")
+
+    # nothing is published without metrics
+    metrics.flush()
+    assert capsys.readouterr().out == ""
+
+    metrics.increment("CacheHits")
+    metrics.add_timing("IntrospectionRequestLatency", 12.5)
+    metrics.flush()
+
+    document = json.loads(capsys.readouterr().out)
+    assert document["CacheHits"] == [1.0]
+    assert document["IntrospectionRequestLatency"] == [12.5]
+    definitions = document["_aws"]["CloudWatchMetrics"][0]
+    assert definitions["Namespace"] == "ZitadelAuthorizer"
+    assert {"Name": "CacheHits", "Unit": "Count"} in definitions["Metrics"]
+
+    # the in-memory aggregate survives the flush
+    assert metrics.stats()["counters"] == {"CacheHits": 1}
+
+
+def test_introspector_metrics(
+    introspection_stub, api_app_key, introspection_response_bearer_with_grants
+):
+    import requests
+
+    from zitadel_authorizer.cache import IntrospectionCache
+    from zitadel_authorizer.introspector import Introspector
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+    from zitadel_authorizer.models import ApplicationKey
+
+    introspection_response_bearer_with_grants["exp"] = int(time.time()) + 60 * 60
+    introspection_stub.responses["a"] = introspection_response_bearer_with_grants
+    introspection_stub.responses["b"] = introspection_response_bearer_with_grants
+
+    metrics = InMemoryMetricsSink()
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url=introspection_stub.issuer_url,
+        introspection_endpoint=introspection_stub.url,
+        cache=IntrospectionCache(maxsize=1, ttl=60),
+        negative_cache=IntrospectionCache(maxsize=10, ttl=5),
+        metrics=metrics,
+    )
+
+    try:
+        introspector.introspect_token("a")
+        introspector.introspect_token("a")
+        introspector.introspect_token("b")
+        introspector.introspect_token("invalid")
+        introspector.introspect_token("invalid")
+
+        introspection_stub.status_code = 500
+        with pytest.raises(requests.HTTPError):
+            introspector.introspect_token("error")
+    finally:
+        introspector.close()
+
+    stats = introspector.stats()
+    assert stats["metrics"]["counters"] == {
+        "CacheHits": 1,
+        "CacheMisses": 4,
+        "CacheEvictions": 1,
+        "NegativeCacheHits": 1,
+        "IntrospectionStatus200": 3,
+        "IntrospectionStatus500": 1,
+    }
+    for phase in ("AssertionLatency", "IntrospectionRequestLatency"):
+        assert stats["metrics"]["timings"][phase]["count"] == 4
+    assert stats["metrics"]["timings"]["IntrospectionParseLatency"]["count"] == 3
+    assert stats["cache"]["evictions"] == 1
+    assert stats["negative_cache"]["size"] == 1
+
+
+def test_introspector_metrics_connection_error(api_app_key):
+    import requests
+
+    from zitadel_authorizer.introspector import Introspector
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+    from zitadel_authorizer.models import ApplicationKey
+
+    metrics = InMemoryMetricsSink()
+    introspector = Introspector(
+        application_key=ApplicationKey.from_base64_string(api_app_key),
+        issuer_url="http://localhost:8080",
+        # nothing listens on the discard port
+        introspection_endpoint="http://127.0.0.1:9/oauth/v2/introspect",
+        metrics=metrics,
+    )
+
+    with pytest.raises(requests.ConnectionError):
+        introspector.introspect_token("token")
+
+    assert metrics.stats()["counters"] == {"IntrospectionErrors": 1}
+    assert introspector.stats()["cache"] is None
+
+
+def test_authorizer_metrics(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.authorizer import Authorizer
+    from zitadel_authorizer.metrics import InMemoryMetricsSink
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    authorizer = Authorizer(required_roles=["ADMIN"], metrics=InMemoryMetricsSink())
+
+    authorizer.is_authorized(token)
+    authorizer.return_simple_authorizer_response(token)
+    authorizer.return_simple_authorizer_response(IntrospectionResponse(active=False))
+    authorizer.return_iam_policy_response(
+        token, "arn:aws:execute-api:eu-central-1:123456789012:abcdef123/prod/GET/pets"
+    )
+
+    assert authorizer.stats()["counters"] == {
+        "AuthorizationAllowed": 3,
+        "AuthorizationDenied": 1,
+    }
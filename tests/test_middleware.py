@@ -111,3 +111,119 @@ def test_role_middleware_handler(
     assert result, isinstance(Response)
     assert result.status_code == 403
     assert result.body == "Forbidden"
+
+
+def test_role_middleware_handler_compact_context(
+    aws_api_gateway_proxy_event_with_authorizer,
+):
+    from zitadel_authorizer.middleware import ProjectRoleAuthorizationMiddleware
+
+    class MockApp:
+        def __init__(self, event):
+            self.current_event = event
+
+    class MockNextMiddleware:
+        def __call__(self, app):
+            return True
+
+    # the authorizer passed the roles in the compact encoding
+    aws_api_gateway_proxy_event_with_authorizer["requestContext"]["authorizer"][
+        "lambda"
+    ]["project_roles"] = "other_role example"
+    event = APIGatewayProxyEventV2(aws_api_gateway_proxy_event_with_authorizer)
+
+    middleware = ProjectRoleAuthorizationMiddleware(roles=["example"])
+    assert middleware.get_roles_from_context(event) == ["other_role", "example"]
+    assert middleware.handler(MockApp(event), MockNextMiddleware()) is True
+
+
+def test_middlewares_share_principal(
+    monkeypatch, aws_api_gateway_proxy_event_with_authorizer
+):
+    from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+
+    from zitadel_authorizer import context
+    from zitadel_authorizer.middleware import (
+        IsAuthenticatedMiddleware,
+        ProjectRoleAuthorizationMiddleware,
+    )
+
+    parsed = []
+    principal_init = context.Principal.__init__
+
+    def count_principal_init(self, *args, **kwargs):
+        parsed.append(True)
+        principal_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(context.Principal, "__init__", count_principal_init)
+
+    app = APIGatewayHttpResolver()
+    principals = []
+
+    @app.get(
+        "/my/path",
+        middlewares=[
+            IsAuthenticatedMiddleware(),
+            ProjectRoleAuthorizationMiddleware(roles=["example"]),
+        ],
+    )
+    def handler():
+        principals.append(app.context["principal"])
+        return {}
+
+    event = aws_api_gateway_proxy_event_with_authorizer
+    event["rawPath"] = "/my/path"
+    event["requestContext"]["http"]["method"] = "GET"
+    event["requestContext"]["http"]["path"] = "/my/path"
+
+    for _ in range(2):
+        response = app.resolve(event, {})
+        assert response["statusCode"] == 200
+
+    # parsed once per request and shared by the middlewares and the handler
+    assert parsed == [True, True]
+    assert principals[0].roles == frozenset(["example"])
+    assert principals[0] is not principals[1]
+
+
+def test_middlewares_principal_of_failed_request(
+    aws_api_gateway_proxy_event_with_authorizer,
+    aws_api_gateway_proxy_event_no_authorizer,
+):
+    """the principal of a request whose route raised is not used for the next request"""
+
+    import copy
+    from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+
+    from zitadel_authorizer.middleware import (
+        IsAuthenticatedMiddleware,
+        ProjectRoleAuthorizationMiddleware,
+    )
+
+    app = APIGatewayHttpResolver()
+
+    @app.get("/fail", middlewares=[ProjectRoleAuthorizationMiddleware(["example"])])
+    def fail():
+        raise RuntimeError("failed")
+
+    @app.get("/roles", middlewares=[ProjectRoleAuthorizationMiddleware(["example"])])
+    def roles():
+        return {}
+
+    @app.get("/authenticated", middlewares=[IsAuthenticatedMiddleware()])
+    def authenticated():
+        return {}
+
+    def request(event, path):
+        event = copy.deepcopy(event)
+        event["rawPath"] = path
+        event["requestContext"]["http"]["method"] = "GET"
+        event["requestContext"]["http"]["path"] = path
+        return app.resolve(event, {})
+
+    for path, status_code in (("/roles", 403), ("/authenticated", 401)):
+        with pytest.raises(RuntimeError):
+            request(aws_api_gateway_proxy_event_with_authorizer, "/fail")
+
+        response = request(aws_api_gateway_proxy_event_no_authorizer, path)
+        assert response["statusCode"] == status_code
@@ -135,3 +135,186 @@ def test_introspect_response_with_grants(introspection_response_bearer_with_gran
     assert response.has_roles(["USER"]) is True
     assert response.has_roles(["ADMIN", "USER"]) is True
     assert response.has_roles(["ADMIN", "USER", "MANAGER"]) is False
+
+
+def test_application_key_private_key(api_app_key):
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+    from zitadel_authorizer.models import ApplicationKey
+
+    key = ApplicationKey.from_base64_string(api_app_key)
+    assert isinstance(key.private_key, RSAPrivateKey)
+
+    # the private key is only parsed once
+    assert key.private_key is key.private_key
+    assert "private_key" not in key.model_dump()
+
+
+def test_application_key_from_file(tmp_path, api_app_key):
+    import base64
+    from zitadel_authorizer.models import ApplicationKey
+
+    key_file = tmp_path / "key.json"
+    key_file.write_bytes(base64.b64decode(api_app_key))
+
+    key = ApplicationKey.from_file(str(key_file))
+    assert key == ApplicationKey.from_base64_string(api_app_key)
+
+
+def test_introspection_response_claim_sets(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    response = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    assert response.scope_set == frozenset(["openid", "profile", "email"])
+    assert response.role_set == frozenset(["ADMIN", "USER"])
+
+    # the sets are built once and not part of the dumped model
+    assert response.scope_set is response.scope_set
+    assert response.role_set is response.role_set
+    assert "scope_set" not in response.model_dump()
+    assert "role_set" not in response.model_dump()
+
+    assert response.has_scopes(frozenset(["openid", "email"])) is True
+    assert response.has_roles({"ADMIN"}) is True
+
+    inactive = IntrospectionResponse(active=False)
+    assert inactive.scope_set == frozenset()
+    assert inactive.role_set == frozenset()
+    assert inactive.has_scopes([]) is False
+    assert inactive.has_roles([]) is False
+
+
+def test_introspection_response_from_json(
+    introspection_response_bearer_no_grants, introspection_response_bearer_with_grants
+):
+    import json
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    for data in (
+        {"active": False},
+        introspection_response_bearer_no_grants,
+        introspection_response_bearer_with_grants,
+    ):
+        expected = IntrospectionResponse(**data)
+        response = IntrospectionResponse.from_json(json.dumps(data).encode())
+
+        # the fast path produces the same object as the validated dict
+        assert response == expected
+        assert response.model_fields_set == expected.model_fields_set
+        assert response.model_dump() == expected.model_dump()
+
+    response = IntrospectionResponse.from_json(
+        json.dumps(introspection_response_bearer_with_grants)
+    )
+    assert response.project_roles == ["ADMIN", "USER"]
+
+
+def test_introspection_response_lazy_profile(introspection_response_bearer_with_grants):
+    import json
+    import pickle
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    raw = json.dumps(introspection_response_bearer_with_grants).encode()
+    expected = IntrospectionResponse.from_json(raw)
+
+    response = IntrospectionResponse.from_json(raw, lazy_profile=True)
+
+    # only the authorization claims are decoded eagerly
+    assert set(response.__dict__) == {
+        "active",
+        "scope",
+        "client_id",
+        "exp",
+        "project_roles",
+    }
+    assert response.active is True
+    assert response.client_id == "314329296124575747"
+    assert response.exp == 1743901935
+    assert response.has_scopes(["openid", "email"]) is True
+    assert response.has_roles(["ADMIN", "USER"]) is True
+    assert "email" not in response.__dict__
+
+    # reading a profile claim decodes the profile claims
+    assert response.email == "integration-test-user-with-two-roles@zitadel.localhost"
+    assert response.preferred_username == "integration-test-user-with-two-roles"
+    assert response.decode_profile_claims() is False
+    assert response == expected
+    assert response.model_fields_set == expected.model_fields_set
+
+    # dumping, comparing and pickling decode the profile claims as well
+    for check in (
+        lambda response: response.model_dump() == expected.model_dump(),
+        lambda response: response.model_dump_json() == expected.model_dump_json(),
+        lambda response: response == expected,
+        lambda response: pickle.loads(pickle.dumps(response)) == expected,
+    ):
+        assert check(IntrospectionResponse.from_json(raw, lazy_profile=True))
+
+    inactive = IntrospectionResponse.from_json(b'{"active": false}', lazy_profile=True)
+    assert inactive.active is False
+    assert inactive.email is None
+    assert inactive == IntrospectionResponse(active=False)
+
+
+def test_introspection_response_lazy_profile_threads(
+    monkeypatch, introspection_response_bearer_with_grants
+):
+    """cached responses are read by many threads while their profile claims are decoded"""
+
+    import json
+    import sys
+    import threading
+    from zitadel_authorizer import models
+    from zitadel_authorizer.models import IntrospectionResponse
+
+    raw = json.dumps(introspection_response_bearer_with_grants).encode()
+    email = introspection_response_bearer_with_grants["email"]
+
+    validations = []
+    validate = IntrospectionResponse.model_validate_json.__func__
+
+    def counting_validate(cls, data, *args, **kwargs):
+        validations.append(data)
+        return validate(cls, data, *args, **kwargs)
+
+    monkeypatch.setattr(
+        models.IntrospectionResponse,
+        "model_validate_json",
+        classmethod(counting_validate),
+    )
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    errors = []
+    try:
+        for _ in range(50):
+            response = IntrospectionResponse.from_json(raw, lazy_profile=True)
+            barrier = threading.Barrier(6)
+
+            def read_authorization_claims():
+                barrier.wait()
+                try:
+                    for _ in range(200):
+                        assert response.active is True
+                        assert response.client_id == "314329296124575747"
+                except Exception as error:
+                    errors.append(error)
+
+            def read_profile_claims():
+                barrier.wait()
+                try:
+                    assert response.email == email
+                except Exception as error:
+                    errors.append(error)
+
+            threads = [threading.Thread(target=read_authorization_claims)]
+            threads += [threading.Thread(target=read_profile_claims) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    # the profile claims of each response are decoded once
+    assert len(validations) == 50
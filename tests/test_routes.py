@@ -0,0 +1,96 @@
+import pytest
+
+
+def test_route_table_resolve():
+    from zitadel_authorizer.routes import RouteTable
+
+    routes = RouteTable(
+        {
+            "GET /pets": {"required_scopes": ["pets:read"]},
+            "POST /pets": {"required_roles": ["ADMIN"]},
+            "GET /pets/{id}": {"required_scopes": ["pets:read"]},
+            "GET /pets/mine": None,
+            "ANY /files/{proxy+}": {"required_roles": ["USER"]},
+            "GET /": None,
+        }
+    )
+    assert len(routes) == 6
+
+    # route keys of matched routes and static requests are resolved directly
+    assert routes.resolve("GET /pets").route_key == "GET /pets"
+    assert routes.resolve("GET /pets/{id}").route_key == "GET /pets/{id}"
+    assert routes.resolve("GET /pets/").route_key == "GET /pets"
+    assert routes.resolve("GET /").route_key == "GET /"
+
+    # static segments win over parameters
+    assert routes.resolve("GET /pets/mine").route_key == "GET /pets/mine"
+    assert routes.resolve("GET /pets/42").route_key == "GET /pets/{id}"
+    assert routes.resolve("post /pets").route_key == "POST /pets"
+
+    # greedy parameters match one or more segments with any method
+    assert routes.resolve("PUT /files/a/b/c").route_key == "ANY /files/{proxy+}"
+    assert routes.resolve("GET /files") is None
+
+    assert routes.resolve("DELETE /pets") is None
+    assert routes.resolve("GET /pets/42/owner") is None
+    assert routes.resolve("$default") is None
+
+    routes = RouteTable({"GET /pets": None, "$default": {"required_roles": ["ADMIN"]}})
+    assert routes.resolve("GET /pets").route_key == "GET /pets"
+    assert routes.resolve("GET /unknown").route_key == "$default"
+    assert routes.resolve("$default").route_key == "$default"
+
+
+def test_route_table_invalid_routes():
+    from zitadel_authorizer.routes import RouteTable
+
+    with pytest.raises(ValueError, match="Invalid route key"):
+        RouteTable({"pets": None})
+
+    with pytest.raises(ValueError, match="Greedy path parameters must be last"):
+        RouteTable({"GET /{proxy+}/pets": None})
+
+    with pytest.raises(ValueError, match="Duplicate route key"):
+        RouteTable({"GET /pets": None, "get /pets/": None})
+
+
+def test_route_table_is_authorized(introspection_response_bearer_with_grants):
+    from zitadel_authorizer.models import IntrospectionResponse
+    from zitadel_authorizer.routes import RouteTable
+
+    token = IntrospectionResponse(**introspection_response_bearer_with_grants)
+    routes = RouteTable(
+        {
+            "GET /profile": {"required_scopes": ["openid", "profile"]},
+            "GET /admin": {"required_roles": ["ADMIN", "USER"]},
+            "GET /writer": {"required_roles": ["ADMIN", "WRITER"]},
+            "GET /offline": {"required_scopes": ["offline"]},
+            "GET /client": {"required_client_id": "314329296124575747"},
+            "GET /other-client": {"required_client_id": "other"},
+        }
+    )
+
+    # the token is encoded once into masks of the known scopes and roles
+    scope_mask, role_mask = routes.token_masks(token)
+    assert scope_mask == 0b11
+    assert role_mask == 0b11
+
+    assert routes.is_authorized(token, "GET /profile") is True
+    assert routes.is_authorized(token, "GET /admin") is True
+    assert routes.is_authorized(token, "GET /writer") is False
+    assert routes.is_authorized(token, "GET /offline") is False
+    assert routes.is_authorized(token, "GET /client") is True
+    assert routes.is_authorized(token, "GET /other-client") is False
+    assert routes.is_authorized(token, "GET /unknown") is False
+
+    granted, refused = routes.authorized_routes(token)
+    assert [route.route_key for route in granted] == [
+        "GET /profile",
+        "GET /admin",
+        "GET /client",
+    ]
+    assert [route.route_key for route in refused] == [
+        "GET /writer",
+        "GET /offline",
+        "GET /other-client",
+    ]
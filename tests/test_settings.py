@@ -26,12 +26,27 @@ def test_authorizer_settings(monkeypatch):
     assert settings.CLIENT_ID == None
     assert settings.REQUIRED_SCOPES == []
     assert settings.REQUIRED_ROLES == []
+    assert settings.CONTEXT_CLAIMS == None
+    assert settings.CONTEXT_EXCLUDE_NONE is False
+    assert settings.CONTEXT_COMPACT is False
+    assert settings.RESPONSE_TYPE == "simple"
+    assert settings.POLICY_RESOURCE_SCOPE == "route"
 
     monkeypatch.setenv("CLIENT_ID", "test_client_id")
     monkeypatch.setenv("REQUIRED_SCOPES", '["scope1","scope2"]')
     monkeypatch.setenv("REQUIRED_ROLES", '["role1","role2"]')
+    monkeypatch.setenv("CONTEXT_CLAIMS", '["active","project_roles"]')
+    monkeypatch.setenv("CONTEXT_EXCLUDE_NONE", "true")
+    monkeypatch.setenv("CONTEXT_COMPACT", "true")
+    monkeypatch.setenv("RESPONSE_TYPE", "iam")
+    monkeypatch.setenv("POLICY_RESOURCE_SCOPE", "stage")
 
     settings = AuthorizerSettings()
     assert settings.CLIENT_ID == "test_client_id"
     assert settings.REQUIRED_SCOPES == ["scope1", "scope2"]
     assert settings.REQUIRED_ROLES == ["role1", "role2"]
+    assert settings.CONTEXT_CLAIMS == ["active", "project_roles"]
+    assert settings.CONTEXT_EXCLUDE_NONE is True
+    assert settings.CONTEXT_COMPACT is True
+    assert settings.RESPONSE_TYPE == "iam"
+    assert settings.POLICY_RESOURCE_SCOPE == "stage"
@@ -0,0 +1,178 @@
+import pytest
+import multiprocessing
+import threading
+
+pytest.importorskip("fcntl")
+
+
+class FakeTime:
+    """
+    Replacement for the time module to control the clock of the shared memory backend
+    """
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "introspection.cache")
+
+
+def test_shared_memory_backend(monkeypatch, cache_path):
+    from zitadel_authorizer import shared_memory
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    clock = FakeTime(1743858735)
+    monkeypatch.setattr(shared_memory, "time", clock)
+
+    backend = SharedMemoryCacheBackend(cache_path, slots=64, slot_size=256)
+    try:
+        assert backend.get("a") is None
+
+        backend.set("a", b"1", ttl=10)
+        backend.set("b", b"\x00" * backend.capacity, ttl=20)
+        assert backend.get("a") == b"1"
+        assert backend.get_many(["a", "b", "c"]) == [
+            b"1",
+            b"\x00" * backend.capacity,
+            None,
+        ]
+
+        # replaced values are read in full
+        backend.set("a", b"22", ttl=10)
+        assert backend.get("a") == b"22"
+
+        clock.now += 10
+        assert backend.get("a") is None
+        assert backend.get("b") is not None
+
+        backend.delete("b")
+        assert backend.get("b") is None
+
+        # values larger than a slot are not stored and remove the outdated value
+        backend.set("c", b"3", ttl=10)
+        backend.set("c", b"x" * (backend.capacity + 1), ttl=10)
+        assert backend.get("c") is None
+        assert backend.stats()["oversized"] == 1
+    finally:
+        backend.close()
+
+
+def test_shared_memory_backend_eviction(cache_path):
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    # a single bucket of two slots
+    backend = SharedMemoryCacheBackend(cache_path, slots=2, slot_size=128, ways=2)
+    try:
+        backend.set("a", b"1", ttl=10)
+        backend.set("b", b"2", ttl=60)
+        backend.set("c", b"3", ttl=60)
+
+        # the entry expiring first is replaced
+        assert backend.get_many(["a", "b", "c"]) == [None, b"2", b"3"]
+        assert backend.stats()["evictions"] == 1
+    finally:
+        backend.close()
+
+
+def test_shared_memory_backend_geometry(cache_path):
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    SharedMemoryCacheBackend(cache_path, slots=64, slot_size=256).close()
+
+    with pytest.raises(ValueError, match="geometry"):
+        SharedMemoryCacheBackend(cache_path, slots=128, slot_size=256)
+
+    with pytest.raises(ValueError):
+        SharedMemoryCacheBackend(cache_path, slots=10, ways=4)
+
+    with pytest.raises(ValueError):
+        SharedMemoryCacheBackend(cache_path, slot_size=16)
+
+
+def write_entries(path: str, worker: int, count: int):
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    backend = SharedMemoryCacheBackend(path, slots=64, slot_size=256)
+    for i in range(count):
+        # every worker writes the same keys with values of different lengths
+        backend.set(f"key{i % 16}", f"key{i % 16}:{worker}:".encode() * (i % 7 + 1), 60)
+    backend.close()
+
+
+def test_shared_memory_backend_processes(cache_path):
+    """the workers of a node share the cached values"""
+
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    backend = SharedMemoryCacheBackend(cache_path, slots=64, slot_size=256)
+    context = multiprocessing.get_context("fork")
+    try:
+        process = context.Process(target=write_entries, args=(cache_path, 1, 16))
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        assert backend.get("key3") == b"key3:1:" * 4
+
+        # readers never see a torn value while other processes write
+        workers = [
+            context.Process(target=write_entries, args=(cache_path, worker, 2000))
+            for worker in range(2, 5)
+        ]
+        for worker in workers:
+            worker.start()
+
+        torn = []
+
+        def read():
+            while any(worker.is_alive() for worker in workers):
+                for i in range(16):
+                    value = backend.get(f"key{i}")
+                    if value is None:
+                        continue
+                    parts = value.split(b":")[:-1]
+                    if len(set(zip(parts[::2], parts[1::2]))) != 1:
+                        torn.append(value)
+
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        for worker in workers:
+            worker.join()
+        for reader in readers:
+            reader.join()
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert torn == []
+    finally:
+        backend.close()
+
+
+def test_shared_memory_shared_cache(
+    cache_path, introspection_response_bearer_with_grants
+):
+    import time
+    from zitadel_authorizer.cache import SharedIntrospectionCache
+    from zitadel_authorizer.models import IntrospectionResponse
+    from zitadel_authorizer.shared_memory import SharedMemoryCacheBackend
+
+    data = dict(introspection_response_bearer_with_grants)
+    data["exp"] = int(time.time()) + 3600
+    response = IntrospectionResponse(**data)
+
+    first = SharedIntrospectionCache(
+        SharedMemoryCacheBackend(cache_path), key_secret=b"secret"
+    )
+    second = SharedIntrospectionCache(
+        SharedMemoryCacheBackend(cache_path), key_secret=b"secret"
+    )
+    try:
+        first.set("token", response)
+        assert second.get("token") == response
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,122 @@
+import pytest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_single_flight_shares_result():
+    from zitadel_authorizer.singleflight import SingleFlight
+
+    single_flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn(value):
+        calls.append(value)
+        started.set()
+        release.wait()
+        return value * 2
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(single_flight.do, "key", fn, 21)
+        started.wait()
+        followers = [executor.submit(single_flight.do, "key", fn, 21) for _ in range(4)]
+        time.sleep(0.05)
+        release.set()
+
+        assert leader.result() == 42
+        assert [follower.result() for follower in followers] == [42] * 4
+
+    assert calls == [21]
+    assert len(single_flight) == 0
+
+
+def test_single_flight_shares_error():
+    from zitadel_authorizer.singleflight import SingleFlight
+
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        started.set()
+        release.wait()
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(single_flight.do, "key", fn)
+        started.wait()
+        followers = [executor.submit(single_flight.do, "key", fn) for _ in range(2)]
+        time.sleep(0.05)
+        release.set()
+
+        for future in [leader, *followers]:
+            with pytest.raises(ValueError, match="failed"):
+                future.result()
+
+    assert len(single_flight) == 0
+
+
+def test_single_flight_sequential_calls():
+    from zitadel_authorizer.singleflight import SingleFlight
+
+    single_flight = SingleFlight()
+    assert single_flight.do("key", lambda: 1) == 1
+    assert single_flight.do("key", lambda: 2) == 2
+
+
+def test_async_single_flight_shares_result():
+    from zitadel_authorizer.singleflight import AsyncSingleFlight
+
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def run():
+        return await asyncio.gather(
+            *(single_flight.do("key", fn, 21) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == [42] * 5
+    assert calls == [21]
+    assert len(single_flight) == 0
+
+
+def test_async_single_flight_cancelled_caller():
+    """cancelling the caller which started the call does not cancel the other waiters"""
+
+    from zitadel_authorizer.singleflight import AsyncSingleFlight
+
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def run():
+        released = asyncio.Event()
+
+        async def fn():
+            calls.append(1)
+            await released.wait()
+            return 42
+
+        first = asyncio.create_task(single_flight.do("key", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(single_flight.do("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        released.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(run()) == [42, 42]
+    assert calls == [1]
+    assert len(single_flight) == 0
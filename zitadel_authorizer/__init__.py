@@ -1,10 +1,87 @@
-from .authorizer import Authorizer
-from .middleware import ProjectRoleAuthorizationMiddleware, IsAuthenticatedMiddleware
-from .introspector import Introspector
-from .models import (
-    ApplicationKey,
-    IntrospectionResponse,
-    IntrospectorSettings,
-    AuthorizerSettings,
-)
-from .helper import get_bearer_token_from_aws_gateway_authorizer_event
+"""
+The exports of the package are imported lazily on first access, so every entry
+point only imports what it uses, e.g. the service lambdas only load the
+middlewares and not the introspector with its http and jwt dependencies.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, List
+
+# export name -> submodule defining it
+_EXPORTS = {
+    "Authorizer": "authorizer",
+    "ProjectRoleAuthorizationMiddleware": "middleware",
+    "IsAuthenticatedMiddleware": "middleware",
+    "get_principal": "middleware",
+    "Principal": "context",
+    "Introspector": "introspector",
+    "AsyncIntrospector": "async_introspector",
+    "IntrospectionCache": "cache",
+    "SharedIntrospectionCache": "cache",
+    "CacheBackend": "backends",
+    "InMemoryCacheBackend": "backends",
+    "RedisCacheBackend": "backends",
+    "SharedMemoryCacheBackend": "shared_memory",
+    "CircuitBreaker": "circuit_breaker",
+    "CircuitOpenError": "circuit_breaker",
+    "JWKSCache": "jwks",
+    "JWTValidator": "jwks",
+    "MetricsSink": "metrics",
+    "InMemoryMetricsSink": "metrics",
+    "EMFMetricsSink": "metrics",
+    "RouteTable": "routes",
+    "ApplicationKey": "models",
+    "IntrospectionResponse": "models",
+    "IntrospectorSettings": "models",
+    "AuthorizerSettings": "models",
+    "RouteRequirements": "models",
+    "get_bearer_token_from_aws_gateway_authorizer_event": "helper",
+    "ApplicationKeyLoader": "key_loader",
+    "create_authorizer_handler": "handler",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    # later accesses skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .authorizer import Authorizer
+    from .middleware import (
+        ProjectRoleAuthorizationMiddleware,
+        IsAuthenticatedMiddleware,
+        get_principal,
+    )
+    from .context import Principal
+    from .introspector import Introspector
+    from .async_introspector import AsyncIntrospector
+    from .cache import IntrospectionCache, SharedIntrospectionCache
+    from .backends import CacheBackend, InMemoryCacheBackend, RedisCacheBackend
+    from .shared_memory import SharedMemoryCacheBackend
+    from .circuit_breaker import CircuitBreaker, CircuitOpenError
+    from .jwks import JWKSCache, JWTValidator
+    from .metrics import MetricsSink, InMemoryMetricsSink, EMFMetricsSink
+    from .routes import RouteTable
+    from .models import (
+        ApplicationKey,
+        IntrospectionResponse,
+        IntrospectorSettings,
+        AuthorizerSettings,
+        RouteRequirements,
+    )
+    from .helper import get_bearer_token_from_aws_gateway_authorizer_event
+    from .key_loader import ApplicationKeyLoader
+    from .handler import create_authorizer_handler
@@ -0,0 +1,180 @@
+"""
+Client assertion used by the introspector to authenticate against the introspection endpoint.
+Signing the assertion is the most expensive part of an introspection, the signed assertion
+is therefore kept and reused until shortly before it expires.
+"""
+
+from aws_lambda_powertools import Logger
+from typing import Optional, Tuple, Union
+import threading
+import time
+import jwt
+
+from .key_loader import ApplicationKeyLoader
+from .models import ApplicationKey
+
+logger = Logger()
+
+CLIENT_ASSERTION_TYPE = "urn:ietf:params:oauth:client-assertion-type:jwt-bearer"
+
+
+class ClientAssertion:
+    """
+    Signs the client assertion jwt and caches it for reuse
+    """
+
+    def __init__(
+        self,
+        application_key: Union[ApplicationKey, ApplicationKeyLoader],
+        audience: str,
+        lifetime: int = 60 * 60,
+        refresh_margin: int = 60,
+        presign_window: int = 5 * 60,
+    ):
+        """
+        Initialize the client assertion
+
+        application_key: the key or a loader of the key, a new assertion is signed once the loader returns a new key
+        lifetime: seconds the signed assertion is valid for
+        refresh_margin: seconds before expiry after which the assertion is no longer used
+        presign_window: seconds before the refresh margin in which the next assertion
+            is signed in the background, set to 0 to disable pre-signing
+        """
+
+        if refresh_margin + presign_window >= lifetime:
+            raise ValueError(
+                "refresh_margin and presign_window must be shorter than the lifetime"
+            )
+
+        self.application_key = application_key
+        self.audience = audience
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self.presign_window = presign_window
+
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at: int = 0
+        self._signed_with: Optional[ApplicationKey] = None
+        self._presigning = False
+
+    @property
+    def expires_at(self) -> int:
+        """
+        Expiry of the currently cached assertion, 0 if none was signed yet
+        """
+
+        return self._expires_at
+
+    def current_key(self) -> ApplicationKey:
+        """
+        Return the application key to sign with
+        """
+
+        if isinstance(self.application_key, ApplicationKeyLoader):
+            return self.application_key.get()
+
+        return self.application_key
+
+    def sign(self, application_key: Optional[ApplicationKey] = None) -> Tuple[str, int]:
+        """
+        Sign a new client assertion and return it together with its expiry
+        """
+
+        application_key = application_key or self.current_key()
+        issued_at = int(time.time())
+        expires_at = issued_at + self.lifetime
+
+        payload = dict(
+            iss=application_key.clientId,
+            sub=application_key.clientId,
+            aud=self.audience,
+            exp=expires_at,
+            iat=issued_at,
+        )
+
+        headers = dict(
+            alg="RS256",
+            kid=application_key.keyId,
+        )
+
+        token = jwt.encode(
+            payload,
+            application_key.private_key,
+            algorithm="RS256",
+            headers=headers,
+        )
+
+        return token, expires_at
+
+    def cached(self) -> Optional[str]:
+        """
+        Return the cached client assertion if it is still usable, never signs in the calling thread
+        """
+
+        now = time.time()
+        token, expires_at = self._token, self._expires_at
+
+        if token and now < expires_at - self.refresh_margin:
+            if self._signed_with is not self.current_key():
+                return None
+            if now >= expires_at - self.refresh_margin - self.presign_window:
+                self._presign()
+            return token
+
+        return None
+
+    def get(self) -> str:
+        """
+        Return a valid client assertion, only signs if no usable assertion is cached
+        """
+
+        token = self.cached()
+        if token:
+            return token
+
+        now = time.time()
+        application_key = self.current_key()
+        with self._lock:
+            # another thread may have signed a new assertion while we were waiting
+            if (
+                self._token
+                and now < self._expires_at - self.refresh_margin
+                and self._signed_with is application_key
+            ):
+                return self._token
+
+            logger.debug("Signing new client assertion")
+            self._token, self._expires_at = self.sign(application_key)
+            self._signed_with = application_key
+            return self._token
+
+    def _presign(self):
+        """
+        Sign the next assertion in a background thread
+        """
+
+        with self._lock:
+            if self._presigning:
+                return
+            self._presigning = True
+
+        threading.Thread(target=self._presign_worker, daemon=True).start()
+
+    def _presign_worker(self):
+        """
+        Replace the cached assertion with a freshly signed one
+        """
+
+        try:
+            logger.debug("Pre-signing next client assertion")
+            application_key = self.current_key()
+            token, expires_at = self.sign(application_key)
+            with self._lock:
+                if expires_at > self._expires_at:
+                    self._token, self._expires_at = token, expires_at
+                    self._signed_with = application_key
+        except Exception:
+            logger.exception("Pre-signing the client assertion failed")
+        finally:
+            self._presigning = False
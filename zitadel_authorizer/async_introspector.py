@@ -0,0 +1,328 @@
+"""
+The async introspector is the asyncio native counterpart of the introspector,
+used by services running on an event loop where blocking requests would stall the loop.
+Requires the optional httpx dependency: pip install zitadel-authorizer[async]
+"""
+
+from aws_lambda_powertools import Logger
+from typing import Any, Dict, Optional, Union
+import asyncio
+import httpx
+
+from .assertion import CLIENT_ASSERTION_TYPE, ClientAssertion
+from .cache import IntrospectionCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, is_failure
+from .key_loader import ApplicationKeyLoader
+from .metrics import (
+    ASSERTION_LATENCY,
+    CACHE_EVICTIONS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    INTROSPECTION_ERRORS,
+    INTROSPECTION_STATUS,
+    NEGATIVE_CACHE_EVICTIONS,
+    NEGATIVE_CACHE_HITS,
+    PARSE_LATENCY,
+    REFRESH_AHEAD,
+    REQUEST_LATENCY,
+    CIRCUIT_OPEN,
+    STALE_CACHE_HITS,
+    MetricsSink,
+)
+from .models import ApplicationKey, IntrospectionResponse
+from .singleflight import AsyncSingleFlight
+
+logger = Logger()
+
+
+class AsyncIntrospector:
+    """
+    Async introspector class to handle the introspection logic on an event loop
+    """
+
+    def __init__(
+        self,
+        application_key: Union[ApplicationKey, ApplicationKeyLoader],
+        issuer_url: str,
+        introspection_endpoint: str,
+        *,
+        assertion_lifetime: int = 60 * 60,
+        assertion_refresh_margin: int = 60,
+        assertion_presign_window: int = 5 * 60,
+        client: Optional[httpx.AsyncClient] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        max_concurrency: int = 100,
+        cache: Optional[IntrospectionCache] = None,
+        negative_cache: Optional[IntrospectionCache] = None,
+        single_flight: bool = True,
+        trusted_fast_parse: bool = False,
+        lazy_profile_claims: bool = False,
+        metrics: Optional[MetricsSink] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.application_key = application_key
+        self.issuer_url = issuer_url
+        self.introspection_endpoint = introspection_endpoint
+
+        # the signed client assertion is reused until shortly before it expires
+        self.client_assertion = ClientAssertion(
+            application_key=application_key,
+            audience=issuer_url,
+            lifetime=assertion_lifetime,
+            refresh_margin=assertion_refresh_margin,
+            presign_window=assertion_presign_window,
+        )
+
+        # the pooled client keeps connections to the introspection endpoint alive
+        self.client = client or self.create_client(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+        )
+
+        # caps the number of concurrent requests to the introspection endpoint
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+
+        # parse the raw response body in a single step, only for trusted endpoints,
+        # lazy profile claims are only decoded when read and imply the fast path
+        self.trusted_fast_parse = trusted_fast_parse
+        self.lazy_profile_claims = lazy_profile_claims
+
+        # opt-in metrics, the default sink discards them
+        self.metrics = metrics or MetricsSink()
+
+        # fail fast while the endpoint is unavailable, answering with stale
+        # cached results within the stale window of the caches
+        self.circuit_breaker = circuit_breaker
+
+        # cached results due for a refresh ahead of their expiry are introspected
+        # again by background tasks on the event loop
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def create_client(
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+    ) -> httpx.AsyncClient:
+        """
+        Create a httpx client with a pooled keep-alive transport
+        """
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(
+                connect=connect_timeout, read=read_timeout, write=None, pool=None
+            ),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the metrics and cache counters
+        """
+
+        return dict(
+            metrics=self.metrics.stats(),
+            cache=self.cache.stats() if self.cache is not None else None,
+            negative_cache=(
+                self.negative_cache.stats() if self.negative_cache is not None else None
+            ),
+            circuit_breaker=(
+                self.circuit_breaker.stats()
+                if self.circuit_breaker is not None
+                else None
+            ),
+        )
+
+    async def aclose(self):
+        """
+        Close the pooled connections of the client and cancel pending refreshes
+        """
+
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+
+        await self.client.aclose()
+
+    def refresh_in_background(self, token: str):
+        """
+        Introspect the token again in a background task, refreshes of the same token are deduplicated
+        """
+
+        if token in self._refresh_tasks:
+            return
+
+        self.metrics.increment(REFRESH_AHEAD)
+        task = asyncio.get_running_loop().create_task(self._refresh(token))
+        self._refresh_tasks[token] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(token, None))
+
+    async def _refresh(self, token: str):
+        try:
+            if self.single_flight is not None:
+                await self.single_flight.do(token, self._introspect_and_cache, token)
+            else:
+                await self._introspect_and_cache(token)
+        except Exception:
+            # the cached result stays valid until it expires
+            logger.exception("Refreshing the introspection result failed")
+
+    async def __aenter__(self) -> "AsyncIntrospector":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def introspect_token(
+        self,
+        token: str,
+    ) -> IntrospectionResponse:
+        """
+        introspect the token, cached results are returned without calling the introspection endpoint
+        """
+
+        for cache, hits in (
+            (self.cache, CACHE_HITS),
+            (self.negative_cache, NEGATIVE_CACHE_HITS),
+        ):
+            if cache is not None:
+                cached, refresh = cache.lookup(token)
+                if cached is not None:
+                    self.metrics.increment(hits)
+                    if refresh:
+                        self.refresh_in_background(token)
+                    return cached
+
+        if self.cache is not None or self.negative_cache is not None:
+            self.metrics.increment(CACHE_MISSES)
+
+        if self.single_flight is not None:
+            return await self.single_flight.do(token, self._introspect_and_cache, token)
+
+        return await self._introspect_and_cache(token)
+
+    async def _introspect_and_cache(self, token: str) -> IntrospectionResponse:
+        """
+        introspect the token and store the result in the matching cache
+        """
+
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            self.metrics.increment(CIRCUIT_OPEN)
+            stale = self.get_stale(token)
+            if stale is None:
+                raise CircuitOpenError(
+                    "The circuit of the introspection endpoint is open"
+                )
+            return stale
+
+        try:
+            introspection_response = await self.request_introspection(token)
+        except Exception as error:
+            if breaker is not None:
+                breaker.record_error(error)
+
+            # answer with the last known result if the endpoint is unavailable
+            stale = self.get_stale(token) if is_failure(error) else None
+            if stale is None:
+                raise
+
+            logger.warning(f"Introspection failed, serving stale result: {error}")
+            return stale
+
+        if breaker is not None:
+            breaker.record_success()
+
+        if introspection_response.active:
+            cache, evictions = self.cache, CACHE_EVICTIONS
+            outdated = self.negative_cache
+        else:
+            cache, evictions = self.negative_cache, NEGATIVE_CACHE_EVICTIONS
+            outdated = self.cache
+
+        # e.g. a refreshed token which got revoked in the meantime
+        if outdated is not None:
+            outdated.delete(token)
+
+        if cache is not None:
+            evicted = cache.set(token, introspection_response)
+            if evicted:
+                self.metrics.increment(evictions, evicted)
+
+        return introspection_response
+
+    def get_stale(self, token: str) -> Optional[IntrospectionResponse]:
+        """
+        Return the last known result of the token within the stale window of the caches
+        """
+
+        for cache in (self.cache, self.negative_cache):
+            if cache is not None:
+                stale = cache.get_stale(token)
+                if stale is not None:
+                    self.metrics.increment(STALE_CACHE_HITS)
+                    return stale
+
+        return None
+
+    async def request_introspection(
+        self,
+        token: str,
+    ) -> IntrospectionResponse:
+        """
+        introspect the token using the introspection endpoint
+        """
+
+        metrics = self.metrics
+
+        # signing is cpu bound, only sign outside of the event loop
+        with metrics.timer(ASSERTION_LATENCY):
+            client_assertion = self.client_assertion.cached()
+            if client_assertion is None:
+                client_assertion = await asyncio.to_thread(self.client_assertion.get)
+
+        data = dict(
+            client_assertion_type=CLIENT_ASSERTION_TYPE,
+            client_assertion=client_assertion,
+            token=token,
+        )
+
+        # log the introspection request
+        logger.debug(f"Introspection endpoint: {self.introspection_endpoint}")
+        logger.debug(f"Introspection data: {data}")
+
+        async with self.semaphore:
+            try:
+                with metrics.timer(REQUEST_LATENCY):
+                    response = await self.client.post(
+                        url=self.introspection_endpoint,
+                        data=data,
+                    )
+            except httpx.RequestError:
+                metrics.increment(INTROSPECTION_ERRORS)
+                raise
+
+        metrics.increment(f"{INTROSPECTION_STATUS}{response.status_code}")
+        response.raise_for_status()
+
+        with metrics.timer(PARSE_LATENCY):
+            if self.trusted_fast_parse or self.lazy_profile_claims:
+                return IntrospectionResponse.from_json(
+                    response.content, lazy_profile=self.lazy_profile_claims
+                )
+
+            return IntrospectionResponse(**response.json())
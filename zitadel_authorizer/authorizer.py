@@ -2,12 +2,19 @@
 Lambda Authorizer for API Gateway to authenticate and authorize requests based on Zitadel tokens
 """
 
-from typing import List
-from .models import IntrospectionResponse
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from .context import encode_authorizer_context
+from .metrics import AUTHORIZATION_ALLOWED, AUTHORIZATION_DENIED, MetricsSink
+from .models import IntrospectionResponse, RouteRequirements
+from .routes import RouteTable, normalize_route_key
 from aws_lambda_powertools.utilities.data_classes.api_gateway_authorizer_event import (
     APIGatewayAuthorizerResponseV2,
 )
 
+# resources covered by the policy: the requested route only, every route of the
+# stage or every route of every stage of the api
+POLICY_RESOURCE_SCOPES = ("route", "stage", "api")
+
 
 class Authorizer:
     """
@@ -19,20 +26,97 @@ class Authorizer:
         required_client_id: str = None,
         required_scopes: List[str] = [],
         required_roles: List[str] = [],
+        context_claims: Optional[List[str]] = None,
+        context_exclude_none: bool = False,
+        context_compact: bool = False,
+        policy_resource_scope: str = "route",
+        routes: Optional[
+            Union[RouteTable, Mapping[str, Union[RouteRequirements, Mapping]]]
+        ] = None,
+        metrics: Optional[MetricsSink] = None,
     ):
         """
         Initialize the Authorizer object
+
+        context_claims: allowlist of claims passed as authorizer context, all claims if None
+        context_exclude_none: drop claims without value from the authorizer context
+        context_compact: encode list claims like the project roles as space separated strings
+        policy_resource_scope: resources of the iam policy, one of route, stage or api,
+            with routes the allowed policies only cover the requested route
+        routes: requirements by route key, checked in addition to the required
+            client id, scopes and roles. Requests without a matching route are denied.
+        metrics: sink counting the allowed and denied requests
         """
 
+        if policy_resource_scope not in POLICY_RESOURCE_SCOPES:
+            raise ValueError(
+                f"Invalid policy resource scope: {policy_resource_scope}. Use one of {list(POLICY_RESOURCE_SCOPES)}"
+            )
+
+        if context_claims is not None:
+            unknown_claims = set(context_claims) - set(
+                IntrospectionResponse.model_fields
+            )
+            if unknown_claims:
+                raise ValueError(f"Unknown context claims: {sorted(unknown_claims)}")
+
         self.required_client_id = required_client_id
         self.required_scopes = required_scopes
         self.required_roles = required_roles
 
-    def is_authorized(self, introspection_token: IntrospectionResponse) -> bool:
+        # the requirements are compiled into sets once, each check is a subset test
+        self._required_scopes = frozenset(required_scopes)
+        self._required_roles = frozenset(required_roles)
+
+        self.context_claims = context_claims
+        self.context_exclude_none = context_exclude_none
+        self.context_compact = context_compact
+        self.policy_resource_scope = policy_resource_scope
+
+        # the route table is compiled once, resolving a route does not scan the routes
+        if routes is not None and not isinstance(routes, RouteTable):
+            routes = RouteTable(routes)
+        self.routes: Optional[RouteTable] = routes
+
+        self.metrics = metrics or MetricsSink()
+
+    def is_authorized(
+        self,
+        introspection_token: IntrospectionResponse,
+        route_key: Optional[str] = None,
+    ) -> bool:
         """
         Check if the token is authorized based on the required scopes and roles
+
+        route_key: the route key or request, e.g. "GET /pets/42", checked against
+            the route table. Without a route key all requests are denied if routes
+            are configured.
+        """
+
+        authorized = self._is_authorized(introspection_token)
+
+        if authorized and self.routes is not None:
+            authorized = route_key is not None and self.routes.is_authorized(
+                introspection_token, route_key
+            )
+
+        self._record_decision(authorized)
+        return authorized
+
+    def _record_decision(self, authorized: bool):
+        self.metrics.increment(
+            AUTHORIZATION_ALLOWED if authorized else AUTHORIZATION_DENIED
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the metrics, e.g. the allowed and denied requests
         """
 
+        return self.metrics.stats()
+
+    def _is_authorized(self, introspection_token: IntrospectionResponse) -> bool:
+
         if not introspection_token.active:
             return False
 
@@ -42,26 +126,180 @@ class Authorizer:
         ):
             return False
 
-        if self.required_scopes and not introspection_token.has_scopes(
-            self.required_scopes
+        if self._required_scopes and not introspection_token.has_scopes(
+            self._required_scopes
         ):
             return False
 
-        if self.required_roles and not introspection_token.has_roles(
-            self.required_roles
+        if self._required_roles and not introspection_token.has_roles(
+            self._required_roles
         ):
             return False
 
         return True
 
-    def return_simple_authorizer_response(
+    def _get_context_claims(
         self, introspection_token: IntrospectionResponse
+    ) -> Dict[str, Any]:
+        if self.context_claims is None:
+            return introspection_token.model_dump()
+
+        # only read the allowed claims, lazily parsed profile claims stay undecoded
+        return {
+            name: getattr(introspection_token, name) for name in self.context_claims
+        }
+
+    def get_authorizer_context(
+        self, introspection_token: IntrospectionResponse
+    ) -> Dict[str, Any]:
+        """
+        Project the introspected token into the authorizer context
+        """
+
+        return encode_authorizer_context(
+            self._get_context_claims(introspection_token),
+            exclude_none=self.context_exclude_none,
+            compact=self.context_compact,
+        )
+
+    def return_simple_authorizer_response(
+        self,
+        introspection_token: IntrospectionResponse,
+        route_key: Optional[str] = None,
     ) -> APIGatewayAuthorizerResponseV2:
         """
         Return a simple authorizer response
         """
 
         return APIGatewayAuthorizerResponseV2(
-            authorize=self.is_authorized(introspection_token=introspection_token),
-            context=introspection_token.model_dump(),
+            authorize=self.is_authorized(
+                introspection_token=introspection_token, route_key=route_key
+            ),
+            context=self.get_authorizer_context(introspection_token),
+        )
+
+    @staticmethod
+    def split_method_arn(method_arn: str) -> Tuple[str, str, str, str]:
+        """
+        Split arn:aws:execute-api:region:account:api/stage/METHOD/path into
+        the api arn, the stage, the method and the path
+        """
+
+        parts = method_arn.split("/", 3)
+        api_arn, stage = parts[0], parts[1]
+        method = parts[2] if len(parts) > 2 else "*"
+        path = "/" + parts[3] if len(parts) > 3 else "/"
+
+        return api_arn, stage, method, path
+
+    @staticmethod
+    def get_policy_resource(method_arn: str, resource_scope: str) -> str:
+        """
+        Return the policy resource for the method or route arn of the request
+
+        arn:aws:execute-api:region:account:api/stage/METHOD/path is widened to
+        .../api/stage/* for the stage and .../api/* for the api scope
+        """
+
+        if resource_scope == "route":
+            return method_arn
+
+        api_arn, stage, _, _ = Authorizer.split_method_arn(method_arn)
+
+        if resource_scope == "stage":
+            return f"{api_arn}/{stage}/*"
+
+        return f"{api_arn}/*"
+
+    def _request_route_key(self, method_arn: str, route_key: Optional[str]) -> str:
+        if route_key is None:
+            _, _, method, path = self.split_method_arn(method_arn)
+            route_key = normalize_route_key(method, path)
+
+        return route_key
+
+    def get_policy_statements(
+        self,
+        introspection_token: IntrospectionResponse,
+        method_arn: str,
+        resource_scope: str,
+        route_key: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the policy statements of the decision for the token
+
+        With a route table the policy only covers the requested route, wildcard
+        resources can not express the routes exactly and would allow requests
+        without a matching route. Tokens failing the global requirements are
+        denied for the whole resource scope.
+        """
+
+        authorized = self._is_authorized(introspection_token)
+        if self.routes is None or not authorized:
+            effect = "Allow" if authorized else "Deny"
+            return [
+                policy_statement(
+                    effect, self.get_policy_resource(method_arn, resource_scope)
+                )
+            ]
+
+        route_key = self._request_route_key(method_arn, route_key)
+        effect = (
+            "Allow"
+            if self.routes.is_authorized(introspection_token, route_key)
+            else "Deny"
         )
+        return [policy_statement(effect, method_arn)]
+
+    def return_iam_policy_response(
+        self,
+        introspection_token: IntrospectionResponse,
+        method_arn: str,
+        resource_scope: Optional[str] = None,
+        route_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return an iam policy response allowing or denying the request
+
+        method_arn: methodArn of a REST API or routeArn of an HTTP API event
+        resource_scope: overrides the policy resource scope of the authorizer
+        route_key: route key of the request, parsed from the method arn if not given
+
+        With the stage or api scope the policy covers all routes, so API Gateway can
+        reuse a cached decision for every request of the token. With a route table
+        the scope only widens the policy of tokens denied by the global requirements.
+        """
+
+        resource_scope = resource_scope or self.policy_resource_scope
+        if resource_scope not in POLICY_RESOURCE_SCOPES:
+            raise ValueError(f"Invalid policy resource scope: {resource_scope}")
+
+        statements = self.get_policy_statements(
+            introspection_token, method_arn, resource_scope, route_key
+        )
+
+        self._record_decision(statements[0]["Effect"] == "Allow")
+
+        return {
+            "principalId": introspection_token.sub
+            or introspection_token.client_id
+            or "anonymous",
+            "policyDocument": {
+                "Version": "2012-10-17",
+                "Statement": statements,
+            },
+            # policy contexts only support flat values, lists are always joined
+            "context": encode_authorizer_context(
+                self._get_context_claims(introspection_token),
+                exclude_none=True,
+                compact=True,
+            ),
+        }
+
+
+def policy_statement(effect: str, resource: Union[str, List[str]]) -> Dict[str, Any]:
+    """
+    Return an execute-api:Invoke statement of the policy document
+    """
+
+    return {"Action": "execute-api:Invoke", "Effect": effect, "Resource": resource}
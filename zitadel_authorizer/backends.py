@@ -0,0 +1,378 @@
+"""
+Cache backends storing serialized introspection results outside of a single
+introspector, e.g. a redis server shared by all lambda containers and replicas
+of a service, so a token is introspected once for the whole fleet.
+
+Backends store opaque bytes by key with a TTL. The shared introspection cache
+builds the keys from token digests and serializes the responses, see
+SharedIntrospectionCache in the cache module.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+import socket
+import ssl
+import threading
+import time
+
+
+class CacheBackend(ABC):
+    """
+    Key value store with expiring entries, the interface of all cache backends
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Return the value of the key or None if it is not stored or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float):
+        """
+        Store the value of the key for ttl seconds
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove the key
+        """
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        """
+        Return the values of the keys in order, None for keys which are not stored
+        """
+
+        return [self.get(key) for key in keys]
+
+    def close(self):
+        """
+        Release the resources of the backend, e.g. open connections
+        """
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Bounded backend within the process, e.g. for tests and single instance deployments
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize the backend
+
+        maxsize: maximum number of stored keys, the least recently used key is evicted first
+        """
+
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # key -> (expires_at, value)
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl <= 0:
+            self.delete(key)
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove all keys
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisError(RuntimeError):
+    """
+    Raised for error replies of the redis server
+    """
+
+
+def encode_command(*args: Union[str, bytes, int]) -> bytes:
+    """
+    Encode the command as RESP array of bulk strings
+    """
+
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, int):
+            arg = b"%d" % arg
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+    return b"".join(parts)
+
+
+class RedisConnection:
+    """
+    A connection to the redis server, used by one thread at a time
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.socket = sock
+        self.reader = sock.makefile("rb")
+
+    def send(self, command: bytes) -> Any:
+        """
+        Send the encoded command and return its reply
+        """
+
+        self.socket.sendall(command)
+        return self.read_reply()
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the redis server")
+
+        kind, payload = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the redis server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self.read_reply() for _ in range(length)]
+
+        raise ConnectionError(f"Invalid reply of the redis server: {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.socket.close()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend storing the values on a server speaking the redis protocol (RESP),
+    e.g. redis, valkey or a managed service like ElastiCache
+
+    Every command uses a connection of a small pool, so concurrent threads do
+    not wait for each other's round trips. Connections are opened on demand,
+    up to pool_maxsize idle connections are kept open and a failed command on
+    a kept open connection is retried once on a new connection.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: float = 0.5,
+        use_ssl: bool = False,
+        prefix: str = "",
+        pool_maxsize: int = 10,
+    ):
+        """
+        Initialize the backend
+
+        timeout: seconds to wait for the connection and each reply, the shared
+            cache should answer much faster than the introspection endpoint
+        prefix: prepended to every key, e.g. to share a server between applications
+        pool_maxsize: idle connections kept open, e.g. the number of threads using the backend
+        """
+
+        if pool_maxsize <= 0:
+            raise ValueError("pool_maxsize must be greater than 0")
+
+        self.host = host
+        self.port = port
+        self.db = db
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.use_ssl = use_ssl
+        self.prefix = prefix
+        self.pool_maxsize = pool_maxsize
+
+        self._lock = threading.Lock()
+        # idle connections, the most recently used is reused first
+        self._connections: List[RedisConnection] = []
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCacheBackend":
+        """
+        Create the backend from a url, e.g. redis://:password@localhost:6379/0
+        or rediss:// for connections using tls
+        """
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Invalid redis url scheme: {parts.scheme}")
+
+        db = parts.path.lstrip("/")
+
+        return cls(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(db) if db else 0,
+            username=unquote(parts.username) if parts.username else None,
+            password=unquote(parts.password) if parts.password else None,
+            use_ssl=parts.scheme == "rediss",
+            **kwargs,
+        )
+
+    def _connect(self) -> RedisConnection:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            # commands are small, send them without waiting for more data
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            if self.use_ssl:
+                sock = ssl.create_default_context().wrap_socket(
+                    sock, server_hostname=self.host
+                )
+        except BaseException:
+            sock.close()
+            raise
+
+        connection = RedisConnection(sock)
+        try:
+            if self.password is not None:
+                if self.username is not None:
+                    connection.send(
+                        encode_command("AUTH", self.username, self.password)
+                    )
+                else:
+                    connection.send(encode_command("AUTH", self.password))
+
+            if self.db:
+                connection.send(encode_command("SELECT", self.db))
+        except BaseException:
+            # a connection which is not authenticated or on the wrong db is not kept
+            connection.close()
+            raise
+
+        return connection
+
+    def _acquire(self) -> Optional[RedisConnection]:
+        with self._lock:
+            return self._connections.pop() if self._connections else None
+
+    def _release(self, connection: RedisConnection):
+        with self._lock:
+            if len(self._connections) < self.pool_maxsize:
+                self._connections.append(connection)
+                return
+
+        connection.close()
+
+    def execute(self, *args: Union[str, bytes, int]) -> Any:
+        """
+        Send the command and return its reply
+        """
+
+        command = encode_command(*args)
+
+        # a kept open connection may have been closed by the server in the meantime
+        for attempt in range(2):
+            connection = self._acquire()
+            reused = connection is not None
+            try:
+                if connection is None:
+                    connection = self._connect()
+                reply = connection.send(command)
+            except RedisError:
+                # the error reply was read in full, the connection stays usable
+                if connection is not None:
+                    self._release(connection)
+                raise
+            except (OSError, ValueError):
+                if connection is not None:
+                    connection.close()
+                if attempt or not reused:
+                    raise
+                continue
+            except BaseException:
+                if connection is not None:
+                    connection.close()
+                raise
+
+            self._release(connection)
+            return reply
+
+    def ping(self) -> bool:
+        """
+        Check the connection to the server
+        """
+
+        return self.execute("PING") == b"PONG"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        milliseconds = int(ttl * 1000)
+        if milliseconds <= 0:
+            self.delete(key)
+            return
+
+        self.execute("SET", self.prefix + key, value, "PX", milliseconds)
+
+    def delete(self, key: str):
+        self.execute("DEL", self.prefix + key)
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        keys = [self.prefix + key for key in keys]
+        if not keys:
+            return []
+
+        return self.execute("MGET", *keys)
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,465 @@
+"""
+In memory cache for introspection results, used by the introspector to answer
+repeated tokens without a round trip to the introspection endpoint.
+
+Tokens are not kept in memory: entries are keyed by a keyed digest of the token,
+which also gives every key the same size regardless of the token length.
+
+The shared cache stores the results in a cache backend used by many
+introspectors, e.g. a redis server shared by all lambda containers.
+"""
+
+from aws_lambda_powertools import Logger
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import random
+import secrets
+import sys
+import threading
+import time
+
+from .backends import CacheBackend
+from .circuit_breaker import CircuitBreaker
+from .models import IntrospectionResponse
+
+logger = Logger()
+
+# estimated memory of an entry besides the response: key, entry tuple and ordered dict node
+ENTRY_OVERHEAD = 256
+
+# maximum number of cached tokens of caches without a memory budget
+DEFAULT_MAXSIZE = 1024
+
+
+def estimate_response_size(response: IntrospectionResponse) -> int:
+    """
+    Estimate the memory used by the response in bytes
+
+    The derived scope and role sets are built first, they are read by every
+    authorization of a cached response anyway.
+    """
+
+    response.scope_set
+    response.role_set
+
+    size = sys.getsizeof(response) + sys.getsizeof(response.__dict__)
+    for value in response.__dict__.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, (list, frozenset)):
+            size += sum(sys.getsizeof(item) for item in value)
+
+    # the raw claims of lazily parsed responses
+    for value in (response.__pydantic_private__ or {}).values():
+        size += sys.getsizeof(value)
+
+    return size
+
+
+class IntrospectionCache:
+    """
+    Bounded TTL and LRU cache of introspection responses keyed by token digest
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: float = 60,
+        stale_ttl: float = 0,
+        refresh_ahead: Optional[float] = None,
+        refresh_probabilistic: bool = True,
+        max_bytes: Optional[int] = None,
+        key_secret: Optional[bytes] = None,
+    ):
+        """
+        Initialize the cache
+
+        maxsize: maximum number of cached tokens, the least recently used token is
+            evicted first, defaults to 1024 tokens unless max_bytes is given
+        max_bytes: memory budget of the cache, the least recently used tokens are
+            evicted until the estimated size of all entries fits the budget,
+            the number of tokens is only bounded by maxsize if both are given
+        ttl: maximum number of seconds a response is cached, the response is never
+            cached beyond the expiry (exp) of the token itself
+        stale_ttl: seconds an expired response is kept to be served while the
+            introspection endpoint is unavailable, also capped by the token expiry
+        refresh_ahead: fraction of the lifetime of an entry after which a hit asks
+            for a background refresh, e.g. 0.8, None disables refreshing ahead
+        refresh_probabilistic: spread the refreshes, the probability of a refresh
+            grows from 0 at the refresh_ahead fraction to 1 at the expiry
+        key_secret: secret of the key digests (up to 64 bytes), a random secret if None
+        """
+
+        if maxsize is None and max_bytes is None:
+            maxsize = DEFAULT_MAXSIZE
+
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be greater than 0")
+
+        if refresh_ahead is not None and not 0 < refresh_ahead < 1:
+            raise ValueError("refresh_ahead must be between 0 and 1")
+
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.refresh_probabilistic = refresh_probabilistic
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+        self._key_secret = key_secret or secrets.token_bytes(32)
+        # keyed hash state copied for every key, cheaper than keying each digest
+        self._hasher = hashlib.blake2b(key=self._key_secret, digest_size=32)
+
+        self._lock = threading.Lock()
+        self._bytes = 0
+        # digest -> (stored_at, expires_at, stale_until, response, size)
+        self._entries: OrderedDict[
+            bytes, Tuple[float, float, float, IntrospectionResponse, int]
+        ] = OrderedDict()
+
+    def _key(self, token: str) -> bytes:
+        hasher = self._hasher.copy()
+        hasher.update(token.encode("utf-8"))
+        return hasher.digest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[IntrospectionResponse]:
+        """
+        Return the cached response of the token or None if it is not cached or expired
+        """
+
+        return self.lookup(token)[0]
+
+    def lookup(self, token: str) -> Tuple[Optional[IntrospectionResponse], bool]:
+        """
+        Return the cached response of the token and if it should be refreshed ahead of its expiry
+        """
+
+        key = self._key(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            stored_at, expires_at, stale_until, response, _ = entry
+            if expires_at <= now:
+                if stale_until <= now:
+                    self._remove(key)
+                self.misses += 1
+                return None, False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        if self.refresh_ahead is None:
+            return response, False
+
+        return response, self._refresh_due(now, stored_at, expires_at)
+
+    def _refresh_due(self, now: float, stored_at: float, expires_at: float) -> bool:
+        age = (now - stored_at) / (expires_at - stored_at)
+        if age < self.refresh_ahead:
+            return False
+
+        if not self.refresh_probabilistic:
+            return True
+
+        # early refreshes of concurrently used tokens are spread over the remaining lifetime
+        probability = (age - self.refresh_ahead) / (1 - self.refresh_ahead)
+        return random.random() < probability
+
+    def get_stale(self, token: str) -> Optional[IntrospectionResponse]:
+        """
+        Return the cached response of the token, expired responses are returned
+        within the stale window. Used while the introspection endpoint is unavailable.
+        """
+
+        key = self._key(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            _, _, stale_until, response, _ = entry
+            if stale_until <= now:
+                self._remove(key)
+                return None
+
+            self.stale_hits += 1
+            return response
+
+    def set(self, token: str, response: IntrospectionResponse) -> int:
+        """
+        Cache the response of the token, returns the number of evicted tokens
+        """
+
+        now = time.time()
+        expires_at = now + self.ttl
+        stale_until = expires_at + self.stale_ttl
+
+        if response.exp is not None:
+            expires_at = min(expires_at, response.exp)
+            stale_until = min(stale_until, response.exp)
+
+        if stale_until <= now:
+            return 0
+
+        size = ENTRY_OVERHEAD + estimate_response_size(response)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return 0
+
+        key = self._key(token)
+
+        evicted = 0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (now, expires_at, stale_until, response, size)
+            self._bytes += size
+
+            while (self.maxsize is not None and len(self._entries) > self.maxsize) or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+
+            self.evictions += evicted
+
+        return evicted
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[-1]
+
+    def delete(self, token: str):
+        """
+        Remove the token from the cache
+        """
+
+        with self._lock:
+            self._remove(self._key(token))
+
+    def clear(self):
+        """
+        Remove all tokens from the cache
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def bytes(self) -> int:
+        """
+        The estimated memory used by the cached entries
+        """
+
+        return self._bytes
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """
+        Return the hit, miss and eviction counters and the current size of the cache
+        """
+
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            stale_hits=self.stale_hits,
+            size=len(self._entries),
+            maxsize=self.maxsize,
+            bytes=self._bytes,
+            max_bytes=self.max_bytes,
+        )
+
+
+class SharedIntrospectionCache:
+    """
+    Introspection results stored in a cache backend shared between introspectors
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        key_secret: bytes,
+        ttl: float = 60,
+        negative_ttl: float = 0,
+        prefix: str = "introspection:",
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the shared cache
+
+        key_secret: secret of the key digests (up to 64 bytes), must be the same
+            for all introspectors sharing the backend
+        ttl: maximum number of seconds an active response is shared, never beyond
+            the expiry (exp) of the token itself
+        negative_ttl: seconds an inactive response is shared, 0 only removes the
+            shared result of the token, e.g. once it got revoked
+        circuit_breaker: skips the backend for a while after repeated errors,
+            by default after 3 consecutive errors for 10 seconds
+        """
+
+        if not key_secret:
+            raise ValueError("key_secret is required to share the cache keys")
+
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.prefix = prefix
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=3, recovery_timeout=10
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        self._hasher = hashlib.blake2b(key=key_secret, digest_size=32)
+
+    def key(self, token: str) -> str:
+        """
+        Return the backend key of the token
+        """
+
+        hasher = self._hasher.copy()
+        hasher.update(token.encode("utf-8"))
+        return self.prefix + hasher.hexdigest()
+
+    def _failed(self, action: str, error: Exception):
+        # the shared cache is an optimization, errors of the backend are not raised
+        self.errors += 1
+        self.circuit_breaker.record_failure()
+        logger.warning(f"Shared cache {action} failed: {error}")
+
+    def _load(
+        self, value: Optional[bytes], now: float
+    ) -> Optional[IntrospectionResponse]:
+        if value is None:
+            self.misses += 1
+            return None
+
+        try:
+            response = IntrospectionResponse.from_json(value)
+        except ValueError as error:
+            logger.warning(f"Invalid shared cache entry: {error}")
+            self.misses += 1
+            return None
+
+        # the clocks of the introspectors may differ from the backend
+        if response.exp is not None and response.exp <= now:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response
+
+    def get(self, token: str) -> Optional[IntrospectionResponse]:
+        """
+        Return the shared response of the token or None if it is not shared or expired
+        """
+
+        if not self.circuit_breaker.allow_request():
+            self.misses += 1
+            return None
+
+        try:
+            value = self.backend.get(self.key(token))
+        except Exception as error:
+            self._failed("read", error)
+            self.misses += 1
+            return None
+
+        self.circuit_breaker.record_success()
+        return self._load(value, time.time())
+
+    def get_many(self, tokens: Iterable[str]) -> List[Optional[IntrospectionResponse]]:
+        """
+        Return the shared responses of the tokens in order with a single backend call
+        """
+
+        tokens = list(tokens)
+        if not self.circuit_breaker.allow_request():
+            self.misses += len(tokens)
+            return [None] * len(tokens)
+
+        try:
+            values = self.backend.get_many([self.key(token) for token in tokens])
+        except Exception as error:
+            self._failed("read", error)
+            self.misses += len(tokens)
+            return [None] * len(tokens)
+
+        self.circuit_breaker.record_success()
+        now = time.time()
+        return [self._load(value, now) for value in values]
+
+    def set(self, token: str, response: IntrospectionResponse):
+        """
+        Share the response of the token
+        """
+
+        if not self.circuit_breaker.allow_request():
+            return
+
+        ttl = self.ttl if response.active else self.negative_ttl
+        if response.exp is not None:
+            ttl = min(ttl, response.exp - time.time())
+
+        try:
+            if ttl > 0:
+                value = response.model_dump_json(by_alias=True, exclude_none=True)
+                self.backend.set(self.key(token), value.encode("utf-8"), ttl)
+            else:
+                # never leave an outdated result of the token behind
+                self.backend.delete(self.key(token))
+        except Exception as error:
+            self._failed("write", error)
+            return
+
+        self.circuit_breaker.record_success()
+
+    def delete(self, token: str):
+        """
+        Remove the shared response of the token
+        """
+
+        try:
+            self.backend.delete(self.key(token))
+        except Exception as error:
+            self._failed("delete", error)
+
+    def close(self):
+        """
+        Close the backend, e.g. its connection
+        """
+
+        self.backend.close()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Return the hit, miss and error counters and the state of the backend circuit
+        """
+
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            errors=self.errors,
+            circuit_breaker=self.circuit_breaker.stats(),
+        )
@@ -0,0 +1,144 @@
+"""
+Circuit breaker around the introspection endpoint. After repeated failures the
+circuit opens and calls fail fast instead of waiting for the endpoint to time out,
+the introspector then answers with stale cached results where it has them.
+Once the recovery timeout passed a trial call probes the endpoint again.
+"""
+
+from typing import Dict, Union
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling the introspection endpoint while the circuit is open
+    """
+
+
+def is_failure(error: BaseException) -> bool:
+    """
+    Check if the error counts as failure of the endpoint: connection errors,
+    timeouts, server errors and rate limiting. Other client errors do not open
+    the circuit, they are caused by the request and not by the endpoint.
+    """
+
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker counting consecutive failures
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        Initialize the circuit breaker
+
+        failure_threshold: consecutive failures opening the circuit
+        recovery_timeout: seconds the circuit stays open before trial calls are allowed
+        half_open_max_calls: concurrent trial calls while the circuit is half open
+        """
+
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be greater than 0")
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+
+    @property
+    def state(self) -> str:
+        """
+        The current state, open circuits report half open once the recovery timeout passed
+        """
+
+        with self._lock:
+            if self._state == OPEN and self._recovery_timeout_passed():
+                return HALF_OPEN
+            return self._state
+
+    def _recovery_timeout_passed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.recovery_timeout
+
+    def allow_request(self) -> bool:
+        """
+        Check if a call may be made, reserves a trial call if the circuit is half open
+        """
+
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN:
+                if not self._recovery_timeout_passed():
+                    return False
+                self._state = HALF_OPEN
+                self._trial_calls = 0
+
+            if self._trial_calls >= self.half_open_max_calls:
+                return False
+
+            self._trial_calls += 1
+            return True
+
+    def record_success(self):
+        """
+        Close the circuit after a successful call
+        """
+
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_calls = 0
+
+    def record_failure(self):
+        """
+        Count a failed call, opens the circuit once the threshold is reached
+        or the trial call of a half open circuit failed
+        """
+
+        with self._lock:
+            self._failures += 1
+
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_calls = 0
+
+    def record_error(self, error: BaseException):
+        """
+        Record the error of a call, only failures of the endpoint are counted
+        """
+
+        if is_failure(error):
+            self.record_failure()
+        else:
+            # the endpoint answered, a half open circuit can be closed again
+            self.record_success()
+
+    def stats(self) -> Dict[str, Union[str, int]]:
+        """
+        Return the state and the consecutive failures
+        """
+
+        return dict(state=self.state, failures=self._failures)
@@ -0,0 +1,164 @@
+"""
+Command line interface, e.g. to introspect large lists of tokens for audits:
+
+    zitadel-authorizer introspect --key-file key.json < tokens.jsonl > results.jsonl
+
+Every input line is a token or a json object with the token and an optional
+ref, e.g. {"ref": "session-42", "token": "..."}. Lines without a ref are referred
+to by their line number, tokens are never written to the output. Every output
+line is a json object with the ref and the introspection result, or the error
+of the introspection. Records are streamed, the memory used does not grow with
+the number of tokens.
+
+The issuer url, introspection endpoint and application key parameter default to
+the ISSUER_URL, INTROSPECTION_ENDPOINT and APPLICATION_KEY_ARN environment variables.
+"""
+
+from typing import IO, Callable, Hashable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+
+from .introspector import Introspector
+from .models import ApplicationKey
+
+
+def read_tokens(
+    lines: IO[str], report_error: Callable[[str], None]
+) -> Iterator[Tuple[Hashable, str]]:
+    """
+    Parse the input lines into (ref, token) pairs, invalid lines are reported as they are read
+    """
+
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        if not line.startswith("{"):
+            yield number, line
+            continue
+
+        try:
+            record = json.loads(line)
+            ref, token = record.get("ref", number), record["token"]
+        except (ValueError, KeyError, AttributeError) as error:
+            report_error(f"line {number}: invalid record: {error!r}")
+            continue
+
+        if not isinstance(token, str):
+            report_error(f"line {number}: invalid record: the token is not a string")
+            continue
+
+        yield ref, token
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="zitadel-authorizer", description="zitadel authorizer tools"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    introspect = commands.add_parser(
+        "introspect", help="introspect the tokens of a jsonl stream"
+    )
+    introspect.add_argument(
+        "--input", default="-", help="jsonl file of tokens, - for stdin"
+    )
+    introspect.add_argument(
+        "--output", default="-", help="jsonl file of results, - for stdout"
+    )
+    introspect.add_argument(
+        "--workers", type=int, default=8, help="concurrent introspections"
+    )
+    introspect.add_argument("--issuer-url", default=os.environ.get("ISSUER_URL"))
+    introspect.add_argument(
+        "--introspection-endpoint", default=os.environ.get("INTROSPECTION_ENDPOINT")
+    )
+    introspect.add_argument("--key-file", help="json key file of the api application")
+    introspect.add_argument(
+        "--key-parameter",
+        default=os.environ.get("APPLICATION_KEY_ARN"),
+        help="parameter store name of the base64 encoded key, used without --key-file",
+    )
+    introspect.add_argument(
+        "--claims",
+        help="comma separated claims written for each token, all claims by default",
+    )
+
+    return parser
+
+
+def introspect(args: argparse.Namespace, stdin: IO[str], stdout: IO[str]) -> int:
+    if args.key_file:
+        application_key = ApplicationKey.from_file(args.key_file)
+    else:
+        application_key = ApplicationKey.from_aws_parameter_store(args.key_parameter)
+
+    introspector = Introspector(
+        application_key=application_key,
+        issuer_url=args.issuer_url,
+        introspection_endpoint=args.introspection_endpoint,
+        pool_maxsize=args.workers,
+    )
+
+    claims = set(args.claims.split(",")) if args.claims else None
+    failed = invalid = 0
+
+    def report_error(error: str):
+        nonlocal invalid
+        invalid += 1
+        print(error, file=sys.stderr)
+
+    source = stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for ref, result in introspector.introspect_many(
+            read_tokens(source, report_error),
+            max_workers=args.workers,
+            return_exceptions=True,
+        ):
+            if isinstance(result, Exception):
+                failed += 1
+                record = dict(ref=ref, error=repr(result))
+            else:
+                record = dict(
+                    ref=ref,
+                    **result.model_dump(include=claims, exclude_none=True, mode="json"),
+                )
+
+            target.write(json.dumps(record) + "\n")
+    finally:
+        introspector.close()
+        if source is not stdin:
+            source.close()
+        if target is not stdout:
+            target.close()
+
+    return 1 if failed or invalid else 0
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    stdin: Optional[IO[str]] = None,
+    stdout: Optional[IO[str]] = None,
+) -> int:
+    """
+    Run the command line interface, returns the exit code
+    """
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "introspect":
+        if not args.issuer_url or not args.introspection_endpoint:
+            parser.error("--issuer-url and --introspection-endpoint are required")
+        if not args.key_file and not args.key_parameter:
+            parser.error("--key-file or --key-parameter is required")
+        if args.workers <= 0:
+            parser.error("--workers must be greater than 0")
+
+        return introspect(args, stdin or sys.stdin, stdout or sys.stdout)
+
+    return 2
@@ -0,0 +1,86 @@
+"""
+Encoding of the introspected token claims as API Gateway authorizer context
+and the matching decoder used by the service middlewares.
+
+The compact encoding joins list claims (project roles, audiences, ...) into
+space separated strings, the same way the scope claim is already passed.
+This module has no dependencies so the service lambdas stay lightweight.
+"""
+
+from typing import Any, Dict, FrozenSet, Optional
+
+# claims holding lists which are joined into space separated strings in compact mode
+LIST_CLAIMS = frozenset(["project_roles", "aud", "amr"])
+
+
+def encode_authorizer_context(
+    claims: Dict[str, Any],
+    exclude_none: bool = False,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Encode the claims as authorizer context, the allowlist of claims is applied
+    by the authorizer before
+
+    exclude_none: drop claims without value
+    compact: encode list claims as space separated strings
+    """
+
+    context = {}
+    for name, value in claims.items():
+        if value is None:
+            if exclude_none:
+                continue
+        elif compact and name in LIST_CLAIMS:
+            value = " ".join(value)
+
+        context[name] = value
+
+    return context
+
+
+def decode_authorizer_context(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decode the authorizer context, compact list claims are split into lists again
+    """
+
+    if not context:
+        return {}
+
+    decoded = dict(context)
+    for name in LIST_CLAIMS:
+        value = decoded.get(name)
+        if isinstance(value, str):
+            decoded[name] = value.split()
+
+    return decoded
+
+
+class Principal:
+    """
+    The caller of a request, parsed once from the authorizer context of the event
+    """
+
+    __slots__ = ("context", "roles", "scopes")
+
+    def __init__(self, context: Optional[Dict[str, Any]]):
+        self.context = decode_authorizer_context(context)
+        self.roles: FrozenSet[str] = frozenset(self.context.get("project_roles") or ())
+        self.scopes: FrozenSet[str] = frozenset(
+            (self.context.get("scope") or "").split()
+        )
+
+    @property
+    def is_authenticated(self) -> bool:
+        return bool(self.context)
+
+    @property
+    def sub(self) -> Optional[str]:
+        return self.context.get("sub")
+
+    @property
+    def client_id(self) -> Optional[str]:
+        return self.context.get("client_id")
+
+    def __repr__(self) -> str:
+        return f"Principal(sub={self.sub!r}, client_id={self.client_id!r})"
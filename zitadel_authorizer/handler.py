@@ -0,0 +1,186 @@
+"""
+Factory for the API Gateway lambda authorizer handler.
+Everything needed to authorize a request is built once when the handler is created,
+e.g. during the init phase of the lambda container, and reused by all warm invocations.
+"""
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.data_classes import event_source
+from aws_lambda_powertools.utilities.data_classes.api_gateway_authorizer_event import (
+    APIGatewayAuthorizerEventV2,
+    APIGatewayAuthorizerResponseV2,
+)
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from typing import Callable, Optional, Union
+
+from .authorizer import Authorizer
+from .helper import get_bearer_token_from_aws_gateway_authorizer_event
+from .introspector import Introspector
+from .metrics import MetricsSink
+from .key_loader import ApplicationKeyLoader
+from .models import (
+    ApplicationKey,
+    AuthorizerSettings,
+    IntrospectionResponse,
+    IntrospectorSettings,
+)
+
+logger = Logger()
+
+
+def get_method_arn(event: APIGatewayAuthorizerEventV2) -> str:
+    """
+    Return the methodArn of a REST API or the routeArn of an HTTP API event
+    """
+
+    return event.get("methodArn") or event.get("routeArn")
+
+
+def get_route_key(event: APIGatewayAuthorizerEventV2) -> Optional[str]:
+    """
+    Return the routeKey of an HTTP API or the method and resource of a REST API event
+    """
+
+    route_key = event.get("routeKey")
+    if route_key is None and event.get("httpMethod"):
+        route_key = (
+            f"{event.get('httpMethod')} {event.get('resource') or event.get('path')}"
+        )
+
+    return route_key
+
+
+def create_authorizer_handler(
+    introspector_settings: Optional[IntrospectorSettings] = None,
+    authorizer_settings: Optional[AuthorizerSettings] = None,
+    application_key: Optional[Union[ApplicationKey, ApplicationKeyLoader]] = None,
+    introspector: Optional[Introspector] = None,
+    authorizer: Optional[Authorizer] = None,
+    application_key_ttl: Optional[float] = 15 * 60,
+    response_type: Optional[str] = None,
+    metrics: Optional[MetricsSink] = None,
+    **introspector_kwargs,
+) -> Callable[[dict, LambdaContext], dict]:
+    """
+    Create the lambda authorizer handler
+
+    Settings are loaded from the environment and the application key from the
+    parameter store unless given, the key is reloaded from the parameter store
+    once application_key_ttl seconds passed. A ready introspector (or any object
+    with an introspect_token method, e.g. the JWTValidator) and authorizer can be
+    passed instead. Additional keyword arguments are passed to the introspector.
+
+    response_type selects simple responses or iam policies, e.g. for REST APIs,
+    defaults to the RESPONSE_TYPE setting.
+
+    metrics is passed to the created introspector and authorizer and flushed
+    after every invocation, e.g. an EMFMetricsSink publishing to CloudWatch.
+    """
+
+    metrics = metrics or MetricsSink()
+
+    if introspector is None:
+        if introspector_settings is None:
+            logger.info("Loading introspection settings")
+            introspector_settings = IntrospectorSettings()
+
+        if application_key is None:
+            logger.info(
+                f"Loading application key from parameter store {introspector_settings.APPLICATION_KEY_ARN}"
+            )
+            application_key = ApplicationKeyLoader.from_aws_parameter_store(
+                parameter_name=introspector_settings.APPLICATION_KEY_ARN,
+                ttl=application_key_ttl,
+            )
+            # load and parse the key during the init phase
+            application_key.get()
+
+        logger.info("Preparing introspector")
+        introspector = Introspector(
+            application_key=application_key,
+            issuer_url=introspector_settings.ISSUER_URL,
+            introspection_endpoint=introspector_settings.INTROSPECTION_ENDPOINT,
+            metrics=metrics,
+            **introspector_kwargs,
+        )
+
+    if authorizer is None:
+        if authorizer_settings is None:
+            logger.info("Loading authorizer settings")
+            authorizer_settings = AuthorizerSettings()
+
+        authorizer = Authorizer(
+            required_client_id=authorizer_settings.CLIENT_ID,
+            required_scopes=authorizer_settings.REQUIRED_SCOPES,
+            required_roles=authorizer_settings.REQUIRED_ROLES,
+            context_claims=authorizer_settings.CONTEXT_CLAIMS,
+            context_exclude_none=authorizer_settings.CONTEXT_EXCLUDE_NONE,
+            context_compact=authorizer_settings.CONTEXT_COMPACT,
+            policy_resource_scope=authorizer_settings.POLICY_RESOURCE_SCOPE,
+            routes=authorizer_settings.ROUTES,
+            metrics=metrics,
+        )
+
+    if response_type is None:
+        response_type = (
+            authorizer_settings.RESPONSE_TYPE if authorizer_settings else "simple"
+        )
+    if response_type not in ("simple", "iam"):
+        raise ValueError(f"Invalid response type: {response_type}")
+
+    @event_source(data_class=APIGatewayAuthorizerEventV2)
+    def handler(event: APIGatewayAuthorizerEventV2, context: LambdaContext) -> dict:
+        """
+        Authorize the API Gateway request
+        """
+
+        try:
+            return authorize(event)
+        finally:
+            metrics.flush()
+
+    def authorize(event: APIGatewayAuthorizerEventV2) -> dict:
+        try:
+            bearer_token = get_bearer_token_from_aws_gateway_authorizer_event(event)
+        except ValueError as e:
+            logger.info(f"Denying request: {e}")
+            if response_type == "iam":
+                return authorizer.return_iam_policy_response(
+                    IntrospectionResponse(active=False),
+                    get_method_arn(event),
+                    route_key=get_route_key(event),
+                )
+            return APIGatewayAuthorizerResponseV2(authorize=False).asdict()
+
+        logger.info("Introspecting token")
+        introspected_token: IntrospectionResponse = introspector.introspect_token(
+            token=bearer_token
+        )
+        logger.debug(f"Introspected token: {introspected_token}")
+
+        if response_type == "iam":
+            policy = authorizer.return_iam_policy_response(
+                introspection_token=introspected_token,
+                method_arn=get_method_arn(event),
+                route_key=get_route_key(event),
+            )
+            logger.info("Returning policy")
+            logger.debug(f"Policy: {policy}")
+            return policy
+
+        response = authorizer.return_simple_authorizer_response(
+            introspection_token=introspected_token, route_key=get_route_key(event)
+        )
+
+        logger.info("Returning response")
+        logger.debug(f"Response: {response.asdict()}")
+
+        return response.asdict()
+
+    # expose the shared objects, e.g. to close or inspect them
+    handler.introspector = introspector
+    handler.authorizer = authorizer
+    handler.response_type = response_type
+    handler.metrics = metrics
+
+    return handler
@@ -7,13 +7,25 @@ def get_bearer_token_from_aws_gateway_authorizer_event(
     event: APIGatewayAuthorizerEventV2,
 ) -> str:
     """
-    Get the bearer token from the AWS proxy event
+    Get the bearer token from the AWS proxy event, the authorizationToken of REST
+    API TOKEN authorizer events or the authorization header of REQUEST events
     """
 
     if not isinstance(event, APIGatewayAuthorizerEventV2):
         event = APIGatewayAuthorizerEventV2(event)
 
-    token = event.headers.get("authorization")
+    token = event.get("authorizationToken")
+    if token is None:
+        # REST API events keep the case of the header names
+        headers = event.get("headers") or {}
+        token = next(
+            (
+                value
+                for name, value in headers.items()
+                if name.lower() == "authorization"
+            ),
+            None,
+        )
 
     if not token:
         raise ValueError("No Authorization header found")
@@ -5,10 +5,37 @@ original from: https://github.com/zitadel/examples-api-access-and-token-introspe
 
 from aws_lambda_powertools import Logger
 from authlib.oauth2.rfc7662 import IntrospectTokenValidator
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set
+from typing import Tuple, Union
+from requests.adapters import HTTPAdapter
 import requests
-import time
-import jwt
+import threading
 
+from .assertion import CLIENT_ASSERTION_TYPE, ClientAssertion
+from .cache import IntrospectionCache, SharedIntrospectionCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, is_failure
+from .key_loader import ApplicationKeyLoader
+from .metrics import (
+    ASSERTION_LATENCY,
+    CACHE_EVICTIONS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    INTROSPECTION_ERRORS,
+    INTROSPECTION_STATUS,
+    NEGATIVE_CACHE_EVICTIONS,
+    NEGATIVE_CACHE_HITS,
+    PARSE_LATENCY,
+    REFRESH_AHEAD,
+    REQUEST_LATENCY,
+    CIRCUIT_OPEN,
+    SHARED_CACHE_HITS,
+    SHARED_CACHE_MISSES,
+    STALE_CACHE_HITS,
+    MetricsSink,
+)
+from .singleflight import SingleFlight
 from .models import ApplicationKey, IntrospectionResponse
 
 logger = Logger()
@@ -21,10 +48,26 @@ class Introspector(IntrospectTokenValidator):
 
     def __init__(
         self,
-        application_key: ApplicationKey,
+        application_key: Union[ApplicationKey, ApplicationKeyLoader],
         issuer_url: str,
         introspection_endpoint: str,
         *args,
+        assertion_lifetime: int = 60 * 60,
+        assertion_refresh_margin: int = 60,
+        assertion_presign_window: int = 5 * 60,
+        session: Optional[requests.Session] = None,
+        pool_maxsize: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        cache: Optional[IntrospectionCache] = None,
+        negative_cache: Optional[IntrospectionCache] = None,
+        single_flight: bool = True,
+        trusted_fast_parse: bool = False,
+        lazy_profile_claims: bool = False,
+        metrics: Optional[MetricsSink] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        refresh_workers: int = 2,
+        shared_cache: Optional[SharedIntrospectionCache] = None,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
@@ -33,51 +76,382 @@ class Introspector(IntrospectTokenValidator):
         self.issuer_url = issuer_url
         self.introspection_endpoint = introspection_endpoint
 
+        # the signed client assertion is reused until shortly before it expires
+        self.client_assertion = ClientAssertion(
+            application_key=application_key,
+            audience=issuer_url,
+            lifetime=assertion_lifetime,
+            refresh_margin=assertion_refresh_margin,
+            presign_window=assertion_presign_window,
+        )
+
+        # the session keeps connections to the introspection endpoint alive
+        # across requests, threads and warm lambda invocations
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session or self.create_session(pool_maxsize=pool_maxsize)
+
+        # optional caches of active and inactive introspection results,
+        # inactive results should only be cached for a short time
+        self.cache = cache
+        self.negative_cache = negative_cache
+
+        # optional second level cache shared with other introspectors, asked
+        # before the introspection endpoint on misses of the local caches
+        self.shared_cache = shared_cache
+
+        # concurrent introspections of the same token share one request
+        self.single_flight = SingleFlight() if single_flight else None
+
+        # parse the raw response body in a single step, only for trusted endpoints,
+        # lazy profile claims are only decoded when read and imply the fast path
+        self.trusted_fast_parse = trusted_fast_parse
+        self.lazy_profile_claims = lazy_profile_claims
+
+        # opt-in metrics, the default sink discards them
+        self.metrics = metrics or MetricsSink()
+
+        # fail fast while the endpoint is unavailable, answering with stale
+        # cached results within the stale window of the caches
+        self.circuit_breaker = circuit_breaker
+
+        # cached results due for a refresh ahead of their expiry are introspected
+        # again by a small pool, started on the first refresh
+        self.refresh_workers = refresh_workers
+        self._refresh_lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def create_session(pool_maxsize: int = 10) -> requests.Session:
+        """
+        Create a requests session with a pooled keep-alive transport
+        """
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {
+                "Connection": "keep-alive",
+                "Content-Type": "application/x-www-form-urlencoded",
+            }
+        )
+
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the metrics and cache counters
+        """
+
+        return dict(
+            metrics=self.metrics.stats(),
+            cache=self.cache.stats() if self.cache is not None else None,
+            negative_cache=(
+                self.negative_cache.stats() if self.negative_cache is not None else None
+            ),
+            circuit_breaker=(
+                self.circuit_breaker.stats()
+                if self.circuit_breaker is not None
+                else None
+            ),
+            shared_cache=(
+                self.shared_cache.stats() if self.shared_cache is not None else None
+            ),
+        )
+
+    def close(self):
+        """
+        Close the pooled connections of the session and the shared cache and stop the refresh pool
+        """
+
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+            self._refresh_executor = None
+
+        if self.shared_cache is not None:
+            self.shared_cache.close()
+
+        self.session.close()
+
+    def refresh_in_background(self, token: str):
+        """
+        Introspect the token again in the refresh pool, refreshes of the same token are deduplicated
+        """
+
+        with self._refresh_lock:
+            if token in self._refreshing:
+                return
+            self._refreshing.add(token)
+
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix="introspection-refresh",
+                )
+
+            self.metrics.increment(REFRESH_AHEAD)
+            self._refresh_executor.submit(self._refresh, token)
+
+    def _refresh(self, token: str):
+        try:
+            if self.single_flight is not None:
+                self.single_flight.do(token, self._introspect_and_cache, token)
+            else:
+                self._introspect_and_cache(token)
+        except Exception:
+            # the cached result stays valid until it expires
+            logger.exception("Refreshing the introspection result failed")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(token)
+
     def introspect_token(
         self,
         token: str,
-    ):
+    ) -> IntrospectionResponse:
         """
-        introspect the token using the introspection endpoint
+        introspect the token, cached results are returned without calling the introspection endpoint
         """
 
-        payload = dict(
-            iss=self.application_key.clientId,
-            sub=self.application_key.clientId,
-            aud=self.issuer_url,
-            exp=int(time.time()) + 60 * 60,  # Expires in 1 hour
-            iat=int(time.time()),
-        )
+        for cache, hits in (
+            (self.cache, CACHE_HITS),
+            (self.negative_cache, NEGATIVE_CACHE_HITS),
+        ):
+            if cache is not None:
+                cached, refresh = cache.lookup(token)
+                if cached is not None:
+                    self.metrics.increment(hits)
+                    if refresh:
+                        self.refresh_in_background(token)
+                    return cached
+
+        if self.cache is not None or self.negative_cache is not None:
+            self.metrics.increment(CACHE_MISSES)
+
+        if self.single_flight is not None:
+            return self.single_flight.do(token, self._load, token)
+
+        return self._load(token)
+
+    def _load(self, token: str) -> IntrospectionResponse:
+        """
+        return the result of the shared cache or introspect the token
+        """
+
+        if self.shared_cache is not None:
+            shared = self.shared_cache.get(token)
+            if shared is not None:
+                self.metrics.increment(SHARED_CACHE_HITS)
+                self._cache_locally(token, shared)
+                return shared
+
+            self.metrics.increment(SHARED_CACHE_MISSES)
 
-        headers = dict(
-            alg="RS256",
-            kid=self.application_key.keyId,
+        return self._introspect_and_cache(token)
+
+    def introspect_many(
+        self,
+        tokens: Iterable[Union[str, Tuple[Hashable, str]]],
+        max_workers: int = 8,
+        return_exceptions: bool = False,
+        dedupe_size: int = 10_000,
+    ) -> Iterator[Tuple[Hashable, Union[IntrospectionResponse, Exception]]]:
+        """
+        introspect many tokens concurrently, yields (token_ref, response) as the introspections complete
+
+        tokens: tokens or (token_ref, token) pairs, e.g. to refer to a token by
+            its record id instead of the token itself, a token is its own ref otherwise
+        max_workers: threads introspecting the tokens, at most twice as many
+            refs, including repeats of tokens in flight, are read ahead of the
+            completed ones, so the tokens are streamed
+        return_exceptions: yield (token_ref, exception) for failed introspections
+            instead of raising the first error
+        dedupe_size: results of recently introspected tokens reused for repeated tokens
+        """
+
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        items = iter(tokens)
+        # token -> refs waiting for the introspection of the token
+        waiting: Dict[str, List[Hashable]] = {}
+        # refs in waiting, every pending token has at least one
+        buffered = 0
+        pending: Dict[Future, str] = {}
+        recent: OrderedDict[str, Union[IntrospectionResponse, Exception]] = (
+            OrderedDict()
         )
 
-        jwt_token = jwt.encode(
-            payload,
-            self.application_key.key,
-            algorithm="RS256",
-            headers=headers,
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="introspect-many"
         )
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and buffered < 2 * max_workers:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    ref, token = item if isinstance(item, tuple) else (item, item)
+
+                    if token in waiting:
+                        waiting[token].append(ref)
+                        buffered += 1
+                    elif token in recent:
+                        recent.move_to_end(token)
+                        yield ref, recent[token]
+                    else:
+                        waiting[token] = [ref]
+                        buffered += 1
+                        pending[executor.submit(self.introspect_token, token)] = token
+
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    token = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        if not return_exceptions:
+                            raise
+                        result = error
+
+                    if dedupe_size > 0:
+                        recent[token] = result
+                        if len(recent) > dedupe_size:
+                            recent.popitem(last=False)
+
+                    refs = waiting.pop(token)
+                    buffered -= len(refs)
+                    for ref in refs:
+                        yield ref, result
+        finally:
+            # e.g. the caller stopped consuming the results
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _introspect_and_cache(self, token: str) -> IntrospectionResponse:
+        """
+        introspect the token and store the result in the matching cache
+        """
+
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            self.metrics.increment(CIRCUIT_OPEN)
+            stale = self.get_stale(token)
+            if stale is None:
+                raise CircuitOpenError(
+                    "The circuit of the introspection endpoint is open"
+                )
+            return stale
+
+        try:
+            introspection_response = self.request_introspection(token)
+        except Exception as error:
+            if breaker is not None:
+                breaker.record_error(error)
+
+            # answer with the last known result if the endpoint is unavailable
+            stale = self.get_stale(token) if is_failure(error) else None
+            if stale is None:
+                raise
+
+            logger.warning(f"Introspection failed, serving stale result: {error}")
+            return stale
+
+        if breaker is not None:
+            breaker.record_success()
+
+        self._cache_locally(token, introspection_response)
+
+        if self.shared_cache is not None:
+            self.shared_cache.set(token, introspection_response)
+
+        return introspection_response
+
+    def _cache_locally(self, token: str, introspection_response: IntrospectionResponse):
+        """
+        store the result in the matching local cache
+        """
+
+        if introspection_response.active:
+            cache, evictions = self.cache, CACHE_EVICTIONS
+            outdated = self.negative_cache
+        else:
+            cache, evictions = self.negative_cache, NEGATIVE_CACHE_EVICTIONS
+            outdated = self.cache
+
+        # e.g. a refreshed token which got revoked in the meantime
+        if outdated is not None:
+            outdated.delete(token)
+
+        if cache is not None:
+            evicted = cache.set(token, introspection_response)
+            if evicted:
+                self.metrics.increment(evictions, evicted)
+
+    def get_stale(self, token: str) -> Optional[IntrospectionResponse]:
+        """
+        Return the last known result of the token within the stale window of the caches
+        """
+
+        for cache in (self.cache, self.negative_cache):
+            if cache is not None:
+                stale = cache.get_stale(token)
+                if stale is not None:
+                    self.metrics.increment(STALE_CACHE_HITS)
+                    return stale
+
+        return None
+
+    def request_introspection(
+        self,
+        token: str,
+    ) -> IntrospectionResponse:
+        """
+        introspect the token using the introspection endpoint
+        """
+
+        metrics = self.metrics
+
+        with metrics.timer(ASSERTION_LATENCY):
+            client_assertion = self.client_assertion.get()
 
         data = dict(
-            client_assertion_type="urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
-            client_assertion=jwt_token,
+            client_assertion_type=CLIENT_ASSERTION_TYPE,
+            client_assertion=client_assertion,
             token=token,
         )
 
         # log the introspection request
         logger.debug(f"Introspection endpoint: {self.introspection_endpoint}")
         logger.debug(f"Introspection data: {data}")
-        logger.debug(f"Introspection headers: {headers}")
-        logger.debug(f"Introspection payload: {payload}")
 
-        response = requests.post(
-            url=self.introspection_endpoint,
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-            data=data,
-        )
+        try:
+            with metrics.timer(REQUEST_LATENCY):
+                response = self.session.post(
+                    url=self.introspection_endpoint,
+                    data=data,
+                    timeout=self.timeout,
+                )
+        except requests.RequestException:
+            metrics.increment(INTROSPECTION_ERRORS)
+            raise
+
+        metrics.increment(f"{INTROSPECTION_STATUS}{response.status_code}")
         response.raise_for_status()
 
-        return IntrospectionResponse(**response.json())
+        with metrics.timer(PARSE_LATENCY):
+            if self.trusted_fast_parse or self.lazy_profile_claims:
+                return IntrospectionResponse.from_json(
+                    response.content, lazy_profile=self.lazy_profile_claims
+                )
+
+            return IntrospectionResponse(**response.json())
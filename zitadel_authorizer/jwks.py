@@ -0,0 +1,200 @@
+"""
+Local validation of JWT access tokens against the signing keys (JWKS) of the issuer.
+Zitadel issues JWT access tokens for applications configured with the JWT token type,
+these can be verified without a round trip to the introspection endpoint.
+Opaque tokens are passed on to the introspector.
+
+Locally validated tokens are not checked for revocation, a revoked JWT stays valid until it expires!
+"""
+
+from aws_lambda_powertools import Logger
+from typing import Dict, List, Optional
+from jwt import PyJWK, PyJWKSet
+import threading
+import requests
+import time
+import jwt
+
+from .introspector import Introspector
+from .models import IntrospectionResponse
+
+logger = Logger()
+
+
+class JWKSCache:
+    """
+    Signing keys of the issuer indexed by key id (kid)
+    """
+
+    def __init__(
+        self,
+        jwks_uri: str,
+        session: Optional[requests.Session] = None,
+        max_age: float = 60 * 60,
+        min_refresh_interval: float = 60,
+        timeout: float = 5,
+    ):
+        """
+        Initialize the jwks cache
+
+        max_age: seconds after which the keys are fetched again
+        min_refresh_interval: minimum seconds between two fetches, unknown key ids
+            only trigger a refresh once this interval has passed
+        """
+
+        self.jwks_uri = jwks_uri
+        self.session = session or requests.Session()
+        self.max_age = max_age
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._keys: Dict[str, PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+
+    @property
+    def kids(self) -> List[str]:
+        """
+        Key ids of the cached keys
+        """
+
+        return list(self._keys)
+
+    def refresh(self):
+        """
+        Fetch the keys of the issuer and replace the key index
+        """
+
+        logger.debug(f"Fetching jwks from {self.jwks_uri}")
+
+        # the fetch timestamp is set before the request so failing fetches are rate limited as well
+        self._fetched_at = time.time()
+
+        response = self.session.get(self.jwks_uri, timeout=self.timeout)
+        response.raise_for_status()
+
+        key_set = PyJWKSet.from_dict(response.json())
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+
+    def get_key(self, kid: str) -> Optional[PyJWK]:
+        """
+        Return the key for the key id, refreshes the keys if they are outdated
+        or the key id is unknown and the last refresh is long enough ago
+        """
+
+        now = time.time()
+        key = self._keys.get(kid)
+
+        if key is not None and now - self._fetched_at < self.max_age:
+            return key
+
+        with self._lock:
+            # another thread may have refreshed the keys while we were waiting
+            key = self._keys.get(kid)
+            if key is not None and now - self._fetched_at < self.max_age:
+                return key
+
+            if (
+                self._fetched_at is None
+                or now - self._fetched_at >= self.min_refresh_interval
+            ):
+                try:
+                    self.refresh()
+                except Exception:
+                    # keep using the known keys if the issuer is not reachable
+                    logger.exception("Fetching the jwks failed")
+
+            return self._keys.get(kid)
+
+
+class JWTValidator:
+    """
+    Validates JWT access tokens locally and introspects opaque tokens
+    """
+
+    def __init__(
+        self,
+        issuer_url: str,
+        audience: str,
+        introspector: Optional[Introspector] = None,
+        jwks: Optional[JWKSCache] = None,
+        algorithms: List[str] = ["RS256"],
+        leeway: float = 0,
+    ):
+        """
+        Initialize the validator
+
+        audience: required audience of the JWT, e.g. the zitadel project id,
+            JWTs without the audience are inactive
+        introspector: used for tokens which are not JWTs, if not given opaque tokens are inactive
+        jwks: signing keys of the issuer, defaults to the zitadel jwks endpoint of the issuer
+        """
+
+        if not audience:
+            raise ValueError("audience is required to validate JWTs")
+
+        self.issuer_url = issuer_url
+        self.introspector = introspector
+        self.jwks = jwks or JWKSCache(jwks_uri=f"{issuer_url}/oauth/v2/keys")
+        self.audience = audience
+        self.algorithms = algorithms
+        self.leeway = leeway
+
+    @staticmethod
+    def get_jwt_header(token: str) -> Optional[Dict]:
+        """
+        Return the header of a JWT shaped token or None for opaque tokens
+        """
+
+        if token.count(".") != 2:
+            return None
+
+        try:
+            return jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            return None
+
+    def validate_jwt(self, token: str, header: Dict) -> IntrospectionResponse:
+        """
+        Verify the signature and claims of the JWT against the keys of the issuer
+        """
+
+        key = self.jwks.get_key(header.get("kid"))
+        if key is None:
+            logger.debug(f"No signing key found for kid {header.get('kid')}")
+            return IntrospectionResponse(active=False)
+
+        try:
+            claims = jwt.decode(
+                token,
+                key=key.key,
+                algorithms=self.algorithms,
+                issuer=self.issuer_url,
+                audience=self.audience,
+                leeway=self.leeway,
+                options=dict(require=["exp", "iss", "aud"]),
+            )
+        except jwt.InvalidTokenError as e:
+            logger.debug(f"JWT validation failed: {e}")
+            return IntrospectionResponse(active=False)
+
+        claims["active"] = True
+        if isinstance(claims.get("aud"), str):
+            claims["aud"] = [claims["aud"]]
+
+        return IntrospectionResponse(**claims)
+
+    def introspect_token(self, token: str) -> IntrospectionResponse:
+        """
+        Validate JWTs locally and introspect opaque tokens using the introspector
+        """
+
+        header = self.get_jwt_header(token)
+        if header is not None:
+            return self.validate_jwt(token, header)
+
+        if self.introspector is None:
+            logger.debug("Opaque token received but no introspector configured")
+            return IntrospectionResponse(active=False)
+
+        return self.introspector.introspect_token(token)
@@ -0,0 +1,125 @@
+"""
+Cached loading of the application key used to sign the client assertion.
+The key is loaded and its private key deserialized once, then reused until the
+configured ttl passes or it is refreshed explicitly, e.g. after a key rotation.
+"""
+
+from aws_lambda_powertools import Logger
+from typing import Callable, Optional
+import threading
+import time
+
+from .models import ApplicationKey
+
+logger = Logger()
+
+
+class ApplicationKeyLoader:
+    """
+    Loads the application key from its source and caches it together with the parsed private key
+    """
+
+    def __init__(self, load: Callable[[], ApplicationKey], ttl: Optional[float] = None):
+        """
+        Initialize the loader
+
+        load: callable returning the application key from its source
+        ttl: seconds after which the key is loaded again, None caches the key forever
+        """
+
+        self.load = load
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._application_key: Optional[ApplicationKey] = None
+        self._loaded_at: float = 0
+
+    @staticmethod
+    def from_base64_string(base64_string: str, ttl: Optional[float] = None):
+        """
+        Create a loader for a base64 encoded key
+        """
+
+        return ApplicationKeyLoader(
+            load=lambda: ApplicationKey.from_base64_string(base64_string), ttl=ttl
+        )
+
+    @staticmethod
+    def from_file(path: str, ttl: Optional[float] = None):
+        """
+        Create a loader for a json key file
+        """
+
+        return ApplicationKeyLoader(
+            load=lambda: ApplicationKey.from_file(path), ttl=ttl
+        )
+
+    @staticmethod
+    def from_aws_parameter_store(
+        parameter_name: str, secure_string: bool = True, ttl: Optional[float] = 15 * 60
+    ):
+        """
+        Create a loader for a base64 encoded key inside the AWS Parameter Store
+        """
+
+        return ApplicationKeyLoader(
+            load=lambda: ApplicationKey.from_aws_parameter_store(
+                parameter_name, secure_string=secure_string
+            ),
+            ttl=ttl,
+        )
+
+    def _is_expired(self) -> bool:
+        return self.ttl is not None and time.time() - self._loaded_at >= self.ttl
+
+    def get(self) -> ApplicationKey:
+        """
+        Return the cached application key, loads the key if it is not loaded yet or expired
+        """
+
+        application_key = self._application_key
+        if application_key is not None and not self._is_expired():
+            return application_key
+
+        with self._lock:
+            # another thread may have loaded the key while we were waiting
+            if self._application_key is not None and not self._is_expired():
+                return self._application_key
+
+            try:
+                return self._refresh()
+            except Exception:
+                if self._application_key is None:
+                    raise
+
+                # keep using the current key if the source is not available
+                logger.exception("Reloading the application key failed")
+                self._loaded_at = time.time()
+                return self._application_key
+
+    def refresh(self) -> ApplicationKey:
+        """
+        Load the application key from its source, replacing the cached key
+        """
+
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> ApplicationKey:
+        logger.debug("Loading application key")
+        application_key = self.load()
+
+        if (
+            self._application_key is not None
+            and application_key.model_dump() == self._application_key.model_dump()
+        ):
+            # an unchanged key keeps its parsed private key and signed assertions
+            application_key = self._application_key
+        else:
+            # deserialize the private key once while loading
+            application_key.private_key
+
+        self._application_key = application_key
+        self._loaded_at = time.time()
+
+        return application_key
@@ -0,0 +1,187 @@
+"""
+Opt-in metrics of the introspector and the authorizer: latency per phase of an
+introspection, response status codes, cache efficiency and authorization decisions.
+
+The default sink discards all metrics. The in-memory sink aggregates them for
+tests and the stats() snapshot, the EMF sink additionally publishes them to
+CloudWatch in the embedded metric format using the powertools metrics utility.
+"""
+
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import threading
+import time
+
+# latency of the phases of an introspection in milliseconds
+ASSERTION_LATENCY = "AssertionLatency"
+REQUEST_LATENCY = "IntrospectionRequestLatency"
+PARSE_LATENCY = "IntrospectionParseLatency"
+
+# introspection requests by status code, e.g. IntrospectionStatus200,
+# and requests failing without a response
+INTROSPECTION_STATUS = "IntrospectionStatus"
+INTROSPECTION_ERRORS = "IntrospectionErrors"
+
+CACHE_HITS = "CacheHits"
+CACHE_MISSES = "CacheMisses"
+CACHE_EVICTIONS = "CacheEvictions"
+NEGATIVE_CACHE_HITS = "NegativeCacheHits"
+NEGATIVE_CACHE_EVICTIONS = "NegativeCacheEvictions"
+STALE_CACHE_HITS = "StaleCacheHits"
+REFRESH_AHEAD = "CacheRefreshAhead"
+SHARED_CACHE_HITS = "SharedCacheHits"
+SHARED_CACHE_MISSES = "SharedCacheMisses"
+
+# introspections rejected without a request while the circuit is open
+CIRCUIT_OPEN = "CircuitOpen"
+
+AUTHORIZATION_ALLOWED = "AuthorizationAllowed"
+AUTHORIZATION_DENIED = "AuthorizationDenied"
+
+
+class MetricsSink:
+    """
+    Receives the metrics, the base sink discards them
+    """
+
+    def increment(self, name: str, value: int = 1):
+        """
+        Add the value to the counter
+        """
+
+    def add_timing(self, name: str, milliseconds: float):
+        """
+        Record a latency in milliseconds
+        """
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Record the latency of the block
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, (time.perf_counter() - start) * 1000)
+
+    def flush(self):
+        """
+        Publish the recorded metrics, called after every lambda invocation
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the aggregated metrics
+        """
+
+        return {}
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    Aggregates the counters and latencies in memory, the latencies are kept as
+    running count, total, min and max so the memory does not grow with the requests
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_timing(self, name: str, milliseconds: float):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = dict(
+                    count=1,
+                    total_ms=milliseconds,
+                    min_ms=milliseconds,
+                    max_ms=milliseconds,
+                )
+                return
+
+            timing["count"] += 1
+            timing["total_ms"] += milliseconds
+            timing["min_ms"] = min(timing["min_ms"], milliseconds)
+            timing["max_ms"] = max(timing["max_ms"], milliseconds)
+
+    def reset(self):
+        """
+        Remove all recorded metrics
+        """
+
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters and count, total, min, max and mean of each latency
+        """
+
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {
+                name: dict(timing, mean_ms=timing["total_ms"] / timing["count"])
+                for name, timing in self.timings.items()
+            }
+
+        return dict(counters=counters, timings=timings)
+
+
+class EMFMetricsSink(InMemoryMetricsSink):
+    """
+    Publishes the metrics in the CloudWatch embedded metric format
+    """
+
+    def __init__(
+        self,
+        namespace: Optional[str] = None,
+        service: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        Initialize the sink
+
+        namespace and service default to the powertools environment variables
+        POWERTOOLS_METRICS_NAMESPACE and POWERTOOLS_SERVICE_NAME
+        metrics: existing powertools metrics instance to publish with
+        """
+
+        super().__init__()
+        self.metrics = metrics or Metrics(namespace=namespace, service=service)
+        self._pending = False
+
+    def increment(self, name: str, value: int = 1):
+        super().increment(name, value)
+        with self._lock:
+            self.metrics.add_metric(name=name, unit=MetricUnit.Count, value=value)
+            self._pending = True
+
+    def add_timing(self, name: str, milliseconds: float):
+        super().add_timing(name, milliseconds)
+        with self._lock:
+            self.metrics.add_metric(
+                name=name, unit=MetricUnit.Milliseconds, value=milliseconds
+            )
+            self._pending = True
+
+    def flush(self):
+        """
+        Print the metrics recorded since the last flush as EMF log line
+        """
+
+        with self._lock:
+            if not self._pending:
+                return
+
+            self.metrics.flush_metrics()
+            self._pending = False
@@ -18,8 +18,41 @@ from aws_lambda_powertools.event_handler import APIGatewayHttpResolver, Response
 from typing import List
 from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
 
+from .context import Principal, decode_authorizer_context
+
 logger = Logger()
 
+# key of the parsed principal in the resolver context, e.g. app.context["principal"]
+PRINCIPAL_CONTEXT_KEY = "principal"
+
+# key of the event the principal was parsed from
+PRINCIPAL_EVENT_CONTEXT_KEY = "principal_event"
+
+
+def get_principal(app: APIGatewayHttpResolver) -> Principal:
+    """
+    Return the principal of the current request, parsed on first access
+
+    The principal is stored in the resolver context together with the event it
+    was parsed from. The resolver does not clear the context if a route raises,
+    so a principal of another event is never returned.
+    """
+
+    event = app.current_event
+    context = getattr(app, "context", None)
+    if context is not None:
+        principal = context.get(PRINCIPAL_CONTEXT_KEY)
+        if principal is not None and context.get(PRINCIPAL_EVENT_CONTEXT_KEY) is event:
+            return principal
+
+    principal = Principal(event.request_context.authorizer.get_context())
+
+    if context is not None:
+        context[PRINCIPAL_CONTEXT_KEY] = principal
+        context[PRINCIPAL_EVENT_CONTEXT_KEY] = event
+
+    return principal
+
 
 class IsAuthenticatedMiddleware(BaseMiddlewareHandler):
     """
@@ -36,7 +69,7 @@ class IsAuthenticatedMiddleware(BaseMiddlewareHandler):
         logger.debug("Checking if user is authenticated")
 
         # Check if the user is authenticated
-        if not app.current_event.request_context.authorizer.get_context():
+        if not get_principal(app).is_authenticated:
             logger.debug("User is not authenticated")
             return Response(
                 status_code=401,
@@ -59,14 +92,19 @@ class ProjectRoleAuthorizationMiddleware(BaseMiddlewareHandler):
         super().__init__()
         self.roles = roles
 
+        # compiled once, each request is a single set operation
+        self._roles = frozenset(roles)
+
     def get_roles_from_context(self, event: APIGatewayProxyEventV2) -> List[str]:
         """
         Get the roles from the current event
         """
 
-        authorizer_context = event.request_context.authorizer.get_context()
+        authorizer_context = decode_authorizer_context(
+            event.request_context.authorizer.get_context()
+        )
 
-        return authorizer_context.get("project_roles", [])
+        return authorizer_context.get("project_roles") or []
 
     def handler(
         self, app: APIGatewayHttpResolver, next_middleware: NextMiddleware
@@ -77,7 +115,7 @@ class ProjectRoleAuthorizationMiddleware(BaseMiddlewareHandler):
 
         logger.debug("Checking if user has the required roles")
 
-        context_roles = self.get_roles_from_context(app.current_event)
+        context_roles = get_principal(app).roles
 
         if not context_roles:
             logger.debug("No roles found in authorizer context")
@@ -87,7 +125,7 @@ class ProjectRoleAuthorizationMiddleware(BaseMiddlewareHandler):
             )
 
         # Check if the user has the required roles
-        if not any(role in self.roles for role in context_roles):
+        if self._roles.isdisjoint(context_roles):
             logger.debug("User does not have the required roles")
             return Response(
                 status_code=403,
@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from functools import cached_property
 import base64
 import json
-from aws_lambda_powertools.utilities import parameters
-from typing import List, Optional, Dict
+import threading
+from typing import FrozenSet, Iterable, List, Literal, Optional, Dict, Union
 from typing_extensions import Annotated
 from pydantic.functional_validators import BeforeValidator
 from pydantic_settings import BaseSettings
@@ -18,6 +21,16 @@ class IntrospectorSettings(BaseSettings):
     APPLICATION_KEY_ARN: str
 
 
+class RouteRequirements(BaseModel):
+    """
+    Requirements a token has to meet to access a route
+    """
+
+    required_client_id: Optional[str] = None
+    required_scopes: List[str] = []
+    required_roles: List[str] = []
+
+
 class AuthorizerSettings(BaseSettings):
     """
     Settings for the Authorizer.
@@ -26,6 +39,12 @@ class AuthorizerSettings(BaseSettings):
     CLIENT_ID: Optional[str] = None
     REQUIRED_SCOPES: List[str] = []
     REQUIRED_ROLES: List[str] = []
+    CONTEXT_CLAIMS: Optional[List[str]] = None
+    CONTEXT_EXCLUDE_NONE: bool = False
+    CONTEXT_COMPACT: bool = False
+    RESPONSE_TYPE: Literal["simple", "iam"] = "simple"
+    POLICY_RESOURCE_SCOPE: Literal["route", "stage", "api"] = "route"
+    ROUTES: Optional[Dict[str, RouteRequirements]] = None
 
 
 class ApplicationKey(BaseModel):
@@ -39,6 +58,14 @@ class ApplicationKey(BaseModel):
     appId: str
     clientId: str
 
+    @cached_property
+    def private_key(self) -> RSAPrivateKey:
+        """
+        The deserialized private key, parsed once and reused for every signing
+        """
+
+        return load_pem_private_key(self.key.encode("utf-8"), password=None)
+
     @staticmethod
     def from_base64_string(base64_string: str):
         """
@@ -56,9 +83,21 @@ class ApplicationKey(BaseModel):
         We only support a base64 encoded string inside the parameter store!
         """
 
+        # boto3 is only imported by the lambdas loading the key
+        from aws_lambda_powertools.utilities import parameters
+
         key_data = parameters.get_parameter(parameter_name, decrypt=secure_string)
         return ApplicationKey.from_base64_string(key_data)
 
+    @staticmethod
+    def from_file(path: str):
+        """
+        Create an ApplicationKey object from the json key file downloaded from zitadel
+        """
+
+        with open(path, "r", encoding="utf-8") as key_file:
+            return ApplicationKey(**json.load(key_file))
+
 
 # zitadel passes the project roles in the format:
 # "urn:zitadel:iam:org:project:roles": {
@@ -67,13 +106,39 @@ class ApplicationKey(BaseModel):
 #     'ROLEB': {'PROJECT_ID': 'ZITADEL_DOMAIN'}
 # }
 # we are only interested in the role keys!
-def convert_project_roles_to_list(v: Dict[str, Dict[str, str]]) -> List[str]:
-    return v.keys()
+# already converted lists, e.g. of a dumped response, are passed through
+def convert_project_roles_to_list(
+    v: Union[Dict[str, Dict[str, str]], List[str]],
+) -> List[str]:
+    if isinstance(v, dict):
+        return v.keys()
+
+    return v
 
 
 PROJECT_ROLES = Annotated[List[str], BeforeValidator(convert_project_roles_to_list)]
 
 
+class AuthorizationClaims(BaseModel):
+    """
+    The claims of the introspection response needed for the authorization decision
+    """
+
+    active: bool
+
+    scope: Optional[str] = None
+    client_id: Optional[str] = None
+    exp: Optional[int] = None
+
+    project_roles: Optional[PROJECT_ROLES] = Field(
+        alias="urn:zitadel:iam:org:project:roles", default=None
+    )
+
+
+# guards the decoding of lazily parsed profile claims, see decode_profile_claims
+_DECODE_LOCK = threading.Lock()
+
+
 class IntrospectionResponse(BaseModel):
     """
     Introspection response class to handle the response from the introspection endpoint
@@ -110,7 +175,122 @@ class IntrospectionResponse(BaseModel):
         alias="urn:zitadel:iam:org:project:roles", default=None
     )
 
-    def has_scopes(self, scopes: List[str]) -> bool:
+    # raw response whose profile claims are not decoded yet, see from_json
+    _pending_claims: Optional[Union[str, bytes]] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_json(
+        cls, data: Union[str, bytes], lazy_profile: bool = False
+    ) -> "IntrospectionResponse":
+        """
+        Parse and validate the raw json response of the introspection endpoint in a single step,
+        without building an intermediate python dict first
+
+        lazy_profile: only decode the authorization claims, the profile claims
+            (name, email, ...) are decoded once one of them is read
+        """
+
+        if not lazy_profile:
+            return cls.model_validate_json(data)
+
+        claims = AuthorizationClaims.model_validate_json(data)
+
+        # the profile claims are left out of the instance until they are decoded
+        response = cls.__new__(cls)
+        object.__setattr__(response, "__dict__", dict(claims.__dict__))
+        object.__setattr__(
+            response, "__pydantic_fields_set__", set(claims.model_fields_set)
+        )
+        object.__setattr__(response, "__pydantic_extra__", None)
+        object.__setattr__(response, "__pydantic_private__", {"_pending_claims": data})
+
+        return response
+
+    def decode_profile_claims(self) -> bool:
+        """
+        Decode the pending profile claims of a lazily parsed response,
+        returns False if there was nothing left to decode
+        """
+
+        private = self.__pydantic_private__
+        if not private or private.get("_pending_claims") is None:
+            return False
+
+        # cached responses are shared between threads, only one of them decodes
+        with _DECODE_LOCK:
+            pending = private.get("_pending_claims")
+            if pending is None:
+                return False
+
+            decoded = type(self).model_validate_json(pending)
+
+            # keep the field order of eagerly parsed responses, e.g. for model_dump_json,
+            # the merged claims replace the live __dict__ in one step so concurrent
+            # readers always see all authorization claims
+            values = {
+                name: self.__dict__.get(name, decoded.__dict__[name])
+                for name in type(self).model_fields
+            }
+            values.update(self.__dict__)
+            object.__setattr__(self, "__dict__", values)
+            object.__setattr__(
+                self,
+                "__pydantic_fields_set__",
+                self.__pydantic_fields_set__ | decoded.model_fields_set,
+            )
+            private["_pending_claims"] = None
+
+        return True
+
+    def __getattr__(self, name: str):
+        if name in PROFILE_CLAIMS:
+            # another thread may have decoded the claims since the lookup missed
+            self.decode_profile_claims()
+            if name in self.__dict__:
+                return self.__dict__[name]
+
+        return super().__getattr__(name)
+
+    def __eq__(self, other) -> bool:
+        self.decode_profile_claims()
+        if isinstance(other, IntrospectionResponse):
+            other.decode_profile_claims()
+
+        return super().__eq__(other)
+
+    def __getstate__(self):
+        self.decode_profile_claims()
+        return super().__getstate__()
+
+    def model_dump(self, *args, **kwargs):
+        self.decode_profile_claims()
+        return super().model_dump(*args, **kwargs)
+
+    def model_dump_json(self, *args, **kwargs):
+        self.decode_profile_claims()
+        return super().model_dump_json(*args, **kwargs)
+
+    def model_copy(self, *args, **kwargs):
+        self.decode_profile_claims()
+        return super().model_copy(*args, **kwargs)
+
+    @cached_property
+    def scope_set(self) -> FrozenSet[str]:
+        """
+        The scopes of the token as set, split once on first access
+        """
+
+        return frozenset(self.scope.split()) if self.scope else frozenset()
+
+    @cached_property
+    def role_set(self) -> FrozenSet[str]:
+        """
+        The project roles of the token as set, built once on first access
+        """
+
+        return frozenset(self.project_roles) if self.project_roles else frozenset()
+
+    def has_scopes(self, scopes: Iterable[str]) -> bool:
         """
         Check if the token has the required scopes
         """
@@ -118,10 +298,9 @@ class IntrospectionResponse(BaseModel):
         if not self.scope:
             return False
 
-        token_scopes = self.scope.split(" ")
-        return all(scope in token_scopes for scope in scopes)
+        return self.scope_set.issuperset(scopes)
 
-    def has_roles(self, roles: List[str]) -> bool:
+    def has_roles(self, roles: Iterable[str]) -> bool:
         """
         Check if the token has the required roles
         """
@@ -129,4 +308,10 @@ class IntrospectionResponse(BaseModel):
         if not self.project_roles:
             return False
 
-        return all(role in self.project_roles for role in roles)
+        return self.role_set.issuperset(roles)
+
+
+# claims which are only decoded on access for lazily parsed responses
+PROFILE_CLAIMS = frozenset(IntrospectionResponse.model_fields) - frozenset(
+    AuthorizationClaims.model_fields
+)
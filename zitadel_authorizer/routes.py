@@ -0,0 +1,287 @@
+"""
+Route table mapping API Gateway routes to the requirements of the route.
+
+Routes are given as route keys, e.g. "GET /pets", "ANY /pets/{id}",
+"GET /files/{proxy+}" or "$default". The table is compiled once into an index:
+route keys and routes without path parameters are resolved with a dict lookup,
+all other routes by walking a trie of the path segments. The scopes and roles
+of all routes are numbered and the requirements of each route are stored as
+bitmasks, so a token is checked against a route with two mask comparisons.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .models import IntrospectionResponse, RouteRequirements
+
+ANY_METHOD = "ANY"
+DEFAULT_ROUTE = "$default"
+
+
+def split_path(path: str) -> List[str]:
+    """
+    Split the path into its segments, empty segments are dropped
+    """
+
+    return [segment for segment in path.split("/") if segment]
+
+
+def normalize_route_key(method: str, path: str) -> str:
+    """
+    Return the route key of the method and path, e.g. "GET /pets/42"
+    """
+
+    return f"{method.upper()} /{'/'.join(split_path(path))}"
+
+
+class Route:
+    """
+    A compiled route with its requirements encoded as bitmasks
+    """
+
+    __slots__ = (
+        "route_key",
+        "method",
+        "path",
+        "requirements",
+        "required_client_id",
+        "scope_mask",
+        "role_mask",
+    )
+
+    def __init__(
+        self,
+        route_key: str,
+        method: str,
+        path: Optional[str],
+        requirements: RouteRequirements,
+        scope_mask: int,
+        role_mask: int,
+    ):
+        self.route_key = route_key
+        self.method = method
+        self.path = path
+        self.requirements = requirements
+        self.required_client_id = requirements.required_client_id
+        self.scope_mask = scope_mask
+        self.role_mask = role_mask
+
+    def is_authorized(
+        self, client_id: Optional[str], scope_mask: int, role_mask: int
+    ) -> bool:
+        """
+        Check the masks of a token against the requirements of the route
+        """
+
+        if self.required_client_id and client_id != self.required_client_id:
+            return False
+
+        return (
+            scope_mask & self.scope_mask == self.scope_mask
+            and role_mask & self.role_mask == self.role_mask
+        )
+
+    def __repr__(self) -> str:
+        return f"Route({self.route_key!r})"
+
+
+class _Node:
+    """
+    Node of the path segment trie
+    """
+
+    __slots__ = ("static", "parameter", "greedy", "routes")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        # {name} matches a single segment, {name+} all remaining segments
+        self.parameter: Optional["_Node"] = None
+        self.greedy: Optional["_Node"] = None
+        self.routes: Dict[str, Route] = {}
+
+
+class RouteTable:
+    """
+    Compiled index resolving requests to their route and requirements
+    """
+
+    def __init__(self, routes: Mapping[str, Union[RouteRequirements, Mapping, None]]):
+        """
+        Compile the route table
+
+        routes: requirements by route key, e.g. {"GET /pets/{id}": {"required_roles": ["USER"]}}
+        """
+
+        self._scope_bits: Dict[str, int] = {}
+        self._role_bits: Dict[str, int] = {}
+
+        self.routes: List[Route] = []
+        self.default: Optional[Route] = None
+        self._exact: Dict[str, Route] = {}
+        self._trie = _Node()
+
+        for route_key, requirements in routes.items():
+            if requirements is None:
+                requirements = RouteRequirements()
+            elif not isinstance(requirements, RouteRequirements):
+                requirements = RouteRequirements(**requirements)
+
+            self._add(route_key, requirements)
+
+    @staticmethod
+    def _mask(bits: Dict[str, int], names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            if name not in bits:
+                bits[name] = 1 << len(bits)
+            mask |= bits[name]
+        return mask
+
+    def _add(self, route_key: str, requirements: RouteRequirements):
+        scope_mask = self._mask(self._scope_bits, requirements.required_scopes)
+        role_mask = self._mask(self._role_bits, requirements.required_roles)
+
+        if route_key == DEFAULT_ROUTE:
+            route = Route(
+                route_key, ANY_METHOD, None, requirements, scope_mask, role_mask
+            )
+            self.default = route
+            self.routes.append(route)
+            return
+
+        method, _, path = route_key.partition(" ")
+        if not path.startswith("/"):
+            raise ValueError(
+                f"Invalid route key: {route_key}. Use METHOD /path or {DEFAULT_ROUTE}"
+            )
+
+        route_key = normalize_route_key(method, path)
+        if route_key in self._exact:
+            raise ValueError(f"Duplicate route key: {route_key}")
+
+        segments = split_path(path)
+        route = Route(
+            route_key, method.upper(), path, requirements, scope_mask, role_mask
+        )
+        self.routes.append(route)
+
+        # the route key of a matched route is resolved directly, this also covers
+        # all requests of routes without path parameters
+        self._exact[route_key] = route
+
+        node = self._trie
+        for index, segment in enumerate(segments):
+            if segment.startswith("{") and segment.endswith("+}"):
+                if index != len(segments) - 1:
+                    raise ValueError(
+                        f"Invalid route key: {route_key}. Greedy path parameters must be last"
+                    )
+                node.greedy = node.greedy or _Node()
+                node = node.greedy
+            elif segment.startswith("{") and segment.endswith("}"):
+                node.parameter = node.parameter or _Node()
+                node = node.parameter
+            else:
+                node = node.static.setdefault(segment, _Node())
+
+        node.routes[route.method] = route
+
+    def _match(
+        self, node: _Node, segments: List[str], index: int, method: str
+    ) -> Optional[Route]:
+        if index == len(segments):
+            return node.routes.get(method) or node.routes.get(ANY_METHOD)
+
+        # the most specific match wins: static segments, parameters, greedy parameters
+        child = node.static.get(segments[index])
+        if child is not None:
+            route = self._match(child, segments, index + 1, method)
+            if route is not None:
+                return route
+
+        if node.parameter is not None:
+            route = self._match(node.parameter, segments, index + 1, method)
+            if route is not None:
+                return route
+
+        if node.greedy is not None:
+            return node.greedy.routes.get(method) or node.greedy.routes.get(ANY_METHOD)
+
+        return None
+
+    def resolve(self, route_key: str) -> Optional[Route]:
+        """
+        Resolve a route key or a request, e.g. "GET /pets/42", to its route
+
+        Requests without a matching route resolve to the $default route if configured.
+        """
+
+        route = self._exact.get(route_key)
+        if route is not None:
+            return route
+
+        if route_key == DEFAULT_ROUTE:
+            return self.default
+
+        method, _, path = route_key.partition(" ")
+        method = method.upper()
+        segments = split_path(path)
+
+        route = self._exact.get(f"{method} /{'/'.join(segments)}") or self._match(
+            self._trie, segments, 0, method
+        )
+
+        return route or self.default
+
+    def token_masks(
+        self, introspection_token: IntrospectionResponse
+    ) -> Tuple[int, int]:
+        """
+        Encode the scopes and roles of the token as bitmasks of the table
+        """
+
+        scope_mask = 0
+        for scope in introspection_token.scope_set:
+            scope_mask |= self._scope_bits.get(scope, 0)
+
+        role_mask = 0
+        for role in introspection_token.role_set:
+            role_mask |= self._role_bits.get(role, 0)
+
+        return scope_mask, role_mask
+
+    def is_authorized(
+        self, introspection_token: IntrospectionResponse, route_key: str
+    ) -> bool:
+        """
+        Check the token against the requirements of the route, unknown routes are denied
+        """
+
+        route = self.resolve(route_key)
+        if route is None:
+            return False
+
+        return route.is_authorized(
+            introspection_token.client_id, *self.token_masks(introspection_token)
+        )
+
+    def authorized_routes(
+        self, introspection_token: IntrospectionResponse
+    ) -> Tuple[List[Route], List[Route]]:
+        """
+        Split the routes into the routes granted and refused to the token
+        """
+
+        client_id = introspection_token.client_id
+        scope_mask, role_mask = self.token_masks(introspection_token)
+
+        granted, refused = [], []
+        for route in self.routes:
+            if route.is_authorized(client_id, scope_mask, role_mask):
+                granted.append(route)
+            else:
+                refused.append(route)
+
+        return granted, refused
+
+    def __len__(self) -> int:
+        return len(self.routes)
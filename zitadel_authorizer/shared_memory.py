@@ -0,0 +1,267 @@
+"""
+Cache backend in a memory mapped file shared by the processes of a node, e.g.
+the gunicorn or uvicorn workers of a service, so all workers share one hit rate
+instead of introspecting the same token each. Place the file on a memory backed
+file system like /dev/shm to keep it off the disk.
+
+The file is split into fixed size slots grouped into buckets of a few slots,
+a key is stored in one of the slots of the bucket its digest maps to.
+Readers do not lock: every slot has a sequence number which writers make odd
+while they write the slot, readers retry until they copied the slot with the
+same even sequence number before and after and the checksum of the value matches.
+Writers of the same bucket are serialized by striped locks, a thread lock within
+the process and a fcntl byte range lock of the file between processes.
+Requires a platform with fcntl, e.g. linux or macOS.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .backends import CacheBackend
+
+MAGIC = b"ZACACHE1"
+
+# magic, number of slots, slot size, slots per bucket
+FILE_HEADER = struct.Struct("<8sIII")
+FILE_HEADER_SIZE = 64
+
+# sequence number, expiry as unix time, value length, crc32 of the value, key digest
+SLOT_HEADER = struct.Struct("<QdII16s")
+SEQUENCE = struct.Struct("<Q")
+
+EMPTY_KEY = bytes(16)
+
+# readers retry a slot which is written concurrently before treating it as miss
+READ_RETRIES = 100
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """
+    Cache backend in fixed size slots of a memory mapped file shared between processes
+    """
+
+    def __init__(
+        self,
+        path: str,
+        slots: int = 4096,
+        slot_size: int = 2048,
+        ways: int = 4,
+        stripes: int = 64,
+    ):
+        """
+        Open or create the cache file
+
+        path: the cache file, e.g. /dev/shm/zitadel-authorizer, all processes
+            sharing the cache must use the same path and geometry
+        slots: number of slots, a multiple of ways
+        slot_size: bytes of a slot including its header, values which do not
+            fit into a slot are not stored
+        ways: slots per bucket, a full bucket replaces the entry expiring first
+        stripes: number of writer locks
+        """
+
+        if ways <= 0 or slots <= 0 or slots % ways:
+            raise ValueError("slots must be a positive multiple of ways")
+
+        if slot_size <= SLOT_HEADER.size:
+            raise ValueError(f"slot_size must be greater than {SLOT_HEADER.size}")
+
+        if stripes <= 0:
+            raise ValueError("stripes must be greater than 0")
+
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = ways
+        self.buckets = slots // ways
+        self.stripes = stripes
+        self.capacity = slot_size - SLOT_HEADER.size
+        self.size = FILE_HEADER_SIZE + slots * slot_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._mmap = self._open()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _open(self) -> mmap.mmap:
+        geometry = (MAGIC, self.slots, self.slot_size, self.ways)
+
+        # the first byte of the file guards the initialization, the stripes follow it
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, self.size)
+                os.pwrite(self._fd, FILE_HEADER.pack(*geometry), 0)
+
+            header = os.pread(self._fd, FILE_HEADER.size, 0)
+            if FILE_HEADER.unpack(header) != geometry:
+                raise ValueError(
+                    f"The cache file {self.path} has a different format or geometry"
+                )
+
+            return mmap.mmap(self._fd, self.size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def _bucket(self, digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") % self.buckets
+
+    def _offsets(self, bucket: int) -> range:
+        start = FILE_HEADER_SIZE + bucket * self.ways * self.slot_size
+        return range(start, start + self.ways * self.slot_size, self.slot_size)
+
+    @contextmanager
+    def _locked(self, bucket: int) -> Iterator[None]:
+        # fcntl locks are held per process, threads are serialized by the thread lock
+        stripe = bucket % self.stripes
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe + 1)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe + 1)
+
+    def _read(self, offset: int, digest: bytes, now: float) -> Optional[bytes]:
+        buffer = self._mmap
+
+        for _ in range(READ_RETRIES):
+            sequence, expires_at, length, checksum, key = SLOT_HEADER.unpack_from(
+                buffer, offset
+            )
+            if sequence & 1:
+                # a writer is updating the slot
+                continue
+
+            if key != digest:
+                return None
+
+            start = offset + SLOT_HEADER.size
+            value = buffer[start : start + min(length, self.capacity)]
+
+            if SEQUENCE.unpack_from(buffer, offset)[0] != sequence:
+                continue
+
+            if expires_at <= now or zlib.crc32(value) != checksum:
+                return None
+
+            return value
+
+        return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        digest = self._digest(key)
+        now = time.time()
+
+        for offset in self._offsets(self._bucket(digest)):
+            value = self._read(offset, digest, now)
+            if value is not None:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def _write(self, offset: int, expires_at: float, value: bytes, digest: bytes):
+        buffer = self._mmap
+        sequence = SEQUENCE.unpack_from(buffer, offset)[0]
+
+        # odd while the slot is written, readers retry until it is even again
+        SEQUENCE.pack_into(buffer, offset, sequence + 1)
+        start = offset + SLOT_HEADER.size
+        buffer[start : start + len(value)] = value
+        SLOT_HEADER.pack_into(
+            buffer,
+            offset,
+            sequence + 1,
+            expires_at,
+            len(value),
+            zlib.crc32(value),
+            digest,
+        )
+        SEQUENCE.pack_into(buffer, offset, sequence + 2)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if ttl <= 0:
+            self.delete(key)
+            return
+
+        if len(value) > self.capacity:
+            self.oversized += 1
+            # an outdated entry of the key must not be served instead
+            self.delete(key)
+            return
+
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+        now = time.time()
+
+        with self._locked(bucket):
+            target, target_expires_at = None, None
+            for offset in self._offsets(bucket):
+                _, expires_at, _, _, slot_key = SLOT_HEADER.unpack_from(
+                    self._mmap, offset
+                )
+                if slot_key == digest:
+                    target, target_expires_at = offset, None
+                    break
+
+                if slot_key == EMPTY_KEY or expires_at <= now:
+                    expires_at = 0.0
+
+                # prefer free slots, then the entry expiring first
+                if target is None or expires_at < target_expires_at:
+                    target, target_expires_at = offset, expires_at
+
+            if target_expires_at is not None and target_expires_at > now:
+                self.evictions += 1
+
+            self._write(target, now + ttl, value, digest)
+
+    def delete(self, key: str):
+        digest = self._digest(key)
+        bucket = self._bucket(digest)
+
+        with self._locked(bucket):
+            for offset in self._offsets(bucket):
+                if SLOT_HEADER.unpack_from(self._mmap, offset)[4] == digest:
+                    self._write(offset, 0.0, b"", EMPTY_KEY)
+
+    def close(self):
+        if not self._mmap.closed:
+            self._mmap.close()
+            os.close(self._fd)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit, miss and eviction counters of this process and the geometry of the cache
+        """
+
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            oversized=self.oversized,
+            slots=self.slots,
+            slot_size=self.slot_size,
+        )
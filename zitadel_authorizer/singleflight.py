@@ -0,0 +1,101 @@
+"""
+Single-flight coalescing of concurrent calls, the first caller for a key performs
+the call while concurrent callers for the same key wait for and share its outcome.
+"""
+
+from typing import Any, Callable, Coroutine, Dict, Hashable, Optional
+import asyncio
+import threading
+
+
+class _Call:
+    """
+    An in-flight call and its outcome
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls for the same key
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Call fn unless a call for the key is already in flight,
+        in which case wait for that call and return its result or raise its error
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Deduplicates concurrent awaits for the same key on one event loop
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Coroutine], *args, **kwargs
+    ) -> Any:
+        """
+        Await fn unless a call for the key is already in flight,
+        in which case wait for that call and return its result or raise its error
+        """
+
+        call = self._calls.get(key)
+        if call is None:
+            # the call runs in its own task, so it completes for the other waiters
+            # even if the caller which started it is cancelled
+            call = asyncio.get_running_loop().create_task(fn(*args, **kwargs))
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._done(key, call))
+
+        # every caller is shielded, cancelling it does not cancel the shared call
+        return await asyncio.shield(call)
+
+    def _done(self, key: Hashable, call: asyncio.Task):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        # the error may not be awaited if all waiters were cancelled
+        if not call.cancelled():
+            call.exception()